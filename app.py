@@ -3,10 +3,17 @@
 # ============================================================
 import streamlit as st                   # Streamlit pour dashboard
 import pandas as pd                      # DataFrame
-import numpy as np                       # Calcul numérique
-import joblib                             # Charger modèle et scaler
-import os                                # Vérifier les fichiers
 from typing import List
+from churn_core import (
+    THRESHOLD,
+    FeatureEncoder,
+    load_artifacts,
+    predict_dataframe,
+    results_to_records,
+    warm_up,
+)
+from churn_memo import MemoizedModel
+from churn_stream import iter_chunks
 
 # ============================================================
 # 2️⃣ CHARGEMENT DES ARTEFACTS
@@ -15,43 +22,44 @@ model_path = "rf_churn_model.pkl"
 scaler_path = "scaler.pkl"
 features_path = "features.pkl"
 
-# Vérification existence fichiers
-for path in [model_path, scaler_path, features_path]:
-    if not os.path.exists(path):
-        st.error(f"Fichier introuvable : {path}")
+@st.cache_resource  # Chargement et préchauffage une seule fois par processus
+def load_ml_artifacts():
+    """
+    Charge le modèle (forêt aplatie), l'encodeur et prédit un client à vide
 
-# Chargement du modèle, scaler et features
-model = joblib.load(model_path)
-scaler = joblib.load(scaler_path)
-features = joblib.load(features_path)
+    Returns:
+        tuple: (model, encoder) - Modèle mémoïsé (lignes identiques et clients
+               déjà vus non reprédits), encodage + scaling précompilés
+    """
+    try:
+        model, scaler, features = load_artifacts(model_path, scaler_path, features_path)
+    except FileNotFoundError as e:
+        st.error(str(e))
+        st.stop()
+    encoder = FeatureEncoder(features, scaler=scaler)
+    warm_up(model, encoder, THRESHOLD)
+    return MemoizedModel(model), encoder
 
-THRESHOLD = 0.50  # Seuil optimisé pour augmenter le recall
+model, encoder = load_ml_artifacts()
+
+# Nombre maximum de lignes de résultats envoyées au navigateur
+MAX_DISPLAY_ROWS = 1_000
 
 # ============================================================
 # 3️⃣ FONCTION DE PRÉDICTION
 # ============================================================
-def make_prediction(df: pd.DataFrame):
+def make_prediction_df(df: pd.DataFrame) -> pd.DataFrame:
     """
-    Prédiction du churn pour un DataFrame complet
+    Prédiction du churn pour un DataFrame complet (résultat en colonnes)
     """
-    # One-hot encoding
-    df = pd.get_dummies(df)
-    # Alignement avec features du modèle
-    df = df.reindex(columns=features, fill_value=0)
-    # Scaling
-    X_scaled = scaler.transform(df)
-    # Probabilités
-    proba = model.predict_proba(X_scaled)[:, 1]
-    results = []
-    for p in proba:
-        prediction = int(p >= THRESHOLD)
-        risk = "High" if p >= 0.6 else "Medium" if p >= 0.4 else "Low"
-        results.append({
-            "churn_probability": round(float(p), 3),
-            "churn_prediction": prediction,
-            "risk_level": risk
-        })
-    return results
+    # Encodage + scaling + probabilités + seuil (cœur partagé)
+    return predict_dataframe(df, model, encoder, THRESHOLD)
+
+def make_prediction(df: pd.DataFrame) -> List[dict]:
+    """
+    Prédiction du churn, une liste de dicts par client (compatibilité)
+    """
+    return results_to_records(make_prediction_df(df))
 
 # ============================================================
 # 4️⃣ CONFIGURATION STREAMLIT
@@ -132,7 +140,8 @@ if mode == "Prédiction Batch (Fichier)":
         try:
             # Lecture selon type
             if uploaded_file.name.endswith(".csv") or uploaded_file.name.endswith(".txt"):
-                df = pd.read_csv(uploaded_file)
+                # Lecture typée, séparateur détecté (virgule, point-virgule, tabulation)
+                df = pd.concat(iter_chunks(uploaded_file, uploaded_file.name))
             elif uploaded_file.name.endswith(".xlsx"):
                 df = pd.read_excel(uploaded_file)
             elif uploaded_file.name.endswith(".json"):
@@ -145,10 +154,17 @@ if mode == "Prédiction Batch (Fichier)":
             st.dataframe(df.head())
 
             # Prédictions
-            results = make_prediction(df)
-            results_df = pd.DataFrame(results)
+            results_df = make_prediction_df(df)
             st.success("✅ Prédictions effectuées !")
-            st.dataframe(results_df)
+
+            # Répartition par niveau de risque calculée côté serveur
+            st.write("Clients par niveau de risque :")
+            st.dataframe(results_df["risk_level"].value_counts().rename("clients"))
+
+            # Seules les premières lignes sont envoyées au navigateur
+            if len(results_df) > MAX_DISPLAY_ROWS:
+                st.caption(f"Affichage des {MAX_DISPLAY_ROWS:,} premières lignes sur {len(results_df):,}")
+            st.dataframe(results_df.head(MAX_DISPLAY_ROWS))
 
         except Exception as e:
             st.error(f"Erreur lors du traitement du fichier : {e}")
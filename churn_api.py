@@ -0,0 +1,391 @@
+# ============================================================
+# CHURN-API : SERVICE REST DE PRÉDICTION
+# ============================================================
+# Service HTTP de scoring à faible latence pour le CRM, sans
+# interface Streamlit: le modèle est chargé une seule fois au
+# démarrage et chaque appel passe par le cœur de prédiction
+# Usage:
+#   python churn_api.py serve --port 8000
+#   python churn_api.py bench --url http://127.0.0.1:8000 --requests 5000
+# Endpoints:
+#   GET  /health          -> {"status": "ok", ...} (+ regroupement et cache des prédictions)
+#   GET  /metrics         -> temps par étape, latences et cache (format texte Prometheus)
+#   POST /predict         -> un client (objet JSON)
+#   POST /predict/batch   -> liste de clients (tableau JSON ou {"clients": [...]})
+# ============================================================
+
+# ============================================================
+# IMPORTATION DES BIBLIOTHÈQUES
+# ============================================================
+
+import argparse                           # Analyse des arguments
+import http.client                        # Générateur de charge
+import json                               # Corps des requêtes et réponses
+import sys                                # Sortie d'erreur
+import threading                          # Clients concurrents du générateur de charge
+import time                               # Mesure des latences
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+import numpy as np                        # Percentiles de latence
+
+from churn_batching import DEFAULT_MAX_BATCH_SIZE, DEFAULT_MAX_WAIT_MS, MicroBatcher
+from churn_core import (
+    FEATURES_PATH,
+    MODEL_PATH,
+    REQUIRED_COLUMNS,
+    SAMPLE_CLIENT,
+    SCALER_PATH,
+    THRESHOLD,
+    FeatureEncoder,
+    load_artifacts,
+    predict_records,
+    warm_up,
+)
+from churn_memo import MemoizedModel
+from churn_metrics import METRICS
+
+# ============================================================
+# PARAMÈTRES
+# ============================================================
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8000
+
+# Taille maximale d'un corps de requête (10 Mo)
+MAX_BODY_BYTES = 10 * 1024 * 1024
+
+# ============================================================
+# VALIDATION DES ENTRÉES
+# ============================================================
+
+class RequestError(Exception):
+    """Requête invalide (réponse HTTP 400)"""
+
+def validate_client(client) -> Dict:
+    """
+    Vérifie qu'un client contient toutes les colonnes obligatoires
+
+    Args:
+        client: Objet JSON décodé
+
+    Returns:
+        Dict: Le client, inchangé
+
+    Raises:
+        RequestError: Si ce n'est pas un objet ou si des colonnes manquent
+    """
+    if not isinstance(client, dict):
+        raise RequestError("Chaque client doit être un objet JSON")
+    missing = [col for col in REQUIRED_COLUMNS if client.get(col) is None]
+    if missing:
+        raise RequestError(f"Colonnes manquantes: {', '.join(missing)}")
+    return client
+
+# ============================================================
+# SERVICE HTTP
+# ============================================================
+
+class ChurnRequestHandler(BaseHTTPRequestHandler):
+    """
+    Gestionnaire des requêtes du service de scoring
+
+    Le modèle et l'encodeur sont partagés par tous les threads du
+    serveur (lecture seule). HTTP/1.1 garde la connexion ouverte
+    entre deux appels d'un même client.
+    """
+
+    protocol_version = "HTTP/1.1"
+    server_version = "ChurnAPI/1.0"
+    # En-têtes et corps partent en deux écritures: sans TCP_NODELAY,
+    # Nagle + ACK retardé ajoutent ~40 ms à chaque réponse
+    disable_nagle_algorithm = True
+
+    def do_GET(self) -> None:
+        if self.path == "/health":
+            batcher = self.server.batcher
+            memo = self.server.model.stats()
+            self._send_json(200, {"status": "ok", "batches": batcher.batches,
+                                  "mean_batch_size": round(batcher.mean_batch_size, 2),
+                                  "cache_hit_rate": round(memo["hit_rate"], 4),
+                                  "cache_size": memo["size"]})
+        elif self.path == "/metrics":
+            body = (self.server.metrics.to_prometheus() + self.server.model.to_prometheus()).encode("utf-8")
+            self._send_body(200, body, "text/plain; version=0.0.4; charset=utf-8")
+        else:
+            self._send_json(404, {"error": f"Ressource inconnue: {self.path}"})
+
+    def do_POST(self) -> None:
+        start = time.perf_counter()
+        rows = 0
+        try:
+            if self.path == "/predict":
+                client = validate_client(self._read_json())
+                result = self._predict_one(client)
+                rows = 1
+            elif self.path == "/predict/batch":
+                payload = self._read_json()
+                clients = payload.get("clients") if isinstance(payload, dict) else payload
+                if not isinstance(clients, list):
+                    raise RequestError("Le corps doit être une liste de clients ou {\"clients\": [...]}")
+                predictions = self._predict([validate_client(c) for c in clients])
+                result = {"count": len(predictions), "predictions": predictions}
+                rows = len(predictions)
+            else:
+                self._send_json(404, {"error": f"Ressource inconnue: {self.path}"})
+                return
+        except RequestError as e:
+            self._send_json(400, {"error": str(e)})
+            return
+        except Exception as e:
+            self._send_json(500, {"error": f"Erreur lors de la prédiction: {e}"})
+            return
+        self._send_json(200, result)
+        # Latence côté serveur: lecture du corps, prédiction et envoi de la réponse
+        self.server.metrics.observe("request", time.perf_counter() - start, rows)
+
+    def _read_json(self):
+        """Lit et décode le corps JSON de la requête"""
+        length = int(self.headers.get("Content-Length") or 0)
+        if length <= 0:
+            raise RequestError("Corps de requête vide")
+        if length > MAX_BODY_BYTES:
+            raise RequestError(f"Corps de requête trop volumineux (max {MAX_BODY_BYTES} octets)")
+        try:
+            return json.loads(self.rfile.read(length))
+        except ValueError as e:
+            raise RequestError(f"JSON invalide: {e}")
+
+    def _predict_one(self, client: Dict) -> Dict:
+        """Prédiction unitaire, regroupée avec les appels concurrents (micro-batching)"""
+        try:
+            return self.server.batcher.predict(client)
+        except (TypeError, ValueError) as e:
+            raise RequestError(f"Valeur invalide: {e}")
+
+    def _predict(self, clients: List[Dict]) -> List[Dict]:
+        """Prédiction via le cœur partagé (valeurs non numériques -> 400)"""
+        try:
+            return predict_records(clients, self.server.model, self.server.encoder,
+                                   self.server.threshold)
+        except (TypeError, ValueError) as e:
+            raise RequestError(f"Valeur invalide: {e}")
+
+    def _send_json(self, status: int, payload) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self._send_body(status, body, "application/json; charset=utf-8")
+
+    def _send_body(self, status: int, body: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        # Journal par requête désactivé: il coûte plus cher que la prédiction
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+def create_server(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                  model_path: str = MODEL_PATH,
+                  scaler_path: str = SCALER_PATH,
+                  features_path: str = FEATURES_PATH,
+                  threshold: float = THRESHOLD,
+                  verbose: bool = False,
+                  max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+                  max_wait_ms: float = DEFAULT_MAX_WAIT_MS) -> ThreadingHTTPServer:
+    """
+    Crée le serveur HTTP et charge les artefacts une seule fois
+
+    Args:
+        host (str): Adresse d'écoute
+        port (int): Port d'écoute (0 = port libre choisi par le système)
+        model_path (str): Chemin du modèle
+        scaler_path (str): Chemin du scaler
+        features_path (str): Chemin de la liste des features
+        threshold (float): Seuil de décision
+        verbose (bool): Journaliser chaque requête
+        max_batch_size (int): Appels /predict regroupés au maximum (1 = sans regroupement)
+        max_wait_ms (float): Attente maximale pour compléter un lot sous charge (ms)
+
+    Returns:
+        ThreadingHTTPServer: Serveur prêt (serve_forever)
+
+    Raises:
+        FileNotFoundError: Si un des artefacts est manquant
+    """
+    model, scaler, features = load_artifacts(model_path, scaler_path, features_path)
+    # Un appel porte sur peu de lignes: les threads joblib de la forêt coûtent plus qu'ils ne rapportent
+    if hasattr(model, "n_jobs"):
+        model.n_jobs = 1
+    # Clients déjà vus et doublons d'un lot: servis sans reprédire
+    model = MemoizedModel(model)
+
+    server = ThreadingHTTPServer((host, port), ChurnRequestHandler)
+    server.daemon_threads = True
+    server.model = model
+    server.encoder = FeatureEncoder(features, scaler=scaler)
+    server.threshold = threshold
+    server.verbose = verbose
+    server.metrics = METRICS
+    server.batcher = MicroBatcher(
+        lambda records: predict_records(records, model, server.encoder, threshold),
+        max_batch_size=max_batch_size,
+        max_wait_ms=max_wait_ms,
+    )
+
+    # Prédictions à vide (modèle d'origine): le premier vrai appel ne paie pas
+    # l'initialisation, et le client type n'entre pas dans le cache
+    warm_up(model.model, server.encoder, threshold)
+    return server
+
+# ============================================================
+# GÉNÉRATEUR DE CHARGE
+# ============================================================
+
+def run_load(url: str, n_requests: int = 1000, concurrency: int = 4,
+             batch_size: int = 0) -> Dict:
+    """
+    Envoie des requêtes au service et mesure les latences
+
+    Chaque client concurrent garde une connexion HTTP ouverte et
+    enchaîne ses requêtes.
+
+    Args:
+        url (str): URL du service (ex: http://127.0.0.1:8000)
+        n_requests (int): Nombre total de requêtes
+        concurrency (int): Nombre de clients concurrents
+        batch_size (int): 0 = /predict, sinon /predict/batch avec ce nombre de clients
+
+    Returns:
+        Dict: Nombre de requêtes, erreurs, débit et percentiles de latence (ms)
+    """
+    parts = urlsplit(url)
+    if batch_size > 0:
+        path, payload = "/predict/batch", [SAMPLE_CLIENT] * batch_size
+    else:
+        path, payload = "/predict", SAMPLE_CLIENT
+    # Corps en bytes: http.client l'envoie avec les en-têtes en une seule écriture
+    body = json.dumps(payload).encode("utf-8")
+    headers = {"Content-Type": "application/json"}
+
+    latencies: List[float] = []
+    errors = [0]
+    lock = threading.Lock()
+    per_client = [n_requests // concurrency + (i < n_requests % concurrency)
+                  for i in range(concurrency)]
+
+    def client(count: int) -> None:
+        connection = http.client.HTTPConnection(parts.hostname, parts.port or 80)
+        local: List[float] = []
+        local_errors = 0
+        for _ in range(count):
+            start = time.perf_counter()
+            connection.request("POST", path, body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            local.append(time.perf_counter() - start)
+            local_errors += response.status != 200
+        connection.close()
+        with lock:
+            latencies.extend(local)
+            errors[0] += local_errors
+
+    threads = [threading.Thread(target=client, args=(count,)) for count in per_client]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies_ms = np.array(latencies) * 1000
+    p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99]) if len(latencies_ms) else (0, 0, 0)
+    return {
+        "requests": len(latencies),
+        "errors": errors[0],
+        "requests_per_sec": len(latencies) / elapsed if elapsed > 0 else 0.0,
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+        "max_ms": float(latencies_ms.max()) if len(latencies_ms) else 0.0,
+    }
+
+# ============================================================
+# LIGNE DE COMMANDE
+# ============================================================
+
+def build_parser() -> argparse.ArgumentParser:
+    """Définition des arguments de churn-api"""
+    parser = argparse.ArgumentParser(prog="churn_api.py", description="Service REST de prédiction du churn")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="Démarrer le service")
+    serve.add_argument("--host", default=DEFAULT_HOST, help=f"Adresse d'écoute (défaut: {DEFAULT_HOST})")
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port (défaut: {DEFAULT_PORT})")
+    serve.add_argument("--threshold", type=float, default=THRESHOLD,
+                       help=f"Seuil de décision (défaut: {THRESHOLD})")
+    serve.add_argument("--model", default=MODEL_PATH, help="Chemin du modèle")
+    serve.add_argument("--scaler", default=SCALER_PATH, help="Chemin du scaler")
+    serve.add_argument("--features", default=FEATURES_PATH, help="Chemin de la liste des features")
+    serve.add_argument("--verbose", action="store_true", help="Journaliser chaque requête")
+    serve.add_argument("--max-batch-size", type=int, default=DEFAULT_MAX_BATCH_SIZE,
+                       help=f"Appels /predict regroupés au maximum (défaut: {DEFAULT_MAX_BATCH_SIZE}, "
+                            "1 = sans regroupement)")
+    serve.add_argument("--max-wait-ms", type=float, default=DEFAULT_MAX_WAIT_MS,
+                       help=f"Attente maximale d'un lot sous charge en ms (défaut: {DEFAULT_MAX_WAIT_MS})")
+
+    bench = commands.add_parser("bench", help="Générateur de charge contre un service démarré")
+    bench.add_argument("--url", default=f"http://{DEFAULT_HOST}:{DEFAULT_PORT}", help="URL du service")
+    bench.add_argument("--requests", type=int, default=1000, help="Nombre de requêtes (défaut: 1000)")
+    bench.add_argument("--concurrency", type=int, default=4, help="Clients concurrents (défaut: 4)")
+    bench.add_argument("--batch-size", type=int, default=0,
+                       help="Clients par requête via /predict/batch (0 = /predict, défaut)")
+    return parser
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Point d'entrée de churn-api
+
+    Args:
+        argv (List[str]): Arguments (sys.argv[1:] par défaut)
+
+    Returns:
+        int: Code de sortie (0 = succès)
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.command == "bench":
+        if args.requests < 1 or args.concurrency < 1:
+            parser.error("--requests et --concurrency doivent être supérieurs ou égaux à 1")
+        try:
+            stats = run_load(args.url, args.requests, args.concurrency, args.batch_size)
+        except OSError as e:
+            print(f"churn-api: erreur: service injoignable ({e})", file=sys.stderr)
+            return 1
+        print(json.dumps(stats, indent=2))
+        return 0
+
+    try:
+        server = create_server(args.host, args.port, args.model, args.scaler, args.features,
+                               args.threshold, args.verbose, args.max_batch_size, args.max_wait_ms)
+    except (FileNotFoundError, OSError, ValueError) as e:
+        print(f"churn-api: erreur: {e}", file=sys.stderr)
+        return 1
+
+    host, port = server.server_address[:2]
+    print(f"churn-api: écoute sur http://{host}:{port}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.batcher.close()
+        server.server_close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,196 @@
+# ============================================================
+# MICRO-BATCHING DES PRÉDICTIONS UNITAIRES
+# ============================================================
+# Regroupement des prédictions individuelles concurrentes
+# (formulaire Streamlit, API REST) en un seul appel predict_proba
+# Description: Le coût fixe d'un appel à la forêt (validation,
+#              préparation du parcours des arbres) est presque le
+#              même pour 1 ligne que pour 500: sous charge, les
+#              requêtes en attente sont prédites ensemble puis les
+#              résultats redistribués à chaque appelant
+# ============================================================
+
+# ============================================================
+# IMPORTATION DES BIBLIOTHÈQUES
+# ============================================================
+
+import queue                              # File des requêtes en attente
+import threading                          # Thread de prédiction
+import time                               # Fenêtre d'attente
+from concurrent.futures import Future     # Résultat rendu à chaque appelant
+from typing import Callable, Dict, List, Optional
+
+# ============================================================
+# PARAMÈTRES
+# ============================================================
+
+# Nombre maximum de clients prédits en un seul appel
+DEFAULT_MAX_BATCH_SIZE = 64
+
+# Attente maximale (ms) pour compléter un lot sous charge
+DEFAULT_MAX_WAIT_MS = 2.0
+
+# Marqueur d'arrêt du thread de prédiction
+_STOP = object()
+
+# ============================================================
+# REGROUPEMENT DES REQUÊTES
+# ============================================================
+
+class MicroBatcher:
+    """
+    Regroupe les prédictions unitaires concurrentes en lots
+
+    Un thread unique consomme la file des requêtes: il prend tout ce
+    qui est déjà en attente (jusqu'à max_batch_size), le prédit en un
+    appel, puis résout le Future de chaque appelant. Les requêtes
+    arrivées pendant une prédiction forment naturellement le lot suivant.
+
+    La fenêtre max_wait_ms n'est ouverte que sous charge (le lot
+    précédent contenait plusieurs requêtes): une requête isolée est
+    prédite immédiatement, sans latence ajoutée au repos.
+
+    Exemple:
+        batcher = MicroBatcher(lambda records: predict_records(records, model, encoder))
+        result = batcher.predict(client_data)
+    """
+
+    def __init__(self, predict_batch: Callable[[List[Dict]], List[Dict]],
+                 max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+                 max_wait_ms: float = DEFAULT_MAX_WAIT_MS):
+        """
+        Args:
+            predict_batch (Callable): Prédit une liste de clients, un résultat par client
+            max_batch_size (int): Nombre maximum de clients par lot (1 = pas de regroupement)
+            max_wait_ms (float): Attente maximale pour compléter un lot sous charge (ms)
+
+        Raises:
+            ValueError: Si max_batch_size < 1 ou max_wait_ms < 0
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size doit être supérieur ou égal à 1")
+        if max_wait_ms < 0:
+            raise ValueError("max_wait_ms doit être positif")
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+
+        # Statistiques (lecture seule depuis l'extérieur)
+        self.batches = 0
+        self.requests = 0
+
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._last_batch_size = 1
+
+    @property
+    def mean_batch_size(self) -> float:
+        """Taille moyenne des lots prédits"""
+        return self.requests / self.batches if self.batches else 0.0
+
+    def submit(self, record: Dict) -> Future:
+        """
+        Met un client en file d'attente
+
+        Args:
+            record (Dict): Données d'un client
+
+        Returns:
+            Future: Résolu avec le résultat du client (ou son exception)
+
+        Raises:
+            RuntimeError: Si le regroupement est arrêté
+        """
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("MicroBatcher arrêté")
+            if self._thread is None:
+                # Démarrage au premier appel (aucun thread pour un import seul)
+                self._thread = threading.Thread(target=self._run, name="churn-microbatcher",
+                                                daemon=True)
+                self._thread.start()
+            self._queue.put((record, future))
+        return future
+
+    def predict(self, record: Dict, timeout: Optional[float] = None) -> Dict:
+        """
+        Prédit un client (bloquant), éventuellement regroupé avec d'autres
+
+        Args:
+            record (Dict): Données d'un client
+            timeout (float): Attente maximale du résultat (s)
+
+        Returns:
+            Dict: Résultat de predict_batch pour ce client
+        """
+        return self.submit(record).result(timeout)
+
+    def close(self) -> None:
+        """Arrête le thread après avoir traité les requêtes déjà en file"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join()
+
+    def _collect(self, first) -> tuple:
+        """Constitue un lot à partir de la première requête reçue"""
+        batch = [first]
+        stop = False
+        deadline = None
+        # Fenêtre d'attente seulement sous charge (dernier lot > 1 requête)
+        if self.max_wait > 0 and self._last_batch_size > 1:
+            deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            try:
+                if deadline is None:
+                    item = self._queue.get_nowait()
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                stop = True
+                break
+            batch.append(item)
+        return batch, stop
+
+    def _run(self) -> None:
+        """Boucle du thread de prédiction"""
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            batch, stop = self._collect(first)
+            self._last_batch_size = len(batch)
+            self._resolve(batch)
+            if stop:
+                return
+
+    def _resolve(self, batch: List[tuple]) -> None:
+        """Prédit un lot et redistribue les résultats"""
+        try:
+            results = self.predict_batch([record for record, _ in batch])
+        except Exception as e:
+            if len(batch) > 1:
+                # Une requête invalide ne doit pas faire échouer les autres:
+                # chaque client est repris seul pour attribuer l'erreur au bon appelant
+                for item in batch:
+                    self._resolve([item])
+            else:
+                batch[0][1].set_exception(e)
+            return
+
+        self.batches += 1
+        self.requests += len(batch)
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
@@ -0,0 +1,553 @@
+# ============================================================
+# CHURN-BENCH : BENCHMARKS DU PIPELINE DE SCORING
+# ============================================================
+# Mesure de chaque étape du pipeline (démarrage à froid, chargement
+# des artefacts, prédiction, lecture des fichiers, exports) sur des
+# données synthétiques, avec sauvegarde JSON et comparaison à une référence
+# Usage:
+#   python churn_bench.py run -o bench_baseline.json
+#   python churn_bench.py run --stages startup --startup-budget 3
+#   python churn_bench.py run --quick --compare bench_baseline.json
+#   python churn_bench.py compare bench_baseline.json bench_results.json --threshold 0.15
+# ============================================================
+
+# ============================================================
+# IMPORTATION DES BIBLIOTHÈQUES
+# ============================================================
+
+import argparse                           # Analyse des arguments
+import json                               # Résultats sauvegardés
+import os                                 # Fichiers temporaires
+import platform                           # Description de la machine
+import shutil                             # Nettoyage du répertoire de travail
+import subprocess                         # Commit git mesuré
+import sys                                # Sorties standard et d'erreur
+import tempfile                           # Répertoire de travail
+import time                               # Chronométrage
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+import numpy as np                        # Données synthétiques
+import pandas as pd                       # Fichiers d'entrée et résultats
+
+from churn_core import (
+    FEATURES_PATH,
+    MODEL_PATH,
+    SCALER_PATH,
+    THRESHOLD,
+    FeatureEncoder,
+    load_artifacts,
+    predict_dataframe,
+)
+from churn_stream import (
+    export_csv_gz,
+    export_excel,
+    export_json,
+    export_jsonl,
+    export_parquet,
+    iter_chunks,
+)
+
+# ============================================================
+# PARAMÈTRES
+# ============================================================
+
+# Fichier modèle dont les données synthétiques reprennent les colonnes
+# et les types de contrat
+TEMPLATE_PATH = "test_clients.csv"
+
+# Intervalles des valeurs synthétiques: (min, max exclu, décimales)
+SYNTHETIC_RANGES = {
+    "age": (18, 80, 0),
+    "tenure_months": (0, 72, 0),
+    "monthly_charges": (20, 120, 2),
+    "data_usage_gb": (0, 50, 1),
+    "voice_minutes": (0, 1200, 0),
+    "support_calls": (0, 6, 0),
+    "network_quality": (1, 6, 0),
+    "payment_delay": (0, 15, 0),
+    "auto_payment": (0, 2, 0),
+}
+
+# Nombres de lignes prédites (--quick retire le million)
+DEFAULT_SIZES = [1, 1_000, 100_000, 1_000_000]
+QUICK_SIZES = [1, 1_000, 100_000]
+
+# Lignes des fichiers lus et exportés (Excel plafonné: openpyxl/xlsxwriter
+# sont lents et le format est limité en taille)
+DEFAULT_FILE_ROWS = 100_000
+QUICK_FILE_ROWS = 10_000
+EXCEL_MAX_BENCH_ROWS = 20_000
+
+# Répétitions par mesure et budget de temps d'une étape (s)
+DEFAULT_REPEATS = 5
+STAGE_BUDGET_S = 10.0
+
+# Écart relatif au-delà duquel une étape plus lente est une régression
+DEFAULT_THRESHOLD = 0.20
+
+# Formats d'entrée mesurés: extension -> écriture du fichier
+INPUT_FORMATS: Dict[str, Callable[[pd.DataFrame, str], None]] = {
+    "csv": lambda df, path: df.to_csv(path, index=False),
+    "txt": lambda df, path: df.to_csv(path, index=False, sep="\t"),
+    "json": lambda df, path: df.to_json(path, orient="records"),
+    "jsonl": lambda df, path: df.to_json(path, orient="records", lines=True),
+    "xlsx": lambda df, path: df.head(EXCEL_MAX_BENCH_ROWS).to_excel(path, index=False),
+    "parquet": lambda df, path: df.to_parquet(path, index=False),
+    "feather": lambda df, path: df.to_feather(path),
+}
+
+# Exports mesurés: nom -> (extension, construction depuis le CSV de résultats)
+EXPORT_FORMATS: Dict[str, tuple] = {
+    "csv_gz": (".csv.gz", export_csv_gz),
+    "xlsx": (".xlsx", lambda path, target: export_excel(path, target, max_rows=EXCEL_MAX_BENCH_ROWS)),
+    "json": (".json", export_json),
+    "jsonl": (".jsonl", export_jsonl),
+    "parquet": (".parquet", export_parquet),
+}
+
+# Démarrage à froid: code exécuté dans un interpréteur neuf (python -X importtime).
+# Il importe les modules du dashboard, charge les artefacts et prédit un client
+# à vide, puis écrit ses durées et les modules différés déjà chargés (JSON)
+STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import streamlit, churn_batching, churn_cache, churn_core, churn_metrics, churn_stream
+imported = time.perf_counter()
+model, scaler, features = churn_core.load_artifacts(*sys.argv[1:4])
+encoder = churn_core.FeatureEncoder(features, scaler=scaler)
+loaded = time.perf_counter()
+churn_core.warm_up(model, encoder)
+ready = time.perf_counter()
+print(json.dumps({
+    "import": imported - start, "load": loaded - imported,
+    "warm_up": ready - loaded, "total": ready - start,
+    "deferred_loaded": [name for name in sys.argv[4:] if name in sys.modules],
+}))
+"""
+
+# Modules importés seulement au premier graphique: signalés s'ils sont
+# chargés au démarrage (streamlit importe déjà plotly.graph_objects pour
+# son thème, mais pas plotly.express)
+DEFERRED_PACKAGES = ["plotly.express"]
+
+# Nombre de paquets les plus coûteux à l'import rapportés
+IMPORT_TOP_PACKAGES = 8
+
+STAGES = ["startup", "load", "predict", "parse", "export"]
+
+# ============================================================
+# DONNÉES SYNTHÉTIQUES
+# ============================================================
+
+def synthetic_clients(n_rows: int, seed: int = 0, template_path: str = TEMPLATE_PATH) -> pd.DataFrame:
+    """
+    Clients synthétiques au format de test_clients.csv
+
+    Les colonnes et les types de contrat viennent du fichier modèle;
+    les valeurs sont tirées uniformément dans SYNTHETIC_RANGES.
+
+    Args:
+        n_rows (int): Nombre de lignes
+        seed (int): Graine du générateur (données identiques d'un run à l'autre)
+        template_path (str): Fichier modèle
+
+    Returns:
+        pd.DataFrame: Clients synthétiques
+    """
+    template = pd.read_csv(template_path)
+    rng = np.random.default_rng(seed)
+    data = {}
+    for column in template.columns:
+        if column in SYNTHETIC_RANGES:
+            low, high, decimals = SYNTHETIC_RANGES[column]
+            if decimals:
+                data[column] = np.round(rng.uniform(low, high, n_rows), decimals)
+            else:
+                data[column] = rng.integers(low, high, n_rows)
+        else:
+            categories = template[column].dropna().unique()
+            data[column] = rng.choice(categories, n_rows)
+    return pd.DataFrame(data)
+
+# ============================================================
+# CHRONOMÉTRAGE
+# ============================================================
+
+def measure(function: Callable[[], object], repeats: int = DEFAULT_REPEATS,
+            budget: float = STAGE_BUDGET_S) -> List[float]:
+    """
+    Durées d'exécution d'une fonction (s)
+
+    Un premier appel non compté chauffe les caches (fichiers, imports
+    paresseux). S'il dépasse le budget, il sert de mesure unique; sinon
+    les répétitions s'arrêtent au budget (au moins une mesure).
+
+    Args:
+        function (Callable): Étape à mesurer
+        repeats (int): Nombre maximum de mesures
+        budget (float): Temps maximum consacré aux mesures (s)
+
+    Returns:
+        List[float]: Durées mesurées
+    """
+    warmup = _timed(function)
+    if warmup >= budget:
+        return [warmup]
+    timings: List[float] = []
+    deadline = time.perf_counter() + budget
+    while len(timings) < repeats and (not timings or time.perf_counter() < deadline):
+        timings.append(_timed(function))
+    return timings
+
+def _timed(function: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+def _result(timings: List[float], rows: Optional[int] = None) -> Dict:
+    """Statistiques d'une étape"""
+    median = float(np.median(timings))
+    result = {
+        "seconds_median": median,
+        "seconds_min": float(min(timings)),
+        "seconds": [float(t) for t in timings],
+    }
+    if rows is not None:
+        result["rows"] = rows
+        result["rows_per_second"] = rows / median if median > 0 else float("inf")
+    return result
+
+# ============================================================
+# ÉTAPES MESURÉES
+# ============================================================
+
+def run_benchmarks(stages: List[str] = STAGES, sizes: List[int] = DEFAULT_SIZES,
+                   file_rows: int = DEFAULT_FILE_ROWS, repeats: int = DEFAULT_REPEATS,
+                   model_path: str = MODEL_PATH, scaler_path: str = SCALER_PATH,
+                   features_path: str = FEATURES_PATH, log: Callable[[str], None] = print) -> Dict:
+    """
+    Mesure les étapes demandées du pipeline de scoring
+
+    Args:
+        stages (List[str]): Étapes parmi startup, load, predict, parse, export
+        sizes (List[int]): Nombres de lignes prédites
+        file_rows (int): Lignes des fichiers lus et exportés
+        repeats (int): Nombre maximum de mesures par étape
+        model_path, scaler_path, features_path (str): Artefacts
+        log (Callable): Affichage de l'avancement
+
+    Returns:
+        Dict: {"meta": {...}, "results": {nom_étape: statistiques}}
+    """
+    results: Dict[str, Dict] = {}
+
+    def record(name: str, function: Callable[[], object], rows: Optional[int] = None) -> None:
+        results[name] = _result(measure(function, repeats), rows)
+        log(_format_line(name, results[name]))
+
+    if "startup" in stages:
+        runs: List[Dict] = []
+        measure(lambda: runs.append(measure_startup(model_path, scaler_path, features_path)), repeats)
+        # Le premier démarrage (compilation .pyc, cache disque) n'est pas compté
+        runs = runs[1:] or runs
+        for part in ("import", "load", "warm_up", "total"):
+            results[f"startup/{part}"] = _result([run[part] for run in runs])
+            log(_format_line(f"startup/{part}", results[f"startup/{part}"]))
+        results["startup/import"]["packages"] = runs[-1]["packages"]
+        results["startup/total"]["deferred_loaded"] = runs[-1]["deferred_loaded"]
+        log("  imports les plus coûteux: " + ", ".join(
+            f"{name} {seconds * 1000:,.0f} ms" for name, seconds in runs[-1]["packages"].items()))
+        if runs[-1]["deferred_loaded"]:
+            log(f"  attention: chargé(s) au démarrage: {', '.join(runs[-1]['deferred_loaded'])}")
+
+    if "load" in stages:
+        record("load_artifacts", lambda: load_artifacts(model_path, scaler_path, features_path))
+
+    model, scaler, features = load_artifacts(model_path, scaler_path, features_path)
+    encoder = FeatureEncoder(features, scaler=scaler)
+
+    def predict(df: pd.DataFrame) -> pd.DataFrame:
+        return predict_dataframe(df, model, encoder, THRESHOLD)
+
+    if "predict" in stages:
+        for size in sizes:
+            df = synthetic_clients(size)
+            record(f"predict/{size}", lambda df=df: predict(df), rows=size)
+
+    if "parse" in stages or "export" in stages:
+        clients = synthetic_clients(file_rows, seed=1)
+        workdir = tempfile.mkdtemp(prefix="churn_bench_")
+        try:
+            if "parse" in stages:
+                for ext, write in INPUT_FORMATS.items():
+                    path = os.path.join(workdir, f"clients.{ext}")
+                    write(clients, path)
+                    rows = min(file_rows, EXCEL_MAX_BENCH_ROWS) if ext == "xlsx" else file_rows
+                    record(f"parse/{ext}", lambda path=path: _consume(iter_chunks(path, path)), rows=rows)
+
+            if "export" in stages:
+                results_path = os.path.join(workdir, "predictions.csv")
+                pd.concat([clients, predict(clients)], axis=1).to_csv(results_path, index=False)
+                for name, (ext, build) in EXPORT_FORMATS.items():
+                    target = os.path.join(workdir, f"export{ext}")
+                    rows = min(file_rows, EXCEL_MAX_BENCH_ROWS) if name == "xlsx" else file_rows
+                    record(f"export/{name}", lambda build=build, target=target: build(results_path, target),
+                           rows=rows)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    return {"meta": machine_info(), "results": results}
+
+def _consume(chunks) -> int:
+    """Parcourt tous les blocs lus (nombre de lignes)"""
+    return sum(len(chunk) for chunk in chunks)
+
+def measure_startup(model_path: str = MODEL_PATH, scaler_path: str = SCALER_PATH,
+                    features_path: str = FEATURES_PATH) -> Dict:
+    """
+    Un démarrage à froid dans un interpréteur neuf, sous python -X importtime
+
+    Args:
+        model_path, scaler_path, features_path (str): Artefacts
+
+    Returns:
+        Dict: Durées (s) import, load, warm_up et total jusqu'à la première
+              prédiction, temps d'import des paquets les plus coûteux
+              (packages) et modules différés chargés (deferred_loaded)
+
+    Raises:
+        ValueError: Si le démarrage échoue
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", STARTUP_SCRIPT,
+         os.path.abspath(model_path), os.path.abspath(scaler_path), os.path.abspath(features_path),
+         *DEFERRED_PACKAGES],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    if completed.returncode != 0:
+        detail = completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else completed.returncode
+        raise ValueError(f"démarrage à froid impossible: {detail}")
+    run = json.loads(completed.stdout.strip().splitlines()[-1])
+    run["packages"] = parse_importtime(completed.stderr, IMPORT_TOP_PACKAGES)
+    return run
+
+def parse_importtime(report: str, top: Optional[int] = None) -> Dict[str, float]:
+    """
+    Temps d'import par paquet d'un rapport python -X importtime
+
+    Les temps propres (self) des modules sont cumulés par paquet de
+    premier niveau (ex: sklearn.ensemble -> sklearn).
+
+    Args:
+        report (str): Sortie d'erreur de l'interpréteur
+        top (int): Nombre de paquets conservés, du plus coûteux au moins coûteux
+
+    Returns:
+        Dict[str, float]: {paquet: secondes}
+    """
+    packages: Dict[str, int] = {}
+    for line in report.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, _, module = line[len("import time:"):].split("|", 2)
+        if not self_us.strip().isdigit():
+            continue  # Ligne d'en-tête
+        package = module.strip().split(".")[0]
+        packages[package] = packages.get(package, 0) + int(self_us)
+    ranked = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+    return {name: microseconds / 1e6 for name, microseconds in ranked}
+
+def machine_info() -> Dict:
+    """Contexte de la mesure: machine, versions, commit"""
+    import sklearn
+
+    info = {
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "scikit-learn": sklearn.__version__,
+    }
+    try:
+        import pyarrow
+        info["pyarrow"] = pyarrow.__version__
+    except ImportError:
+        pass
+    try:
+        info["commit"] = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            check=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        pass
+    return info
+
+# ============================================================
+# COMPARAISON À UNE RÉFÉRENCE
+# ============================================================
+
+def compare_results(baseline: Dict, current: Dict, threshold: float = DEFAULT_THRESHOLD) -> List[Dict]:
+    """
+    Compare deux runs étape par étape (durée médiane)
+
+    Args:
+        baseline (Dict): Run de référence (sortie de run_benchmarks)
+        current (Dict): Run à évaluer
+        threshold (float): Écart relatif toléré (0.20 = 20 % plus lent)
+
+    Returns:
+        List[Dict]: Une ligne par étape: name, baseline, current, ratio et
+                    status (regression, improvement, ok, new, missing)
+    """
+    base_results = baseline.get("results", {})
+    current_results = current.get("results", {})
+    rows = []
+    for name in list(base_results) + [n for n in current_results if n not in base_results]:
+        before = base_results.get(name, {}).get("seconds_median")
+        after = current_results.get(name, {}).get("seconds_median")
+        if before is None:
+            rows.append({"name": name, "baseline": None, "current": after, "ratio": None, "status": "new"})
+            continue
+        if after is None:
+            rows.append({"name": name, "baseline": before, "current": None, "ratio": None, "status": "missing"})
+            continue
+        ratio = after / before if before > 0 else float("inf")
+        if ratio > 1 + threshold:
+            status = "regression"
+        elif ratio < 1 / (1 + threshold):
+            status = "improvement"
+        else:
+            status = "ok"
+        rows.append({"name": name, "baseline": before, "current": after, "ratio": ratio, "status": status})
+    return rows
+
+def format_comparison(rows: List[Dict]) -> str:
+    """Tableau texte d'une comparaison"""
+    labels = {"regression": "RÉGRESSION", "improvement": "amélioration", "ok": "ok",
+              "new": "nouveau", "missing": "absent"}
+    lines = [f"{'étape':<24} {'référence':>12} {'actuel':>12} {'ratio':>8}  statut"]
+    for row in rows:
+        before = f"{row['baseline'] * 1000:,.2f} ms" if row["baseline"] is not None else "-"
+        after = f"{row['current'] * 1000:,.2f} ms" if row["current"] is not None else "-"
+        ratio = f"x{row['ratio']:.2f}" if row["ratio"] is not None else "-"
+        lines.append(f"{row['name']:<24} {before:>12} {after:>12} {ratio:>8}  {labels[row['status']]}")
+    return "\n".join(lines)
+
+def _format_line(name: str, result: Dict) -> str:
+    line = f"{name:<24} {result['seconds_median'] * 1000:>12,.2f} ms"
+    if "rows_per_second" in result:
+        line += f"  ({result['rows_per_second']:,.0f} lignes/s)"
+    return line
+
+def _load_json(path: str) -> Dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+# ============================================================
+# LIGNE DE COMMANDE
+# ============================================================
+
+def build_parser() -> argparse.ArgumentParser:
+    """Définition des arguments de churn-bench"""
+    parser = argparse.ArgumentParser(prog="churn_bench.py", description="Benchmarks du pipeline de scoring")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Mesurer les étapes du pipeline")
+    run.add_argument("-o", "--output", default="bench_results.json",
+                     help="Fichier JSON des résultats (défaut: bench_results.json, '-' pour la sortie standard)")
+    run.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES,
+                     help="Étapes mesurées (défaut: toutes)")
+    run.add_argument("--quick", action="store_true",
+                     help=f"Sans le million de lignes, fichiers de {QUICK_FILE_ROWS:,} lignes")
+    run.add_argument("--sizes", type=int, nargs="+", help="Nombres de lignes prédites")
+    run.add_argument("--file-rows", type=int, help=f"Lignes des fichiers lus et exportés (défaut: {DEFAULT_FILE_ROWS:,})")
+    run.add_argument("--repeats", type=int, default=DEFAULT_REPEATS,
+                     help=f"Mesures maximum par étape (défaut: {DEFAULT_REPEATS})")
+    run.add_argument("--compare", metavar="BASELINE", help="Comparer à un run de référence (JSON)")
+    run.add_argument("--startup-budget", type=float, metavar="SECONDES",
+                     help="Durée maximale du démarrage à froid jusqu'à la première prédiction (code 1 au-delà)")
+    run.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                     help=f"Écart relatif toléré (défaut: {DEFAULT_THRESHOLD})")
+    run.add_argument("--model", default=MODEL_PATH, help="Chemin du modèle")
+    run.add_argument("--scaler", default=SCALER_PATH, help="Chemin du scaler")
+    run.add_argument("--features", default=FEATURES_PATH, help="Chemin de la liste des features")
+
+    compare = commands.add_parser("compare", help="Comparer deux runs enregistrés")
+    compare.add_argument("baseline", help="Run de référence (JSON)")
+    compare.add_argument("current", help="Run à évaluer (JSON)")
+    compare.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                         help=f"Écart relatif toléré (défaut: {DEFAULT_THRESHOLD})")
+    return parser
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Point d'entrée de churn-bench
+
+    Args:
+        argv (List[str]): Arguments (sys.argv[1:] par défaut)
+
+    Returns:
+        int: Code de sortie (0 = succès, 1 = régression, budget de démarrage dépassé ou erreur)
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.threshold < 0:
+        parser.error("--threshold doit être positif")
+
+    over_budget = False
+    if args.command == "compare":
+        try:
+            baseline, current = _load_json(args.baseline), _load_json(args.current)
+        except (OSError, ValueError) as e:
+            print(f"churn-bench: erreur: {e}", file=sys.stderr)
+            return 1
+    else:
+        if args.repeats < 1:
+            parser.error("--repeats doit être supérieur ou égal à 1")
+        sizes = args.sizes or (QUICK_SIZES if args.quick else DEFAULT_SIZES)
+        file_rows = args.file_rows or (QUICK_FILE_ROWS if args.quick else DEFAULT_FILE_ROWS)
+        baseline = None
+        try:
+            if args.compare:
+                baseline = _load_json(args.compare)
+            current = run_benchmarks(args.stages, sizes, file_rows, args.repeats,
+                                     args.model, args.scaler, args.features,
+                                     log=lambda line: print(line, file=sys.stderr))
+        except (OSError, ValueError, ImportError) as e:
+            print(f"churn-bench: erreur: {e}", file=sys.stderr)
+            return 1
+
+        text = json.dumps(current, indent=2)
+        if args.output == "-":
+            print(text)
+        else:
+            with open(args.output, "w", encoding="utf-8") as f:
+                f.write(text + "\n")
+            print(f"churn-bench: résultats écrits dans {args.output}", file=sys.stderr)
+
+        startup = current["results"].get("startup/total")
+        if args.startup_budget is not None and startup is not None:
+            over_budget = startup["seconds_median"] > args.startup_budget
+            if over_budget:
+                print(f"churn-bench: démarrage à froid de {startup['seconds_median']:.2f} s, "
+                      f"au-delà du budget de {args.startup_budget:.2f} s", file=sys.stderr)
+        if baseline is None:
+            return 1 if over_budget else 0
+
+    rows = compare_results(baseline, current, args.threshold)
+    print(format_comparison(rows), file=sys.stderr)
+    if baseline.get("meta", {}).get("platform") != current.get("meta", {}).get("platform"):
+        print("churn-bench: attention: runs mesurés sur des machines différentes", file=sys.stderr)
+    regressions = [row["name"] for row in rows if row["status"] == "regression"]
+    if regressions:
+        print(f"churn-bench: {len(regressions)} régression(s) au-delà de {args.threshold:.0%}: "
+              f"{', '.join(regressions)}", file=sys.stderr)
+        return 1
+    return 1 if over_budget else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
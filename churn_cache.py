@@ -0,0 +1,379 @@
+# ============================================================
+# CACHE DES RÉSULTATS BATCH
+# ============================================================
+# Résultats de scoring, agrégats et exports conservés sur disque,
+# indexés par l'empreinte du contenu du fichier uploadé
+# Description: Un même fichier n'est ni relu ni reprédit, dans
+#              une session comme d'une session à l'autre; les
+#              entrées les moins récemment utilisées sont
+#              supprimées au-delà d'une taille totale maximale
+# ============================================================
+
+# ============================================================
+# IMPORTATION DES BIBLIOTHÈQUES
+# ============================================================
+
+import hashlib                            # Empreinte du contenu des fichiers
+import json                               # Agrégats du batch (BatchSummary.to_dict)
+import os                                 # Fichiers du cache
+import shutil                             # Suppression des entrées évincées
+import stat                               # Droits du répertoire du cache
+import tempfile                           # Fichiers en cours d'écriture
+import threading                          # Accès concurrents des sessions Streamlit
+import time                               # Date de dernier accès
+from collections import Counter           # Exports en cours par entrée
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+# ============================================================
+# PARAMÈTRES
+# ============================================================
+
+# Répertoire du cache (partagé par toutes les sessions du serveur), privé à
+# l'utilisateur: un répertoire commun (/tmp) laisserait un autre compte
+# y déposer des résultats
+DEFAULT_CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+    "churn_batch_cache",
+)
+
+# Taille totale maximale du cache sur disque (1 Go)
+DEFAULT_MAX_BYTES = 1024 ** 3
+
+# Fichiers d'une entrée
+RESULTS_FILE = "predictions.csv"
+SUMMARY_FILE = "summary.json"
+PROBABILITIES_FILE = "probabilities.npy"
+
+# Fichiers de résultats en cours d'écriture (new_spool), à la racine du cache
+SPOOL_PREFIX = ".spool_"
+
+# Ancienneté au-delà de laquelle un fichier en cours d'écriture est abandonné
+# (processus arrêté pendant un batch): écrit bloc par bloc, un fichier
+# actif est modifié bien plus souvent (1 heure)
+STALE_SPOOL_SECONDS = 3600
+
+# Taille des blocs lus pour le calcul des empreintes (1 Mo)
+HASH_BLOCK_SIZE = 1024 * 1024
+
+# ============================================================
+# EMPREINTES
+# ============================================================
+
+def hash_content(source) -> str:
+    """
+    Empreinte SHA-256 du contenu d'un fichier
+
+    Args:
+        source: Chemin ou objet fichier binaire (rembobiné après lecture)
+
+    Returns:
+        str: Empreinte hexadécimale
+    """
+    digest = hashlib.sha256()
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+                digest.update(block)
+    else:
+        position = source.tell()
+        source.seek(0)
+        for block in iter(lambda: source.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+        source.seek(position)
+    return digest.hexdigest()
+
+def fingerprint_files(paths: Iterable[str]) -> str:
+    """
+    Empreinte d'un ensemble de fichiers (chemin, taille, date de modification)
+
+    Sert à invalider le cache quand un artefact (modèle, scaler) change.
+
+    Args:
+        paths (Iterable[str]): Fichiers à prendre en compte
+
+    Returns:
+        str: Empreinte hexadécimale
+    """
+    parts = []
+    for path in paths:
+        file_stat = os.stat(path)
+        parts.append(f"{os.path.abspath(path)}:{file_stat.st_size}:{file_stat.st_mtime_ns}")
+    return make_key(*parts)
+
+def make_key(*parts) -> str:
+    """Clé de cache à partir de plusieurs éléments (empreinte, format, seuil...)"""
+    return hashlib.sha256("\x1f".join(map(str, parts)).encode("utf-8")).hexdigest()
+
+# ============================================================
+# CACHE SUR DISQUE
+# ============================================================
+
+def make_private_dir(directory: str) -> None:
+    """
+    Crée un répertoire réservé à l'utilisateur courant (droits 0700)
+
+    Un répertoire existant doit appartenir à l'utilisateur: sinon un
+    autre compte aurait pu le créer avant lui pour y déposer des
+    fichiers. Ses droits sont ramenés à 0700.
+
+    Args:
+        directory (str): Répertoire à créer ou vérifier
+
+    Raises:
+        PermissionError: Si le répertoire appartient à un autre utilisateur
+    """
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    if not hasattr(os, "getuid"):
+        return  # Windows: droits gérés par les ACL du profil utilisateur
+    info = os.lstat(directory)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid():
+        raise PermissionError(f"Répertoire de cache non sûr (autre propriétaire ou lien): {directory}")
+    if stat.S_IMODE(info.st_mode) != 0o700:
+        os.chmod(directory, 0o700)
+
+class ResultCache:
+    """
+    Cache disque des résultats batch avec éviction par taille (LRU)
+
+    Chaque entrée est un répertoire nommé par sa clé, contenant le
+    fichier de résultats (CSV écrit bloc par bloc), les agrégats
+    (BatchSummary), les probabilités brutes et les exports déjà
+    construits. Le répertoire est
+    marqué à chaque accès: au-delà de max_bytes, les entrées les moins
+    récemment utilisées sont supprimées.
+
+    Exemple:
+        cache = ResultCache()
+        if not cache.contains(key):
+            with cache.new_spool() as spool:
+                ...  # écriture des résultats
+            cache.store(key, spool.name, summary)
+        summary = cache.load_summary(key, BatchSummary)
+    """
+
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Args:
+            directory (str): Répertoire du cache (créé si besoin, privé à l'utilisateur)
+            max_bytes (int): Taille totale maximale sur disque
+
+        Raises:
+            PermissionError: Si le répertoire appartient à un autre utilisateur
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.RLock()
+        # Un verrou par export: seule la construction d'un même fichier est attendue
+        self._export_locks: Dict[Tuple[str, str], threading.Lock] = {}
+        # Exports en cours par entrée (jamais évincée pendant la construction)
+        self._building: Counter = Counter()
+        make_private_dir(directory)
+        self.remove_stale_spools()
+
+    def _entry(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def path(self, key: str, name: str) -> str:
+        """Chemin d'un fichier d'une entrée"""
+        return os.path.join(self._entry(key), name)
+
+    def contains(self, key: str) -> bool:
+        """Indique si les résultats d'une clé sont en cache"""
+        return os.path.exists(self.path(key, RESULTS_FILE)) and os.path.exists(self.path(key, SUMMARY_FILE))
+
+    def new_spool(self, suffix: str = ".csv"):
+        """
+        Fichier temporaire de résultats, dans le répertoire du cache
+
+        Returns:
+            NamedTemporaryFile: Fichier texte ouvert en écriture (delete=False)
+        """
+        return tempfile.NamedTemporaryFile(
+            mode="w", encoding="utf-8", newline="",
+            prefix=SPOOL_PREFIX, suffix=suffix, dir=self.directory, delete=False
+        )
+
+    def store(self, key: str, results_path: str, summary) -> None:
+        """
+        Enregistre les résultats et les agrégats d'un batch
+
+        Args:
+            key (str): Clé de cache
+            results_path (str): Fichier de résultats (déplacé dans le cache)
+            summary: Agrégats du batch (BatchSummary, enregistré en JSON par to_dict)
+        """
+        with self._lock:
+            entry = self._entry(key)
+            os.makedirs(entry, exist_ok=True)
+            os.replace(results_path, self.path(key, RESULTS_FILE))
+            with open(self.path(key, SUMMARY_FILE), "w", encoding="utf-8") as f:
+                # Scalaires NumPy éventuels (compteurs) convertis en nombres Python
+                json.dump(summary.to_dict(), f, default=lambda value: value.item())
+            self.touch(key)
+            self.evict(keep=key)
+
+    def load_summary(self, key: str, summary_type):
+        """
+        Agrégats d'un batch en cache
+
+        Args:
+            key (str): Clé de cache
+            summary_type: Classe des agrégats (BatchSummary, relu par from_dict)
+
+        Returns:
+            BatchSummary ou None si l'entrée a été évincée ou est illisible
+        """
+        try:
+            with open(self.path(key, SUMMARY_FILE), "r", encoding="utf-8") as f:
+                summary = summary_type.from_dict(json.load(f))
+        except (FileNotFoundError, ValueError, KeyError, TypeError):
+            return None
+        self.touch(key)
+        return summary
+
+    def export(self, key: str, name: str, build: Callable[[str, str], None]) -> str:
+        """
+        Chemin d'un export d'une entrée, construit au premier appel
+
+        La construction (parfois plusieurs minutes) se fait hors du verrou
+        du cache: seules les demandes du même export l'attendent. Elle
+        écrit dans un fichier temporaire propre à l'appel, renommé une
+        fois complet et supprimé si build échoue.
+
+        Args:
+            key (str): Clé de cache
+            name (str): Nom du fichier d'export (ex: predictions.xlsx)
+            build (Callable): build(chemin_resultats, chemin_export) écrit l'export
+
+        Returns:
+            str: Chemin de l'export
+        """
+        target = self.path(key, name)
+        with self._lock:
+            export_lock = self._export_locks.setdefault((key, name), threading.Lock())
+        with export_lock:
+            if not os.path.exists(target):
+                self._build_export(key, target, build)
+        self.touch(key)
+        return target
+
+    def _build_export(self, key: str, target: str, build: Callable[[str, str], None]) -> None:
+        """Construit un export dans un fichier temporaire, puis le renomme"""
+        with self._lock:
+            self._building[key] += 1
+        try:
+            # Écriture dans un fichier temporaire: un export interrompu n'est jamais servi
+            handle, partial = tempfile.mkstemp(prefix=f".{os.path.basename(target)}.", suffix=".partial",
+                                               dir=self._entry(key))
+            os.close(handle)
+            try:
+                build(self.path(key, RESULTS_FILE), partial)
+                with self._lock:
+                    os.replace(partial, target)
+                    self.evict(keep=key)
+            finally:
+                if os.path.exists(partial):
+                    os.remove(partial)
+        finally:
+            with self._lock:
+                self._building[key] -= 1
+                if not self._building[key]:
+                    del self._building[key]
+
+    def touch(self, key: str) -> None:
+        """Marque une entrée comme récemment utilisée"""
+        now = time.time()
+        try:
+            os.utime(self._entry(key), (now, now))
+        except FileNotFoundError:
+            pass
+
+    def entry_size(self, key: str) -> int:
+        """Taille d'une entrée sur disque (octets)"""
+        entry = self._entry(key)
+        try:
+            return sum(entry_file.stat().st_size for entry_file in os.scandir(entry) if entry_file.is_file())
+        except FileNotFoundError:
+            return 0
+
+    def _spools(self):
+        """Fichiers en cours d'écriture à la racine du cache"""
+        return [entry for entry in os.scandir(self.directory)
+                if entry.name.startswith(SPOOL_PREFIX) and entry.is_file()]
+
+    def remove_stale_spools(self, max_age: float = STALE_SPOOL_SECONDS) -> int:
+        """
+        Supprime les fichiers en cours d'écriture abandonnés
+
+        Un batch interrompu sans nettoyage (processus arrêté) laisse son
+        fichier .spool_* à la racine du cache, hors de toute entrée.
+
+        Args:
+            max_age (float): Ancienneté minimale (secondes depuis la dernière écriture)
+
+        Returns:
+            int: Nombre de fichiers supprimés
+        """
+        removed = 0
+        limit = time.time() - max_age
+        for spool in self._spools():
+            try:
+                if spool.stat().st_mtime < limit:
+                    os.remove(spool.path)
+                    removed += 1
+            except FileNotFoundError:
+                pass  # Déjà déplacé dans une entrée (store) ou supprimé
+        return removed
+
+    def _spool_bytes(self) -> int:
+        """Taille des fichiers en cours d'écriture (octets)"""
+        total = 0
+        for spool in self._spools():
+            try:
+                total += spool.stat().st_size
+            except FileNotFoundError:
+                pass
+        return total
+
+    @property
+    def size_bytes(self) -> int:
+        """Taille totale du cache sur disque, fichiers en cours d'écriture compris (octets)"""
+        return sum(self.entry_size(key) for key in self.keys()) + self._spool_bytes()
+
+    def keys(self):
+        """Clés présentes dans le cache"""
+        return [entry.name for entry in os.scandir(self.directory) if entry.is_dir()]
+
+    def evict(self, keep: Optional[str] = None) -> None:
+        """
+        Supprime les entrées les moins récemment utilisées au-delà de max_bytes
+
+        Les entrées dont un export est en construction sont gardées. Les
+        fichiers en cours d'écriture abandonnés sont supprimés; les autres
+        comptent dans la taille totale.
+
+        Args:
+            keep (str): Entrée à ne jamais supprimer (celle en cours d'utilisation)
+        """
+        with self._lock:
+            self.remove_stale_spools()
+            entries = []
+            for entry in os.scandir(self.directory):
+                if entry.is_dir():
+                    entries.append((entry.stat().st_mtime, entry.name, self.entry_size(entry.name)))
+            total = sum(size for _, _, size in entries) + self._spool_bytes()
+            for _, key, size in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                if key == keep or key in self._building:
+                    continue
+                shutil.rmtree(self._entry(key), ignore_errors=True)
+                for export_key in [export_key for export_key in self._export_locks if export_key[0] == key]:
+                    del self._export_locks[export_key]
+                total -= size
+
+    def clear(self) -> None:
+        """Vide le cache"""
+        with self._lock:
+            for key in self.keys():
+                shutil.rmtree(self._entry(key), ignore_errors=True)
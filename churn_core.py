@@ -0,0 +1,646 @@
+# ============================================================
+# CŒUR DE PRÉDICTION DU CHURN
+# ============================================================
+# Fonctions de prédiction partagées par streamlit_app.py, app.py
+# et le scoring en ligne de commande (churn_score.py)
+# Description: Chargement des artefacts, encodage des features et
+#              post-traitement vectorisé des probabilités du
+#              modèle (seuil, niveau de risque) sans dépendance
+#              à Streamlit
+# ============================================================
+
+# ============================================================
+# IMPORTATION DES BIBLIOTHÈQUES
+# ============================================================
+
+import numpy as np                        # Calculs vectorisés sur les probabilités
+import pandas as pd                       # Résultats sous forme de DataFrame
+import joblib                             # Chargement des modèles ML sauvegardés
+import json                               # Description des artefacts enregistrés
+import os                                 # Vérification des fichiers
+import shutil                             # Remplacement d'un stockage périmé
+import tempfile                           # Écriture atomique du stockage
+import time                               # Durée du préchauffage
+from typing import List, Dict, Optional, Tuple  # Annotations de types pour le code
+
+from churn_forest import FlatForest, compile_forest  # Moteur d'inférence aplati de la forêt
+from churn_metrics import METRICS, MetricsRegistry  # Temps par étape et latences
+
+# ============================================================
+# ARTEFACTS ML
+# ============================================================
+
+# Chemins par défaut (relatifs au répertoire de lancement)
+MODEL_PATH = "rf_churn_model.pkl"
+SCALER_PATH = "scaler.pkl"
+FEATURES_PATH = "features.pkl"
+
+# Stockage des artefacts en tableaux .npy projetés en mémoire, à côté du
+# modèle (rf_churn_model.pkl -> rf_churn_model.flat/)
+STORE_SUFFIX = ".flat"
+STORE_META_FILE = "artifacts.json"
+STORE_FORMAT_VERSION = 1
+
+def load_artifacts(model_path: str = MODEL_PATH,
+                   scaler_path: str = SCALER_PATH,
+                   features_path: str = FEATURES_PATH,
+                   compile_model: bool = True,
+                   use_store: bool = True,
+                   sklearn_fallback: bool = False) -> Tuple:
+    """
+    Charge le modèle ML, le scaler et la liste des features
+
+    Par défaut, la forêt est aplatie au chargement (FlatForest): mêmes
+    probabilités que model.predict_proba, sans le surcoût fixe de
+    scikit-learn à chaque appel.
+
+    Le premier chargement enregistre la forêt aplatie et le scaler en
+    tableaux .npy (model_store_path). Les chargements suivants les
+    relisent en projection mémoire, sans dépickler le modèle ni
+    importer scikit-learn: quelques millisecondes, et une seule copie
+    des nœuds en cache disque pour tous les processus du serveur. Le
+    stockage est reconstruit si un des fichiers .pkl change.
+
+    Tous les batchs sont alors prédits depuis ces tableaux, par blocs.
+    Avec sklearn_fallback, les batchs d'au moins LAZY_COMPILED_MIN_ROWS
+    lignes passent par les arbres scikit-learn, chargés au premier
+    besoin: inférence plus rapide sur les très gros fichiers, mais
+    import de scikit-learn et copie privée du modèle dans le processus.
+
+    Args:
+        model_path (str): Chemin du modèle Random Forest
+        scaler_path (str): Chemin du StandardScaler
+        features_path (str): Chemin de la liste des features
+        compile_model (bool): Aplatir la forêt pour l'inférence
+        use_store (bool): Relire / enregistrer le stockage projeté en mémoire
+                          (forêt aplatie uniquement)
+        sklearn_fallback (bool): Charger les arbres scikit-learn pour les grands
+                                 batchs (forêt aplatie uniquement)
+
+    Returns:
+        tuple: (model, scaler, features) - Les artefacts ML chargés
+
+    Raises:
+        FileNotFoundError: Si un des fichiers est manquant
+    """
+    missing_files = [
+        path for path in [model_path, scaler_path, features_path]
+        if not os.path.exists(path)
+    ]
+    if missing_files:
+        raise FileNotFoundError(f"Fichiers manquants: {', '.join(missing_files)}")
+
+    sources = [model_path, scaler_path, features_path]
+    store = model_store_path(model_path)
+    if compile_model and use_store:
+        artifacts = load_model_store(store, sources, sklearn_fallback)
+        if artifacts is not None:
+            return artifacts
+
+    model = joblib.load(model_path)
+    if compile_model:
+        model = compile_forest(model)
+    scaler = joblib.load(scaler_path)
+    features = joblib.load(features_path)
+    if compile_model and use_store and isinstance(model, FlatForest):
+        save_model_store(store, model, scaler, features, sources)
+    if isinstance(model, FlatForest) and not sklearn_fallback:
+        # Arbres scikit-learn libérés: mêmes parcours qu'une forêt relue du stockage
+        model.estimators = None
+    return model, scaler, features
+
+class ScalerParams:
+    """
+    Paramètres d'un StandardScaler ajusté, relus sans scikit-learn
+
+    Expose les attributs lus par FeatureEncoder (mean_, scale_,
+    with_mean, with_std, feature_names_in_), qui applique la même
+    standardisation qu'avec le StandardScaler d'origine.
+    """
+
+    def __init__(self, mean: Optional[np.ndarray], scale: Optional[np.ndarray],
+                 with_mean: bool = True, with_std: bool = True,
+                 feature_names: Optional[List[str]] = None):
+        """
+        Args:
+            mean (np.ndarray): Moyennes par colonne (None si with_mean=False)
+            scale (np.ndarray): Écarts-types par colonne (None si with_std=False)
+            with_mean (bool): Centrage appliqué
+            with_std (bool): Réduction appliquée
+            feature_names (List[str]): Colonnes d'ajustement (optionnel)
+        """
+        self.mean_ = mean
+        self.scale_ = scale
+        self.with_mean = with_mean
+        self.with_std = with_std
+        self.feature_names_in_ = None if feature_names is None else np.asarray(feature_names, dtype=object)
+
+def model_store_path(model_path: str = MODEL_PATH) -> str:
+    """Répertoire du stockage projeté en mémoire d'un modèle (rf_churn_model.flat)"""
+    return os.path.splitext(model_path)[0] + STORE_SUFFIX
+
+def _source_fingerprint(paths: List[str]) -> List[List[int]]:
+    """Taille et date de modification des fichiers .pkl d'origine"""
+    return [[os.stat(path).st_size, os.stat(path).st_mtime_ns] for path in paths]
+
+def save_model_store(directory: str, forest: FlatForest, scaler, features: List[str],
+                     sources: List[str]) -> bool:
+    """
+    Enregistre la forêt aplatie, le scaler et les features en tableaux .npy
+
+    L'écriture se fait dans un répertoire temporaire renommé à la fin:
+    un autre processus ne lit jamais un stockage incomplet. Un échec
+    (répertoire en lecture seule, scaler non standard) n'est pas une
+    erreur: les artefacts restent chargés depuis les fichiers .pkl.
+
+    Args:
+        directory (str): Répertoire du stockage (model_store_path)
+        forest (FlatForest): Forêt aplatie par from_model
+        scaler: StandardScaler ajusté (mean_, scale_)
+        features (List[str]): Colonnes attendues par le modèle
+        sources (List[str]): Fichiers .pkl d'origine (modèle, scaler, features)
+
+    Returns:
+        bool: True si le stockage a été écrit
+    """
+    if not hasattr(scaler, "mean_") or not hasattr(scaler, "scale_"):
+        return False
+    try:
+        staging = tempfile.mkdtemp(prefix=".store_", dir=os.path.dirname(os.path.abspath(directory)))
+    except OSError:
+        return False
+    try:
+        forest.save(staging)
+        for name, values in [("scaler_mean", scaler.mean_), ("scaler_scale", scaler.scale_)]:
+            if values is not None:
+                np.save(os.path.join(staging, f"{name}.npy"), np.asarray(values, dtype=np.float64))
+        fitted_names = getattr(scaler, "feature_names_in_", None)
+        meta = {
+            "version": STORE_FORMAT_VERSION,
+            "sources": _source_fingerprint(sources),
+            "features": [str(name) for name in features],
+            "scaler": {
+                "with_mean": bool(getattr(scaler, "with_mean", True)),
+                "with_std": bool(getattr(scaler, "with_std", True)),
+                "feature_names": None if fitted_names is None else [str(name) for name in fitted_names],
+            },
+        }
+        with open(os.path.join(staging, STORE_META_FILE), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        if os.path.isdir(directory):
+            shutil.rmtree(directory, ignore_errors=True)  # Stockage périmé
+        os.rename(staging, directory)
+        return True
+    except (OSError, ValueError):
+        # Écriture impossible, ou stockage créé entre-temps par un autre processus
+        shutil.rmtree(staging, ignore_errors=True)
+        return False
+
+def load_model_store(directory: str, sources: List[str],
+                     sklearn_fallback: bool = False) -> Optional[Tuple]:
+    """
+    Relit un stockage enregistré par save_model_store, en projection mémoire
+
+    Args:
+        directory (str): Répertoire du stockage
+        sources (List[str]): Fichiers .pkl d'origine (modèle, scaler, features)
+        sklearn_fallback (bool): Modèle .pkl chargé pour les grands batchs (voir load_artifacts)
+
+    Returns:
+        tuple: (model, scaler, features), ou None si le stockage est absent,
+               illisible ou périmé (un fichier .pkl a changé)
+    """
+    try:
+        with open(os.path.join(directory, STORE_META_FILE), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != STORE_FORMAT_VERSION or meta["sources"] != _source_fingerprint(sources):
+            return None
+        # Modèle d'origine: chargé seulement pour le parcours compilé des grands batchs
+        model = FlatForest.load(directory, source_path=sources[0] if sklearn_fallback else None)
+        arrays = {}
+        for name in ["scaler_mean", "scaler_scale"]:
+            path = os.path.join(directory, f"{name}.npy")
+            arrays[name] = np.load(path, allow_pickle=False) if os.path.exists(path) else None
+    except (OSError, ValueError, KeyError):
+        return None
+    scaler = ScalerParams(arrays["scaler_mean"], arrays["scaler_scale"], **meta["scaler"])
+    return model, scaler, meta["features"]
+
+# ============================================================
+# PARAMÈTRES DE DÉCISION
+# ============================================================
+
+# Seuil de probabilité optimisé pour maximiser le recall
+THRESHOLD = 0.50
+
+# Bornes des niveaux de risque: [0, 0.4[ → Low, [0.4, 0.6[ → Medium, [0.6, 1] → High
+RISK_BINS = [0.4, 0.6]
+RISK_LEVELS = ["Low", "Medium", "High"]
+
+# Colonnes ajoutées par la prédiction
+RESULT_COLUMNS = ["churn_probability", "churn_prediction", "risk_level"]
+
+# Variables catégorielles encodées en one-hot lors de l'entraînement
+CATEGORICAL_COLUMNS = ["contract_type"]
+
+# Colonnes obligatoires des données clients (voir README)
+REQUIRED_COLUMNS = [
+    "age", "tenure_months", "monthly_charges", "data_usage_gb", "voice_minutes",
+    "support_calls", "network_quality", "payment_delay", "auto_payment", "contract_type",
+]
+
+# Client type (préchauffage du modèle, générateur de charge de l'API)
+SAMPLE_CLIENT = {
+    "age": 45, "tenure_months": 24, "monthly_charges": 75.5, "data_usage_gb": 15.2,
+    "voice_minutes": 350, "support_calls": 2, "network_quality": 4, "payment_delay": 5,
+    "auto_payment": 1, "contract_type": "Monthly",
+}
+
+# ============================================================
+# ENCODAGE DES FEATURES
+# ============================================================
+
+class FeatureEncoder:
+    """
+    Encodeur précompilé des données clients vers la matrice du modèle
+
+    Construit une seule fois à partir de features.pkl, il remplace
+    pd.get_dummies + reindex: les catégories connues de contract_type
+    et l'ordre des colonnes numériques sont figés à l'initialisation,
+    et chaque colonne est écrite directement dans une matrice
+    préallouée.
+
+    Avec un scaler (scaler.pkl), la standardisation est appliquée
+    colonne par colonne pendant l'encodage: chaque valeur est calculée
+    en float64 comme scaler.transform, puis stockée en float32 (le type
+    utilisé en interne par les arbres de scikit-learn). Aucune copie
+    float64 de la matrice complète n'est créée et les probabilités
+    restent identiques bit à bit.
+
+    Sans scaler, la matrice reste en float64 par défaut: arrondir en
+    float32 les valeurs brutes (ex: 75.35) avant la standardisation
+    ferait basculer certains seuils d'arbres.
+
+    Le résultat est identique à get_dummies + reindex(fill_value=0):
+    une colonne absente vaut 0 et une catégorie inconnue du modèle
+    (ex: "One year") n'active aucune colonne one-hot.
+    """
+
+    def __init__(self, features: List[str],
+                 scaler=None,
+                 categorical_columns: List[str] = CATEGORICAL_COLUMNS,
+                 dtype=None):
+        """
+        Args:
+            features (List[str]): Colonnes du modèle (features.pkl)
+            scaler: StandardScaler ajusté (scaler.pkl) fusionné à l'encodage (optionnel)
+            categorical_columns (List[str]): Variables encodées en one-hot
+            dtype: Type de la matrice produite (float32 avec scaler, float64 sinon)
+
+        Raises:
+            ValueError: Si le scaler n'a pas été ajusté sur les mêmes colonnes
+        """
+        self.features = list(features)
+        if dtype is None:
+            dtype = np.float64 if scaler is None else np.float32
+        self.dtype = np.dtype(dtype)
+
+        # Colonnes one-hot: {variable: [(position, catégorie), ...]}
+        self.dummy_columns: Dict[str, List[Tuple[int, str]]] = {}
+        dummy_positions = set()
+        for column in categorical_columns:
+            prefix = f"{column}_"
+            positions = [
+                (j, name[len(prefix):])
+                for j, name in enumerate(self.features)
+                if name.startswith(prefix)
+            ]
+            if positions:
+                self.dummy_columns[column] = positions
+                dummy_positions.update(j for j, _ in positions)
+
+        # Colonnes numériques: copiées telles quelles, dans l'ordre du modèle
+        self.numeric_columns: List[Tuple[int, str]] = [
+            (j, name) for j, name in enumerate(self.features)
+            if j not in dummy_positions
+        ]
+
+        # Standardisation fusionnée: x → (x - offset) / scale
+        # (offset = 0 et scale = 1 sans scaler, ce qui laisse x inchangé)
+        self.offset = np.zeros(self.n_features, dtype=np.float64)
+        self.scale = np.ones(self.n_features, dtype=np.float64)
+        if scaler is not None:
+            fitted_names = getattr(scaler, "feature_names_in_", None)
+            if fitted_names is not None and list(fitted_names) != self.features:
+                raise ValueError("Le scaler n'a pas été ajusté sur les colonnes de features.pkl")
+            if getattr(scaler, "with_mean", True) and scaler.mean_ is not None:
+                self.offset[:] = scaler.mean_
+            if getattr(scaler, "with_std", True) and scaler.scale_ is not None:
+                self.scale[:] = scaler.scale_
+
+    @property
+    def n_features(self) -> int:
+        """Nombre de colonnes en entrée du modèle"""
+        return len(self.features)
+
+    @property
+    def categories(self) -> Dict[str, List[str]]:
+        """Catégories connues du modèle pour chaque variable one-hot"""
+        return {
+            column: [category for _, category in positions]
+            for column, positions in self.dummy_columns.items()
+        }
+
+    def transform(self, df: pd.DataFrame, out: np.ndarray = None) -> np.ndarray:
+        """
+        Encode un DataFrame dans la matrice d'entrée du modèle
+
+        Args:
+            df (pd.DataFrame): Données clients (colonnes du schéma)
+            out (np.ndarray): Matrice préallouée (n_lignes, n_features) (optionnel)
+
+        Returns:
+            np.ndarray: Matrice encodée, colonnes dans l'ordre de features
+        """
+        n_rows = len(df)
+        if out is None:
+            out = np.empty((n_rows, self.n_features), dtype=self.dtype)
+
+        # Colonne temporaire float64 réutilisée pour la standardisation
+        buffer = np.empty(n_rows, dtype=np.float64)
+
+        # Colonnes numériques (absentes → 0, comme reindex)
+        for j, name in self.numeric_columns:
+            if name in df.columns:
+                np.subtract(_numeric_values(df[name]), self.offset[j], out=buffer)
+                np.divide(buffer, self.scale[j], out=out[:, j], casting="same_kind")
+            else:
+                out[:, j] = self._encode_value(j, 0.0)
+
+        # Colonnes one-hot: comparaison directe aux catégories connues
+        for column, positions in self.dummy_columns.items():
+            series = df[column] if column in df.columns else None
+            for j, category in positions:
+                out[:, j] = self._encode_value(j, 0.0)
+                if series is not None:
+                    out[_category_mask(series, category), j] = self._encode_value(j, 1.0)
+
+        return out
+
+    def transform_records(self, records: List[Dict]) -> np.ndarray:
+        """
+        Encode une liste de dictionnaires clients sans passer par pandas
+
+        Chemin rapide pour le formulaire individuel et les appels unitaires.
+
+        Args:
+            records (List[Dict]): Un dictionnaire par client
+
+        Returns:
+            np.ndarray: Matrice encodée (len(records), n_features)
+        """
+        out = np.empty((len(records), self.n_features), dtype=self.dtype)
+        for i, record in enumerate(records):
+            row = out[i]
+            for j, name in self.numeric_columns:
+                value = record.get(name)
+                row[j] = self._encode_value(j, 0.0 if value is None else float(value))
+            for column, positions in self.dummy_columns.items():
+                value = record.get(column)
+                for j, category in positions:
+                    row[j] = self._encode_value(j, 1.0 if value == category else 0.0)
+        return out
+
+    def _encode_value(self, j: int, value: float) -> float:
+        """Valeur standardisée (float64) d'une colonne du modèle"""
+        return (value - self.offset[j]) / self.scale[j]
+
+def _numeric_values(series: pd.Series) -> np.ndarray:
+    """
+    Valeurs numériques d'une colonne, sans copie pour les types NumPy
+
+    Args:
+        series (pd.Series): Colonne du DataFrame d'entrée
+
+    Returns:
+        np.ndarray: Valeurs (les valeurs manquantes deviennent NaN)
+    """
+    if isinstance(series.dtype, np.dtype) and series.dtype.kind in "biuf":
+        return series.to_numpy()
+    return series.to_numpy(dtype=np.float64, na_value=np.nan)
+
+def _category_mask(series: pd.Series, category) -> np.ndarray:
+    """
+    Lignes d'une colonne égales à une catégorie
+
+    Une colonne de type category (lecture CSV typée) est comparée sur
+    ses codes entiers, sans reconstruire le tableau des chaînes.
+
+    Args:
+        series (pd.Series): Colonne du DataFrame d'entrée
+        category: Catégorie recherchée
+
+    Returns:
+        np.ndarray: Masque booléen
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        categories = series.cat.categories
+        if category not in categories:
+            return np.zeros(len(series), dtype=bool)
+        return series.cat.codes.to_numpy() == categories.get_loc(category)
+    return series.to_numpy() == category
+
+# ============================================================
+# POST-TRAITEMENT DES PROBABILITÉS
+# ============================================================
+
+def round_probabilities(probabilities: np.ndarray, decimals: int = 3) -> np.ndarray:
+    """
+    Arrondit les probabilités exactement comme round(float(p), decimals)
+
+    np.round travaille sur p * 10**decimals, ce qui décale les cas
+    limites du type 0.9725 (fréquents avec une moyenne d'arbres). Ces
+    rares valeurs sont recalculées avec round() pour rester identiques
+    à l'ancien format de sortie.
+
+    Args:
+        probabilities (np.ndarray): Probabilités à arrondir
+        decimals (int): Nombre de décimales
+
+    Returns:
+        np.ndarray: Probabilités arrondies (float64)
+    """
+    proba = np.asarray(probabilities, dtype=np.float64)
+    factor = 10.0 ** decimals
+    scaled = proba * factor
+    rounded = np.rint(scaled) / factor
+
+    # Valeurs proches d'une demi-unité: arrondi décimal exact
+    ties = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if ties.any():
+        rounded[ties] = [round(float(p), decimals) for p in proba[ties]]
+    return rounded
+
+def build_results_frame(probabilities: np.ndarray,
+                        threshold: float = THRESHOLD,
+                        index: pd.Index = None,
+                        risk_bins: List[float] = RISK_BINS) -> pd.DataFrame:
+    """
+    Construit le DataFrame de résultats à partir des probabilités de churn
+
+    Le seuillage et le découpage en niveaux de risque sont faits en une
+    seule passe NumPy sur toute la colonne, sans boucle Python par ligne.
+
+    Args:
+        probabilities (np.ndarray): Probabilités de churn (classe 1)
+        threshold (float): Seuil de décision pour la prédiction binaire
+        index (pd.Index): Index à appliquer au résultat (optionnel)
+        risk_bins (List[float]): Bornes des niveaux Medium et High
+
+    Returns:
+        pd.DataFrame: Colonnes churn_probability, churn_prediction, risk_level
+    """
+    proba = np.asarray(probabilities, dtype=np.float64)
+
+    # Niveau de risque: 0 = Low, 1 = Medium, 2 = High
+    risk_codes = np.digitize(proba, risk_bins).astype(np.int8)
+
+    return pd.DataFrame(
+        {
+            "churn_probability": round_probabilities(proba),
+            "churn_prediction": (proba >= threshold).astype(np.int8),
+            "risk_level": pd.Categorical.from_codes(risk_codes, categories=RISK_LEVELS),
+        },
+        index=index,
+    )
+
+def results_to_records(results_df: pd.DataFrame) -> List[Dict]:
+    """
+    Convertit un DataFrame de résultats en liste de dictionnaires
+
+    Conserve l'ancien format de sortie de make_prediction pour le mode
+    individuel (un dict par client avec des types Python natifs).
+
+    Args:
+        results_df (pd.DataFrame): Résultats issus de build_results_frame
+
+    Returns:
+        List[Dict]: Liste de dictionnaires avec les prédictions
+    """
+    return results_df[RESULT_COLUMNS].to_dict(orient="records")
+
+# ============================================================
+# PRÉDICTION
+# ============================================================
+
+def predict_probabilities(df: pd.DataFrame, model, encoder: FeatureEncoder,
+                          metrics: Optional[MetricsRegistry] = None) -> np.ndarray:
+    """
+    Probabilités de churn brutes (non arrondies) d'un DataFrame client
+
+    Args:
+        df (pd.DataFrame): Données clients (colonnes du schéma)
+        model: Modèle entraîné exposant predict_proba
+        encoder (FeatureEncoder): Encodeur (avec scaler fusionné)
+        metrics (MetricsRegistry): Registre des temps par étape (METRICS par défaut)
+
+    Returns:
+        np.ndarray: Probabilité de churn (classe 1) de chaque ligne, en float64
+    """
+    metrics = METRICS if metrics is None else metrics
+    n_rows = len(df)
+
+    # Encodage + standardisation en une passe, dans une matrice float32
+    # (équivalent à get_dummies + reindex + scaler.transform)
+    with metrics.stage("encode", n_rows):
+        X_scaled = encoder.transform(df)
+
+    # Prédiction des probabilités (colonne 1 = probabilité de churn)
+    with metrics.stage("inference", n_rows):
+        return model.predict_proba(X_scaled)[:, 1]
+
+def predict_dataframe(df: pd.DataFrame, model, encoder: FeatureEncoder,
+                      threshold: float = THRESHOLD,
+                      metrics: Optional[MetricsRegistry] = None) -> pd.DataFrame:
+    """
+    Prédit le churn pour un DataFrame client (format colonnes)
+
+    Args:
+        df (pd.DataFrame): Données clients (colonnes du schéma)
+        model: Modèle entraîné exposant predict_proba
+        encoder (FeatureEncoder): Encodeur (avec scaler fusionné)
+        threshold (float): Seuil de décision
+        metrics (MetricsRegistry): Registre des temps par étape (METRICS par défaut)
+
+    Returns:
+        pd.DataFrame: Résultats alignés sur l'index de df
+                      Colonnes: churn_probability, churn_prediction, risk_level
+    """
+    metrics = METRICS if metrics is None else metrics
+    probabilities = predict_probabilities(df, model, encoder, metrics)
+
+    # Seuil et niveaux de risque calculés en une passe vectorisée
+    with metrics.stage("postprocess", len(df)):
+        return build_results_frame(probabilities, threshold, index=df.index)
+
+def predict_records(records: List[Dict], model, encoder: FeatureEncoder,
+                    threshold: float = THRESHOLD,
+                    metrics: Optional[MetricsRegistry] = None) -> List[Dict]:
+    """
+    Prédit le churn pour une liste de dictionnaires clients, sans pandas
+
+    Chemin à faible latence pour les appels unitaires (formulaire, API):
+    encodage direct des dictionnaires et résultats en types Python natifs.
+
+    Args:
+        records (List[Dict]): Un dictionnaire par client
+        model: Modèle entraîné exposant predict_proba
+        encoder (FeatureEncoder): Encodeur (avec scaler fusionné)
+        threshold (float): Seuil de décision
+        metrics (MetricsRegistry): Registre des temps par étape (METRICS par défaut)
+
+    Returns:
+        List[Dict]: Un dict par client (churn_probability, churn_prediction, risk_level)
+    """
+    if not records:
+        return []
+    metrics = METRICS if metrics is None else metrics
+    n_rows = len(records)
+    with metrics.stage("encode", n_rows):
+        X = encoder.transform_records(records)
+    with metrics.stage("inference", n_rows):
+        probabilities = model.predict_proba(X)[:, 1]
+    with metrics.stage("postprocess", n_rows):
+        rounded = round_probabilities(probabilities)
+        risk_codes = np.digitize(probabilities, RISK_BINS)
+        return [
+            {
+                "churn_probability": float(p_rounded),
+                "churn_prediction": int(p >= threshold),
+                "risk_level": RISK_LEVELS[code],
+            }
+            for p, p_rounded, code in zip(probabilities, rounded, risk_codes)
+        ]
+
+def warm_up(model, encoder: FeatureEncoder, threshold: float = THRESHOLD) -> float:
+    """
+    Prédictions à vide au démarrage (client type, par dictionnaire et par DataFrame)
+
+    La première prédiction d'un processus paie des initialisations
+    (imports paresseux, premiers appels pandas et NumPy): elles ont
+    lieu ici, avant le premier vrai client. Les mesures vont dans un
+    registre jetable et ne faussent pas les métriques exportées.
+
+    Args:
+        model: Modèle entraîné exposant predict_proba
+        encoder (FeatureEncoder): Encodeur (avec scaler fusionné)
+        threshold (float): Seuil de décision
+
+    Returns:
+        float: Durée du préchauffage (s)
+    """
+    start = time.perf_counter()
+    metrics = MetricsRegistry()
+    predict_records([SAMPLE_CLIENT], model, encoder, threshold, metrics=metrics)
+    predict_dataframe(pd.DataFrame([SAMPLE_CLIENT]), model, encoder, threshold, metrics=metrics)
+    return time.perf_counter() - start
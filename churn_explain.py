@@ -0,0 +1,285 @@
+# ============================================================
+# EXPLICATION DES PRÉDICTIONS
+# ============================================================
+# Contribution de chaque caractéristique client à la probabilité
+# de churn (attribution par chemin de Saabas sur la forêt aplatie)
+# Description: Les contributions se calculent pour tout un bloc
+#              en un parcours vectorisé des arbres; les colonnes
+#              one-hot sont regroupées par colonne d'origine. Un
+#              batch s'explique en entier ou seulement pour ses
+#              clients les plus à risque
+# ============================================================
+
+# ============================================================
+# IMPORTATION DES BIBLIOTHÈQUES
+# ============================================================
+
+import numpy as np                        # Contributions et classements
+import pandas as pd                       # Contributions par client
+from typing import Dict, List, Optional, Tuple
+
+from churn_core import FeatureEncoder
+from churn_forest import FlatForest, compile_forest
+from churn_metrics import METRICS, MetricsRegistry
+
+# ============================================================
+# PARAMÈTRES
+# ============================================================
+
+# Caractéristiques gardées par client (colonnes top1_feature, top1_contribution...)
+DEFAULT_TOP_K = 3
+
+# Clients les plus à risque expliqués par défaut dans le dashboard
+DEFAULT_EXPLAIN_ROWS = 100
+
+# Lignes relues et expliquées à la fois
+EXPLAIN_CHUNKSIZE = 50_000
+
+# Libellés des colonnes d'origine (graphiques du dashboard)
+FEATURE_LABELS = {
+    "age": "Âge",
+    "tenure_months": "Ancienneté (mois)",
+    "monthly_charges": "Facture Mensuelle",
+    "data_usage_gb": "Data Usage (GB)",
+    "voice_minutes": "Minutes Voix",
+    "support_calls": "Appels Support",
+    "network_quality": "Qualité Réseau",
+    "payment_delay": "Retard Paiement",
+    "auto_payment": "Paiement Auto",
+    "contract_type": "Type de Contrat",
+}
+
+# ============================================================
+# EXPLICATEUR
+# ============================================================
+
+def forest_of(model) -> FlatForest:
+    """
+    Forêt aplatie d'un modèle chargé (éventuellement mémoïsé)
+
+    Args:
+        model: FlatForest, forêt scikit-learn, ou enveloppe exposant .model (MemoizedModel)
+
+    Returns:
+        FlatForest: Forêt à parcourir
+
+    Raises:
+        ValueError: Si le modèle n'est pas une forêt de décision
+    """
+    while not isinstance(model, FlatForest) and hasattr(model, "model"):
+        model = model.model
+    if not isinstance(model, FlatForest):
+        model = compile_forest(model)
+    if not isinstance(model, FlatForest):
+        raise ValueError("Les explications nécessitent une forêt de décision (RandomForest, ExtraTrees)")
+    return model
+
+class ForestExplainer:
+    """
+    Contributions des colonnes clients à la probabilité de churn
+
+    Pour chaque client, probabilité = biais + somme des contributions:
+    une contribution positive pousse vers le churn, une négative vers
+    la fidélité. Les colonnes one-hot du modèle (contract_type_*) sont
+    regroupées en leur colonne d'origine.
+
+    Exemple:
+        explainer = ForestExplainer(model, encoder)
+        bias, contributions = explainer.explain(df)
+        top_contributions(contributions, k=3)
+    """
+
+    def __init__(self, model, encoder: FeatureEncoder):
+        """
+        Args:
+            model: Forêt chargée (voir forest_of)
+            encoder (FeatureEncoder): Encodeur des données clients
+        """
+        self.forest = forest_of(model)
+        self.encoder = encoder
+
+        # Colonne d'origine de chaque feature encodée (ordre d'apparition)
+        origin = list(encoder.features)
+        for column, positions in encoder.dummy_columns.items():
+            for j, _ in positions:
+                origin[j] = column
+        self.columns: List[str] = list(dict.fromkeys(origin))
+        # Matrice de regroupement (n_features, n_colonnes): un seul produit par bloc
+        self._grouping = np.zeros((len(origin), len(self.columns)))
+        self._grouping[np.arange(len(origin)), [self.columns.index(column) for column in origin]] = 1.0
+
+    def explain(self, df: pd.DataFrame, metrics: Optional[MetricsRegistry] = None) -> Tuple[float, pd.DataFrame]:
+        """
+        Contributions de chaque colonne pour chaque client
+
+        Args:
+            df (pd.DataFrame): Données clients (colonnes du schéma)
+            metrics (MetricsRegistry): Registre des temps par étape (METRICS par défaut)
+
+        Returns:
+            Tuple[float, pd.DataFrame]: Biais (probabilité moyenne des racines) et
+                                        contributions (une colonne par colonne
+                                        d'origine), alignées sur l'index de df
+        """
+        metrics = METRICS if metrics is None else metrics
+        n_rows = len(df)
+        with metrics.stage("encode", n_rows):
+            X = self.encoder.transform(df)
+        with metrics.stage("explain", n_rows):
+            bias, contributions = self.forest.contributions(X)
+            return bias, pd.DataFrame(contributions @ self._grouping, index=df.index, columns=self.columns)
+
+# ============================================================
+# CLASSEMENTS ET AGRÉGATS
+# ============================================================
+
+def top_contributions(contributions: pd.DataFrame, k: int = DEFAULT_TOP_K) -> pd.DataFrame:
+    """
+    Caractéristiques les plus influentes de chaque client (en valeur absolue)
+
+    Args:
+        contributions (pd.DataFrame): Contributions (ForestExplainer.explain)
+        k (int): Nombre de caractéristiques gardées par client
+
+    Returns:
+        pd.DataFrame: Colonnes top1_feature, top1_contribution, ..., topk_contribution,
+                      alignées sur l'index de contributions
+    """
+    values = contributions.to_numpy()
+    k = min(k, values.shape[1])
+    # Tri stable: à égalité, ordre des colonnes
+    order = np.argsort(-np.abs(values), axis=1, kind="stable")[:, :k]
+    names = np.asarray(contributions.columns, dtype=object)
+    top = {}
+    for i in range(k):
+        top[f"top{i + 1}_feature"] = names[order[:, i]]
+        top[f"top{i + 1}_contribution"] = np.round(np.take_along_axis(values, order[:, i:i + 1], axis=1)[:, 0], 4)
+    return pd.DataFrame(top, index=contributions.index)
+
+class ContributionTotals:
+    """
+    Importance globale des colonnes, cumulée bloc par bloc
+
+    Exemple:
+        totals = ContributionTotals()
+        for chunk in chunks:
+            totals.update(explainer.explain(chunk)[1])
+        totals.to_frame()
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.abs_sum: Optional[pd.Series] = None
+        self.sum: Optional[pd.Series] = None
+
+    def update(self, contributions: pd.DataFrame) -> "ContributionTotals":
+        """Ajoute les contributions d'un bloc"""
+        abs_sum = contributions.abs().sum()
+        total = contributions.sum()
+        self.abs_sum = abs_sum if self.abs_sum is None else self.abs_sum + abs_sum
+        self.sum = total if self.sum is None else self.sum + total
+        self.rows += len(contributions)
+        return self
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Importance moyenne de chaque colonne
+
+        Returns:
+            pd.DataFrame: mean_abs_contribution (importance) et mean_contribution
+                          (sens moyen), indexés par colonne, par importance décroissante
+        """
+        if self.rows == 0:
+            return pd.DataFrame(columns=["mean_abs_contribution", "mean_contribution"])
+        frame = pd.DataFrame({
+            "mean_abs_contribution": self.abs_sum / self.rows,
+            "mean_contribution": self.sum / self.rows,
+        })
+        return frame.sort_values("mean_abs_contribution", ascending=False)
+
+def global_importance(contributions: pd.DataFrame) -> pd.DataFrame:
+    """Importance moyenne des colonnes d'un ensemble de clients (voir ContributionTotals)"""
+    return ContributionTotals().update(contributions).to_frame()
+
+# ============================================================
+# FICHIERS DE RÉSULTATS
+# ============================================================
+
+def _read_spooled(path: str, chunksize: int):
+    # round_trip: les montants relus sont exactement ceux qui ont été prédits
+    return pd.read_csv(path, chunksize=chunksize, float_precision="round_trip")
+
+def read_top_risk(path: str, n: int, chunksize: int = EXPLAIN_CHUNKSIZE) -> pd.DataFrame:
+    """
+    Clients les plus à risque d'un fichier de résultats (lecture par blocs)
+
+    Args:
+        path (str): Fichier CSV de résultats (churn_probability)
+        n (int): Nombre de clients gardés
+        chunksize (int): Lignes lues à la fois
+
+    Returns:
+        pd.DataFrame: n lignes par probabilité décroissante (à égalité, ordre du
+                      fichier), indexées par leur numéro de ligne dans le fichier
+    """
+    top = None
+    first_row = 0
+    for chunk in _read_spooled(path, chunksize):
+        chunk.index = pd.RangeIndex(first_row, first_row + len(chunk))
+        first_row += len(chunk)
+        candidates = chunk.nlargest(n, "churn_probability")
+        top = candidates if top is None else pd.concat([top, candidates]).nlargest(n, "churn_probability")
+    return top if top is not None else pd.DataFrame()
+
+def explain_results_file(path: str, explainer: ForestExplainer, top_n: Optional[int] = None,
+                         k: int = DEFAULT_TOP_K, chunksize: int = EXPLAIN_CHUNKSIZE,
+                         metrics: Optional[MetricsRegistry] = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Explique un batch déjà prédit: ses top_n clients les plus à risque, ou tous
+
+    Args:
+        path (str): Fichier CSV de résultats du batch
+        explainer (ForestExplainer): Explicateur du modèle
+        top_n (int): Nombre de clients les plus à risque expliqués (None: tout le fichier)
+        k (int): Caractéristiques gardées par client
+        chunksize (int): Lignes relues et expliquées à la fois
+        metrics (MetricsRegistry): Registre des temps par étape (METRICS par défaut)
+
+    Returns:
+        Tuple[pd.DataFrame, pd.DataFrame]: Caractéristiques principales des clients
+                                           expliqués (top_n seulement, vide pour tout
+                                           le fichier) et importance globale
+    """
+    totals = ContributionTotals()
+    if top_n is None:
+        for chunk in _read_spooled(path, chunksize):
+            totals.update(explainer.explain(chunk, metrics)[1])
+        return pd.DataFrame(), totals.to_frame()
+
+    top = read_top_risk(path, top_n, chunksize)
+    if top.empty:
+        return top, totals.to_frame()
+    contributions = explainer.explain(top, metrics)[1]
+    totals.update(contributions)
+    return pd.concat([top, top_contributions(contributions, k)], axis=1), totals.to_frame()
+
+def feature_label(column: str) -> str:
+    """Libellé affiché d'une colonne d'origine"""
+    return FEATURE_LABELS.get(column, column)
+
+def contribution_records(bias: float, contributions: pd.Series) -> List[Dict]:
+    """
+    Contributions d'un client, par importance décroissante (formulaire, API)
+
+    Args:
+        bias (float): Biais de l'explication
+        contributions (pd.Series): Contributions du client (une ligne de explain)
+
+    Returns:
+        List[Dict]: {feature, label, contribution}, le biais en dernier
+    """
+    order = contributions.abs().sort_values(ascending=False).index
+    records = [{"feature": column, "label": feature_label(column), "contribution": float(contributions[column])}
+               for column in order]
+    records.append({"feature": "bias", "label": "Moyenne du modèle", "contribution": bias})
+    return records
@@ -0,0 +1,471 @@
+# ============================================================
+# MOTEUR D'INFÉRENCE DE LA FORÊT ALÉATOIRE
+# ============================================================
+# Conversion du Random Forest scikit-learn en tableaux NumPy
+# contigus (feature, threshold, left, right, value) parcourus
+# en une seule passe vectorisée pour tous les arbres
+# Description: Les probabilités sont identiques bit à bit à
+#              model.predict_proba, sans la validation d'entrée,
+#              la répartition joblib ni les allocations par arbre
+#              de scikit-learn. Les tableaux s'enregistrent en
+#              fichiers .npy relus par projection mémoire (mmap):
+#              les processus d'un même serveur partagent une seule
+#              copie en cache disque
+# ============================================================
+
+# ============================================================
+# IMPORTATION DES BIBLIOTHÈQUES
+# ============================================================
+
+import json                               # Description de la forêt enregistrée
+import os                                 # Fichiers des tableaux
+import threading                          # Chargement unique des arbres scikit-learn
+import numpy as np                        # Tableaux des nœuds et parcours vectorisé
+from typing import List, Optional, Tuple
+
+# ============================================================
+# PARAMÈTRES
+# ============================================================
+
+# Au-delà de ce nombre de lignes, le parcours compilé de scikit-learn
+# (arbre par arbre, sans surcoût de validation ni de joblib) est plus
+# rapide que le parcours NumPy de tous les arbres à la fois
+VECTOR_MAX_ROWS = 128
+
+# Lignes parcourues ensemble par le moteur vectorisé (mémoire bornée
+# à n_arbres x BLOCK_ROWS indices de nœuds)
+BLOCK_ROWS = 1024
+
+# Forêt relue depuis ses tableaux: les arbres scikit-learn du parcours
+# compilé ne sont chargés (import de scikit-learn, dépicklage) qu'à
+# partir d'un batch de cette taille, où le gain amortit le chargement
+LAZY_COMPILED_MIN_ROWS = 10_000
+
+# Tableaux enregistrés (un fichier .npy chacun) et description de la forêt
+ARRAY_NAMES = ["feature", "threshold", "left", "right", "value", "roots", "classes",
+               "threshold_rank", "split_values", "split_offsets", "node_index"]
+FOREST_META_FILE = "forest.json"
+
+# Chargement des arbres scikit-learn partagé par les threads (API, sessions Streamlit)
+_estimators_lock = threading.Lock()
+
+# ============================================================
+# FORÊT APLATIE
+# ============================================================
+
+class FlatForest:
+    """
+    Forêt de décision aplatie en tableaux contigus
+
+    Tous les nœuds de tous les arbres sont rangés dans les mêmes
+    tableaux, les deux enfants d'un nœud étant adjacents:
+    right[i] == left[i] + 1. Une feuille pointe sur elle-même, si
+    bien qu'un pas de parcours s'écrit sans branchement pour toutes
+    les paires (ligne, arbre) à la fois:
+
+        idx = left[idx] + (x[feature[idx]] > threshold[idx])
+
+    Les seuils sont comparés sur des rangs entiers: chaque valeur
+    d'entrée est remplacée une fois par le nombre de seuils distincts
+    de sa colonne qui lui sont strictement inférieurs. Le test
+    « x > seuil » de scikit-learn (float32 promu en float64) devient
+    « rang(x) > rang(seuil) », avec exactement le même résultat.
+
+    Les probabilités par feuille sont normalisées comme dans
+    DecisionTreeClassifier.predict_proba, puis sommées arbre par
+    arbre dans l'ordre et divisées par le nombre d'arbres, comme dans
+    RandomForestClassifier.predict_proba: le résultat est identique.
+
+    Enregistrée avec save(), la forêt est relue par load() en
+    projection mémoire, sans scikit-learn: quelques millisecondes au
+    démarrage, et des pages partagées par tous les processus qui
+    lisent les mêmes fichiers. Avec source_path, les grands batchs
+    chargent les arbres scikit-learn au premier besoin (copie privée du
+    modèle dans chaque processus); sans, tous les batchs sont parcourus
+    depuis les tableaux, par blocs de BLOCK_ROWS lignes.
+
+    Exemple:
+        forest = FlatForest.from_model(model)
+        probabilities = forest.predict_proba(X)[:, 1]
+        forest.save("rf_churn_model.flat")
+        forest = FlatForest.load("rf_churn_model.flat", source_path="rf_churn_model.pkl")
+    """
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray,
+                 left: np.ndarray, right: np.ndarray, value: np.ndarray,
+                 roots: np.ndarray, classes: np.ndarray, n_features_in: int,
+                 estimators: Optional[list] = None):
+        """
+        Args:
+            feature (np.ndarray): Colonne testée par nœud (0 pour une feuille)
+            threshold (np.ndarray): Seuil par nœud (+inf pour une feuille)
+            left (np.ndarray): Enfant gauche par nœud (lui-même pour une feuille)
+            right (np.ndarray): Enfant droit par nœud (left + 1, lui-même pour une feuille)
+            value (np.ndarray): Probabilités normalisées par nœud (n_nodes, n_classes)
+            roots (np.ndarray): Racine de chaque arbre
+            classes (np.ndarray): Classes du modèle (classes_)
+            n_features_in (int): Nombre de colonnes attendues
+            estimators (list): Arbres scikit-learn d'origine (parcours compilé
+                               des grands batchs, optionnel)
+        """
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.classes_ = classes
+        self.n_features_in_ = n_features_in
+        self.estimators = estimators
+        self.source_path: Optional[str] = None
+
+        is_leaf = left == np.arange(len(left))
+        self.max_depth = _max_depth(left, roots, is_leaf)
+
+        # Seuils distincts par colonne et rang de chaque seuil de nœud
+        self.split_values: List[np.ndarray] = []
+        self.threshold_rank = np.full(len(feature), np.iinfo(np.intp).max, dtype=np.intp)
+        for j in range(n_features_in):
+            nodes = np.flatnonzero((feature == j) & ~is_leaf)
+            values = np.unique(threshold[nodes])
+            self.split_values.append(values)
+            self.threshold_rank[nodes] = np.searchsorted(values, threshold[nodes])
+
+        # Correspondance nœud scikit-learn (décalé de la racine de son arbre) -> nœud aplati
+        self._node_index: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_model(cls, model) -> "FlatForest":
+        """
+        Aplatit un RandomForestClassifier / ExtraTreesClassifier entraîné
+
+        Args:
+            model: Forêt scikit-learn entraînée (une seule sortie)
+
+        Returns:
+            FlatForest: Forêt aplatie
+
+        Raises:
+            ValueError: Si le modèle n'est pas une forêt de classification à une sortie
+        """
+        if getattr(model, "n_outputs_", None) != 1 or not hasattr(model, "estimators_"):
+            raise ValueError("Seules les forêts de classification à une sortie sont prises en charge")
+        n_classes = len(model.classes_)
+
+        features, thresholds, lefts, values = [], [], [], []
+        roots, node_index = [], []
+        position = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            children_left = tree.children_left
+            children_right = tree.children_right
+
+            # Renumérotation en largeur: enfants adjacents, racine en tête
+            order = [0]
+            new_id = np.empty(tree.node_count, dtype=np.intp)
+            new_id[0] = 0
+            left = np.arange(tree.node_count, dtype=np.intp)
+            for node in order:
+                if children_left[node] != -1:
+                    new_id[children_left[node]] = len(order)
+                    new_id[children_right[node]] = len(order) + 1
+                    left[new_id[node]] = len(order)
+                    order.append(children_left[node])
+                    order.append(children_right[node])
+            order = np.asarray(order, dtype=np.intp)
+            is_leaf = children_left[order] == -1
+
+            features.append(np.where(is_leaf, 0, tree.feature[order]))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold[order]))
+            lefts.append(left + position)
+
+            # Normalisation identique à DecisionTreeClassifier.predict_proba
+            proba = tree.value[order, 0, :n_classes]
+            normalizer = proba.sum(axis=1)[:, np.newaxis]
+            normalizer[normalizer == 0.0] = 1.0
+            values.append(proba / normalizer)
+
+            roots.append(position)
+            node_index.append(new_id + position)
+            position += tree.node_count
+
+        left = np.concatenate(lefts)
+        is_leaf = left == np.arange(len(left))
+        forest = cls(
+            feature=np.concatenate(features).astype(np.intp),
+            threshold=np.concatenate(thresholds),
+            left=left,
+            right=np.where(is_leaf, left, left + 1),
+            value=np.ascontiguousarray(np.concatenate(values)),
+            roots=np.asarray(roots, dtype=np.intp),
+            classes=model.classes_,
+            n_features_in=model.n_features_in_,
+            estimators=list(model.estimators_),
+        )
+        forest._node_index = np.concatenate(node_index)
+        return forest
+
+    @property
+    def n_trees(self) -> int:
+        """Nombre d'arbres"""
+        return len(self.roots)
+
+    @property
+    def n_nodes(self) -> int:
+        """Nombre total de nœuds"""
+        return len(self.left)
+
+    def save(self, directory: str) -> None:
+        """
+        Enregistre les tableaux de la forêt (un fichier .npy chacun)
+
+        Args:
+            directory (str): Répertoire de destination (créé si besoin)
+
+        Raises:
+            ValueError: Si la forêt ne vient pas de from_model (correspondance
+                        des nœuds scikit-learn absente) ou si ses classes ne
+                        sont pas un tableau NumPy simple
+        """
+        if self._node_index is None:
+            raise ValueError("Seule une forêt construite par from_model peut être enregistrée")
+        os.makedirs(directory, exist_ok=True)
+        arrays = {
+            "feature": self.feature, "threshold": self.threshold, "left": self.left,
+            "right": self.right, "value": self.value, "roots": self.roots,
+            "classes": np.asarray(self.classes_), "threshold_rank": self.threshold_rank,
+            "split_values": np.concatenate(self.split_values),
+            "split_offsets": np.cumsum([0] + [len(values) for values in self.split_values]),
+            "node_index": self._node_index,
+        }
+        for name in ARRAY_NAMES:
+            np.save(os.path.join(directory, f"{name}.npy"), np.ascontiguousarray(arrays[name]),
+                    allow_pickle=False)
+        meta = {"n_features_in": int(self.n_features_in_), "max_depth": int(self.max_depth)}
+        with open(os.path.join(directory, FOREST_META_FILE), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+    @classmethod
+    def load(cls, directory: str, mmap_mode: Optional[str] = "r",
+             source_path: Optional[str] = None) -> "FlatForest":
+        """
+        Relit une forêt enregistrée par save(), sans scikit-learn
+
+        Args:
+            directory (str): Répertoire des tableaux
+            mmap_mode (str): Mode de projection mémoire de np.load ("r" par
+                             défaut: lecture seule, pages partagées; None: copie)
+            source_path (str): Modèle scikit-learn d'origine, chargé au premier
+                               grand batch pour le parcours compilé (optionnel)
+
+        Returns:
+            FlatForest: Forêt prête à prédire
+        """
+        # np.asarray garde la projection mais évite la sous-classe np.memmap à chaque opération
+        arrays = {
+            name: np.asarray(np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode,
+                                     allow_pickle=False))
+            for name in ARRAY_NAMES
+        }
+        with open(os.path.join(directory, FOREST_META_FILE), encoding="utf-8") as f:
+            meta = json.load(f)
+
+        # Les index et rangs sont relus tels quels: rien n'est recalculé ni copié
+        forest = cls.__new__(cls)
+        for name in ["feature", "threshold", "left", "right", "value", "roots", "threshold_rank"]:
+            setattr(forest, name, arrays[name])
+        forest.classes_ = arrays["classes"]
+        forest.n_features_in_ = meta["n_features_in"]
+        forest.max_depth = meta["max_depth"]
+        offsets = arrays["split_offsets"]
+        forest.split_values = [arrays["split_values"][offsets[j]:offsets[j + 1]]
+                               for j in range(len(offsets) - 1)]
+        forest._node_index = arrays["node_index"]
+        forest.estimators = None
+        forest.source_path = source_path
+        return forest
+
+    def _compiled_estimators(self, n_rows: int) -> Optional[list]:
+        """
+        Arbres scikit-learn du parcours compilé, chargés au besoin
+
+        Pour une forêt relue par load(), le modèle d'origine n'est
+        dépicklé qu'au premier batch d'au moins LAZY_COMPILED_MIN_ROWS
+        lignes. S'il ne correspond plus aux tableaux (nombre de nœuds
+        différent), le parcours vectorisé reste utilisé.
+        """
+        if self.estimators is None and self.source_path is not None and n_rows >= LAZY_COMPILED_MIN_ROWS:
+            with _estimators_lock:
+                if self.estimators is None and self.source_path is not None:
+                    import joblib                 # Import local: inutile sans grand batch
+
+                    estimators = list(getattr(joblib.load(self.source_path), "estimators_", []))
+                    if sum(estimator.tree_.node_count for estimator in estimators) == self.n_nodes:
+                        self.estimators = estimators
+                    else:
+                        self.source_path = None
+        return self.estimators
+
+    def _check_input(self, X) -> np.ndarray:
+        """Matrice float32 contiguë, comme l'entrée des arbres scikit-learn"""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(
+                f"X doit avoir {self.n_features_in_} colonnes (reçu: {X.shape})"
+            )
+        if not np.isfinite(X).all():
+            # Refusé aussi par scikit-learn pour une forêt entraînée sans valeurs manquantes
+            raise ValueError("Input X contains NaN or infinity.")
+        return X
+
+    def apply(self, X) -> np.ndarray:
+        """
+        Feuille atteinte dans chaque arbre (parcours vectorisé)
+
+        Args:
+            X (np.ndarray): Matrice encodée (n, n_features)
+
+        Returns:
+            np.ndarray: Indices de feuilles aplatis (n_arbres, n)
+        """
+        X = self._check_input(X)
+        return np.concatenate(
+            [self._apply_block(X[start:start + BLOCK_ROWS]) for start in range(0, len(X), BLOCK_ROWS)]
+            or [np.empty((self.n_trees, 0), dtype=np.intp)],
+            axis=1,
+        )
+
+    def _ranks(self, X: np.ndarray) -> np.ndarray:
+        """Rang de chaque valeur parmi les seuils distincts de sa colonne (aplati ligne par ligne)"""
+        X64 = X.astype(np.float64)
+        ranks = np.empty(X.shape, dtype=np.intp)
+        for j, values in enumerate(self.split_values):
+            ranks[:, j] = np.searchsorted(values, X64[:, j], side="left")
+        return ranks.ravel()
+
+    def _apply_block(self, X: np.ndarray) -> np.ndarray:
+        """Parcours vectorisé d'un bloc de lignes dans tous les arbres"""
+        n, n_features = X.shape
+        ranks = self._ranks(X)
+
+        # Une paire (arbre, ligne) par élément, toutes les paires avancent ensemble
+        row_offset = np.tile(np.arange(0, n * n_features, n_features, dtype=np.intp), self.n_trees)
+        idx = np.repeat(self.roots, n)
+        for _ in range(self.max_depth):
+            position = self.feature.take(idx)
+            position += row_offset
+            go_right = ranks.take(position) > self.threshold_rank.take(idx)
+            idx = self.left.take(idx)
+            idx += go_right
+        return idx.reshape(self.n_trees, n)
+
+    def _apply_compiled(self, X: np.ndarray) -> List[np.ndarray]:
+        """Feuilles aplaties via le parcours compilé des arbres scikit-learn"""
+        return [
+            self._node_index.take(estimator.apply(X, check_input=False) + offset)
+            for estimator, offset in zip(self.estimators, self.roots)
+        ]
+
+    def predict_proba(self, X) -> np.ndarray:
+        """
+        Probabilités par classe, identiques à model.predict_proba
+
+        Args:
+            X (np.ndarray): Matrice encodée (n, n_features)
+
+        Returns:
+            np.ndarray: Probabilités (n, n_classes)
+        """
+        X = self._check_input(X)
+        if (len(X) > VECTOR_MAX_ROWS and self._node_index is not None
+                and self._compiled_estimators(len(X)) is not None):
+            leaves = self._apply_compiled(X)
+        else:
+            leaves = self.apply(X)
+
+        # Somme arbre par arbre dans l'ordre, comme scikit-learn
+        proba = np.zeros((len(X), len(self.classes_)))
+        for tree_leaves in leaves:
+            proba += self.value.take(tree_leaves, axis=0)
+        proba /= self.n_trees
+        return proba
+
+    def contributions(self, X, class_index: int = 1) -> Tuple[float, np.ndarray]:
+        """
+        Contribution de chaque colonne à la probabilité de chaque ligne (Saabas)
+
+        À chaque nœud traversé, l'écart entre la probabilité de l'enfant
+        suivi et celle du nœud est attribué à la colonne testée. Sur la
+        forêt, la probabilité d'une ligne vaut la moyenne des racines
+        (biais) plus la somme de ses contributions. Le parcours est
+        celui de apply: toutes les paires (arbre, ligne) avancent
+        ensemble, une feuille (qui pointe sur elle-même) n'ajoute rien.
+
+        Args:
+            X (np.ndarray): Matrice encodée (n, n_features)
+            class_index (int): Colonne de classe expliquée (1 = churn)
+
+        Returns:
+            Tuple[float, np.ndarray]: Biais et contributions (n, n_features)
+        """
+        X = self._check_input(X)
+        value = np.ascontiguousarray(self.value[:, class_index])
+        bias = float(value.take(self.roots).mean())
+        contributions = np.empty(X.shape, dtype=np.float64)
+        for start in range(0, len(X), BLOCK_ROWS):
+            block = X[start:start + BLOCK_ROWS]
+            contributions[start:start + len(block)] = self._contributions_block(block, value)
+        return bias, contributions
+
+    def _contributions_block(self, X: np.ndarray, value: np.ndarray) -> np.ndarray:
+        """Contributions d'un bloc de lignes, cumulées sur tous les arbres"""
+        n, n_features = X.shape
+        ranks = self._ranks(X)
+
+        # Indice aplati (ligne, colonne testée): les écarts s'y cumulent par bincount
+        row_offset = np.tile(np.arange(0, n * n_features, n_features, dtype=np.intp), self.n_trees)
+        idx = np.repeat(self.roots, n)
+        totals = np.zeros(n * n_features)
+        for _ in range(self.max_depth):
+            position = self.feature.take(idx)
+            position += row_offset
+            go_right = ranks.take(position) > self.threshold_rank.take(idx)
+            child = self.left.take(idx)
+            child += go_right
+            totals += np.bincount(position, weights=value.take(child) - value.take(idx),
+                                  minlength=n * n_features)
+            idx = child
+        return totals.reshape(n, n_features) / self.n_trees
+
+    def predict(self, X) -> np.ndarray:
+        """Classe la plus probable, comme model.predict"""
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
+
+def _max_depth(left: np.ndarray, roots: np.ndarray, is_leaf: np.ndarray) -> int:
+    """Profondeur maximale de la forêt (nombre de pas de parcours)"""
+    depth = 0
+    frontier = roots[~is_leaf[roots]]
+    while len(frontier):
+        depth += 1
+        children = np.concatenate([left[frontier], left[frontier] + 1])
+        frontier = children[~is_leaf[children]]
+    return depth
+
+def compile_forest(model):
+    """
+    Remplace une forêt scikit-learn par sa version aplatie
+
+    Les autres modèles sont renvoyés tels quels: l'appelant peut
+    toujours utiliser le résultat via predict_proba.
+
+    Args:
+        model: Modèle entraîné
+
+    Returns:
+        FlatForest ou le modèle d'origine
+    """
+    from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+
+    if isinstance(model, (RandomForestClassifier, ExtraTreesClassifier)) and model.n_outputs_ == 1:
+        return FlatForest.from_model(model)
+    return model
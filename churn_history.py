@@ -0,0 +1,556 @@
+# ============================================================
+# HISTORIQUE DES PRÉDICTIONS
+# ============================================================
+# Base SQLite locale des prédictions: chaque batch y est ajouté
+# bloc par bloc (insertions groupées), indexé par client et date
+# Description: L'historique d'un client (évolution de sa
+#              probabilité de churn) ou un batch passé complet se
+#              relisent en quelques millisecondes, sans relancer
+#              le modèle. Le rescoring incrémental ne reprédit que
+#              les clients nouveaux ou modifiés depuis un batch passé
+# ============================================================
+
+# ============================================================
+# IMPORTATION DES BIBLIOTHÈQUES
+# ============================================================
+
+import numpy as np                        # Conversion des colonnes en valeurs SQLite
+import pandas as pd                       # Blocs de résultats et relectures
+import sqlite3                            # Base embarquée (bibliothèque standard)
+import threading                          # Connexion partagée entre threads
+import time                               # Date des batchs
+from typing import Callable, Dict, Iterable, List, Optional
+
+from churn_core import CATEGORICAL_COLUMNS, REQUIRED_COLUMNS
+from churn_metrics import MetricsRegistry
+from churn_recommendations import RECOMMENDATIONS_COLUMN
+
+# ============================================================
+# PARAMÈTRES
+# ============================================================
+
+# Fichier de la base (répertoire courant)
+DEFAULT_HISTORY_PATH = "churn_history.db"
+
+# Rétention: batchs clos gardés par empreinte de modèle (voir PredictionStore.prune)
+DEFAULT_KEEP_BATCHES = 20
+
+# Origine des prédictions du formulaire (batchs d'une ligne, comptés à part
+# par la rétention: ils ne chassent pas les batchs de fichiers)
+FORM_SOURCE = "Formulaire"
+
+# Colonnes reconnues comme identifiant client, par ordre de priorité
+CLIENT_ID_COLUMNS = ["client_id", "customer_id", "customerID", "id"]
+
+# Colonnes de prédiction enregistrées après les colonnes d'entrée
+PREDICTION_COLUMNS = ["churn_probability", "churn_prediction", "risk_level", RECOMMENDATIONS_COLUMN]
+
+# Types SQLite des colonnes enregistrées
+COLUMN_TYPES = {
+    "age": "INTEGER",
+    "tenure_months": "INTEGER",
+    "monthly_charges": "REAL",
+    "data_usage_gb": "REAL",
+    "voice_minutes": "INTEGER",
+    "support_calls": "INTEGER",
+    "network_quality": "INTEGER",
+    "payment_delay": "INTEGER",
+    "auto_payment": "INTEGER",
+    "contract_type": "TEXT",
+    "churn_probability": "REAL",
+    "churn_prediction": "INTEGER",
+    "risk_level": "TEXT",
+    RECOMMENDATIONS_COLUMN: "TEXT",
+}
+
+# Colonnes de la table predictions après (batch_id, row, client_id, scored_at)
+STORED_COLUMNS = REQUIRED_COLUMNS + PREDICTION_COLUMNS
+QUOTED_COLUMNS = ", ".join(f'"{column}"' for column in STORED_COLUMNS)
+
+# Colonnes du rescoring incrémental, en fin de table (ajoutées aux bases
+# plus anciennes à l'ouverture): empreinte des colonnes d'entrée et
+# probabilité non arrondie
+DELTA_COLUMNS = {"row_hash": "INTEGER", "raw_probability": "REAL"}
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS batches (
+    batch_id INTEGER PRIMARY KEY,
+    scored_at REAL NOT NULL,
+    source TEXT,
+    threshold REAL,
+    model_key TEXT,
+    rows INTEGER
+);
+CREATE TABLE IF NOT EXISTS predictions (
+    batch_id INTEGER NOT NULL,
+    row INTEGER NOT NULL,
+    client_id TEXT,
+    scored_at REAL NOT NULL,
+    {", ".join(f'"{column}" {COLUMN_TYPES[column]}' for column in STORED_COLUMNS)},
+    {", ".join(f"{column} {column_type}" for column, column_type in DELTA_COLUMNS.items())},
+    PRIMARY KEY (batch_id, row)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_predictions_client
+    ON predictions (client_id, scored_at) WHERE client_id IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_batches_scored_at ON batches (scored_at);
+"""
+
+# ============================================================
+# IDENTIFIANT CLIENT
+# ============================================================
+
+def find_client_id_column(columns: Iterable[str]) -> Optional[str]:
+    """
+    Colonne identifiant les clients d'un fichier
+
+    Args:
+        columns (Iterable[str]): Colonnes du fichier
+
+    Returns:
+        str: Première colonne de CLIENT_ID_COLUMNS présente, None sinon
+    """
+    columns = set(columns)
+    return next((column for column in CLIENT_ID_COLUMNS if column in columns), None)
+
+def row_hashes(df: pd.DataFrame) -> np.ndarray:
+    """
+    Empreinte des colonnes d'entrée de chaque ligne
+
+    Les colonnes numériques sont comparées en float64 et le type de
+    contrat en texte: la même ligne a la même empreinte quel que soit
+    le format du fichier (CSV typé, Parquet, JSON...).
+
+    Args:
+        df (pd.DataFrame): Données clients (colonnes REQUIRED_COLUMNS)
+
+    Returns:
+        np.ndarray: Empreintes uint64, une par ligne
+    """
+    canonical = pd.DataFrame({
+        column: (df[column].astype(str).to_numpy(dtype=object) if column in CATEGORICAL_COLUMNS
+                 else df[column].to_numpy(dtype=np.float64, na_value=np.nan))
+        for column in REQUIRED_COLUMNS
+    })
+    return pd.util.hash_pandas_object(canonical, index=False).to_numpy()
+
+def _column_values(scored: pd.DataFrame, column: str) -> List:
+    """Valeurs Python d'une colonne (None pour les valeurs manquantes ou la colonne absente)"""
+    if column not in scored:
+        return [None] * len(scored)
+    values = scored[column]
+    if pd.api.types.is_numeric_dtype(values.dtype) and not values.hasnans:
+        return values.to_numpy().tolist()
+    return values.astype(object).where(values.notna(), None).tolist()
+
+# ============================================================
+# BASE DES PRÉDICTIONS
+# ============================================================
+
+class PredictionStore:
+    """
+    Historique des prédictions dans une base SQLite locale
+
+    Un batch est ouvert par start_batch, complété bloc par bloc par
+    append (une transaction et une insertion groupée par bloc), puis
+    clos par finish_batch. Les prédictions sont rangées par
+    (batch_id, row): un batch ou une page de batch se relit par un
+    parcours de la clé primaire. L'index (client_id, scored_at) sert
+    l'historique d'un client; il ne couvre que les fichiers ayant une
+    colonne identifiant (CLIENT_ID_COLUMNS).
+
+    Exemple:
+        store = PredictionStore()
+        batch_id = store.start_batch("clients.csv", threshold=0.5)
+        for i, scored in enumerate(scored_chunks):
+            store.append(batch_id, scored, first_row=i * chunksize)
+        store.finish_batch(batch_id)
+        history = store.client_history("C-1042")
+    """
+
+    def __init__(self, path: str = DEFAULT_HISTORY_PATH):
+        """
+        Args:
+            path (str): Fichier de la base (créé si besoin)
+        """
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        # WAL: les lectures (dashboard) ne sont pas bloquées pendant l'ajout d'un batch
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.executescript(SCHEMA)
+            # Bases créées avant le rescoring incrémental: colonnes ajoutées
+            columns = [info[1] for info in self._conn.execute("PRAGMA table_info(predictions)")]
+            for column, column_type in DELTA_COLUMNS.items():
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE predictions ADD COLUMN {column} {column_type}")
+        self._insert = (
+            f"INSERT INTO predictions (batch_id, row, client_id, scored_at, {QUOTED_COLUMNS}, "
+            f"{', '.join(DELTA_COLUMNS)}) VALUES ({', '.join('?' * (4 + len(STORED_COLUMNS) + len(DELTA_COLUMNS)))})"
+        )
+
+    def start_batch(self, source: str, threshold: float, model_key: str = "") -> int:
+        """
+        Ouvre un batch
+
+        Args:
+            source (str): Origine des prédictions (nom du fichier, formulaire...)
+            threshold (float): Seuil de décision utilisé
+            model_key (str): Empreinte des artefacts du modèle (optionnel)
+
+        Returns:
+            int: Identifiant du batch
+        """
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO batches (scored_at, source, threshold, model_key) VALUES (?, ?, ?, ?)",
+                (time.time(), source, threshold, model_key)
+            )
+            return cursor.lastrowid
+
+    def append(self, batch_id: int, scored: pd.DataFrame, first_row: int = 0,
+               probabilities: Optional[np.ndarray] = None) -> None:
+        """
+        Ajoute un bloc de résultats à un batch (une insertion groupée)
+
+        Args:
+            batch_id (int): Identifiant du batch (start_batch)
+            scored (pd.DataFrame): Données d'origine et colonnes de prédiction
+            first_row (int): Numéro de la première ligne du bloc dans le batch
+            probabilities (np.ndarray): Probabilités non arrondies des lignes
+                                        (nécessaires au rescoring incrémental)
+        """
+        n_rows = len(scored)
+        if n_rows == 0:
+            return
+        with self._lock:
+            scored_at = self._conn.execute(
+                "SELECT scored_at FROM batches WHERE batch_id = ?", (batch_id,)
+            ).fetchone()[0]
+            id_column = find_client_id_column(scored.columns)
+            client_ids = ([None] * n_rows if id_column is None
+                          else scored[id_column].astype(str).where(scored[id_column].notna(), None).tolist())
+            # SQLite stocke des entiers signés: empreintes relues en uint64 (reference_results)
+            hashes = (row_hashes(scored).view(np.int64).tolist() if set(REQUIRED_COLUMNS) <= set(scored.columns)
+                      else [None] * n_rows)
+            raw = [None] * n_rows if probabilities is None else np.asarray(probabilities, dtype=np.float64).tolist()
+            rows = zip(
+                [batch_id] * n_rows,
+                range(first_row, first_row + n_rows),
+                client_ids,
+                [scored_at] * n_rows,
+                *(_column_values(scored, column) for column in STORED_COLUMNS),
+                hashes,
+                raw,
+            )
+            with self._conn:
+                self._conn.executemany(self._insert, rows)
+
+    def finish_batch(self, batch_id: int) -> int:
+        """
+        Clôt un batch en enregistrant son nombre de lignes
+
+        Returns:
+            int: Nombre de lignes du batch
+        """
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                "SELECT COUNT(*) FROM predictions WHERE batch_id = ?", (batch_id,)
+            ).fetchone()[0]
+            self._conn.execute("UPDATE batches SET rows = ? WHERE batch_id = ?", (rows, batch_id))
+            return rows
+
+    def save_batch(self, scored_chunks: Iterable[pd.DataFrame], source: str,
+                   threshold: float, model_key: str = "",
+                   probabilities: Optional[np.ndarray] = None) -> int:
+        """
+        Enregistre un batch complet à partir de ses blocs de résultats
+
+        Un batch interrompu (erreur de lecture, arrêt) est supprimé: il
+        n'est jamais laissé ouvert avec une partie de ses lignes.
+
+        Args:
+            scored_chunks (Iterable[pd.DataFrame]): Blocs de résultats, dans l'ordre
+            source (str): Origine des prédictions
+            threshold (float): Seuil de décision utilisé
+            model_key (str): Empreinte des artefacts du modèle (optionnel)
+            probabilities (np.ndarray): Probabilités non arrondies de toutes
+                                        les lignes, dans l'ordre (optionnel)
+
+        Returns:
+            int: Identifiant du batch
+        """
+        batch_id = self.start_batch(source, threshold, model_key)
+        try:
+            first_row = 0
+            for scored in scored_chunks:
+                self.append(batch_id, scored, first_row,
+                            None if probabilities is None else probabilities[first_row:first_row + len(scored)])
+                first_row += len(scored)
+            self.finish_batch(batch_id)
+        except BaseException:
+            self.delete_batch(batch_id)
+            raise
+        return batch_id
+
+    def delete_batch(self, batch_id: int) -> None:
+        """Supprime un batch et ses prédictions (ex: batch interrompu)"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM predictions WHERE batch_id = ?", (batch_id,))
+            self._conn.execute("DELETE FROM batches WHERE batch_id = ?", (batch_id,))
+
+    def prune(self, keep_batches: int = DEFAULT_KEEP_BATCHES) -> int:
+        """
+        Supprime les batchs clos au-delà des keep_batches plus récents
+
+        La limite s'applique par empreinte de modèle, séparément aux
+        batchs de fichiers et aux prédictions du formulaire
+        (FORM_SOURCE). Le batch le plus récent de chaque modèle, qui
+        sert de référence au rescoring incrémental, est toujours gardé.
+        Les pages libérées sont réutilisées par les batchs suivants: la
+        taille du fichier reste bornée.
+
+        Args:
+            keep_batches (int): Batchs gardés par modèle et par origine (au moins 1)
+
+        Returns:
+            int: Nombre de batchs supprimés
+        """
+        if keep_batches < 1:
+            raise ValueError("keep_batches doit être supérieur ou égal à 1")
+        with self._lock, self._conn:
+            expired = [row[0] for row in self._conn.execute(
+                "SELECT batch_id FROM (SELECT batch_id, ROW_NUMBER() OVER ("
+                "PARTITION BY COALESCE(model_key, ''), source IS ? ORDER BY scored_at DESC, batch_id DESC"
+                ") AS position FROM batches WHERE rows IS NOT NULL) WHERE position > ?",
+                (FORM_SOURCE, keep_batches)
+            )]
+            for batch_id in expired:
+                self._conn.execute("DELETE FROM predictions WHERE batch_id = ?", (batch_id,))
+                self._conn.execute("DELETE FROM batches WHERE batch_id = ?", (batch_id,))
+        return len(expired)
+
+    def _query(self, sql: str, params=()) -> pd.DataFrame:
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+            columns = [description[0] for description in cursor.description]
+            return pd.DataFrame.from_records(cursor.fetchall(), columns=columns)
+
+    def batches(self, limit: int = 50) -> pd.DataFrame:
+        """
+        Batchs les plus récents
+
+        Args:
+            limit (int): Nombre maximum de batchs
+
+        Returns:
+            pd.DataFrame: batch_id, scored_at (datetime), source, threshold,
+                          model_key, rows (vide si le batch n'est pas clos)
+        """
+        batches = self._query(
+            "SELECT batch_id, scored_at, source, threshold, model_key, rows "
+            "FROM batches ORDER BY scored_at DESC, batch_id DESC LIMIT ?", (limit,)
+        )
+        batches["scored_at"] = pd.to_datetime(batches["scored_at"], unit="s")
+        return batches
+
+    def load_batch(self, batch_id: int, start: int = 0, nrows: Optional[int] = None) -> pd.DataFrame:
+        """
+        Prédictions d'un batch passé (ou d'une page de ce batch)
+
+        Args:
+            batch_id (int): Identifiant du batch
+            start (int): Première ligne
+            nrows (int): Nombre de lignes (par défaut: jusqu'à la fin)
+
+        Returns:
+            pd.DataFrame: client_id, colonnes d'entrée et de prédiction,
+                          indexées par le numéro de ligne dans le batch
+        """
+        end = start + nrows if nrows is not None else np.iinfo(np.int64).max
+        batch = self._query(
+            f"SELECT row, client_id, {QUOTED_COLUMNS} "
+            "FROM predictions WHERE batch_id = ? AND row >= ? AND row < ? ORDER BY row",
+            (batch_id, start, end)
+        )
+        return batch.set_index("row").rename_axis(None)
+
+    def client_history(self, client_id) -> pd.DataFrame:
+        """
+        Évolution des prédictions d'un client, de la plus ancienne à la plus récente
+
+        Args:
+            client_id: Identifiant du client (comparé sous forme de texte)
+
+        Returns:
+            pd.DataFrame: scored_at (datetime), batch_id, churn_probability,
+                          churn_prediction, risk_level
+        """
+        history = self._query(
+            "SELECT scored_at, batch_id, churn_probability, churn_prediction, risk_level "
+            "FROM predictions WHERE client_id = ? ORDER BY scored_at, batch_id",
+            (str(client_id),)
+        )
+        history["scored_at"] = pd.to_datetime(history["scored_at"], unit="s")
+        return history
+
+    def find_reference_batch(self, model_key: str) -> Optional[int]:
+        """
+        Dernier batch clos réutilisable pour un rescoring incrémental
+
+        Le batch doit avoir été prédit avec les mêmes artefacts et
+        contenir des identifiants clients avec leur empreinte et leur
+        probabilité non arrondie. Le seuil peut différer: les résultats
+        sont recalculés à partir des probabilités.
+
+        Args:
+            model_key (str): Empreinte des artefacts du modèle courant
+
+        Returns:
+            int: Identifiant du batch, None si aucun ne convient
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT batch_id FROM batches b WHERE rows IS NOT NULL AND model_key = ? "
+                "AND EXISTS (SELECT 1 FROM predictions p WHERE p.batch_id = b.batch_id "
+                "AND p.client_id IS NOT NULL AND p.row_hash IS NOT NULL AND p.raw_probability IS NOT NULL) "
+                "ORDER BY scored_at DESC, batch_id DESC LIMIT 1",
+                (model_key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def reference_results(self, batch_id: int) -> pd.DataFrame:
+        """
+        Empreintes et probabilités d'un batch passé, par client
+
+        Args:
+            batch_id (int): Identifiant du batch de référence
+
+        Returns:
+            pd.DataFrame: row_hash (uint64) et raw_probability, indexés par
+                          client_id (dernière ligne de chaque client)
+        """
+        reference = self._query(
+            "SELECT client_id, row_hash, raw_probability FROM predictions WHERE batch_id = ? "
+            "AND client_id IS NOT NULL AND row_hash IS NOT NULL AND raw_probability IS NOT NULL",
+            (batch_id,)
+        )
+        reference = reference.drop_duplicates("client_id", keep="last").set_index("client_id")
+        reference["row_hash"] = reference["row_hash"].to_numpy(dtype=np.int64).view(np.uint64)
+        return reference
+
+    def close(self) -> None:
+        """Ferme la connexion à la base"""
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> "PredictionStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+# ============================================================
+# RESCORING INCRÉMENTAL
+# ============================================================
+
+class DeltaScorer:
+    """
+    Probabilités limitées aux clients nouveaux ou modifiés depuis un batch passé
+
+    Chaque ligne est reconnue par son identifiant client et l'empreinte
+    de ses colonnes d'entrée (row_hashes). Une ligne identique à celle
+    du batch de référence reprend sa probabilité non arrondie; les
+    autres sont prédites par predict_proba, en un seul appel par bloc.
+    Le batch de référence doit avoir les mêmes artefacts
+    (find_reference_batch): les résultats construits à partir de ces
+    probabilités (build_results_frame) sont identiques à un scoring
+    complet, quel que soit le seuil.
+
+    Exemple:
+        batch_id = store.find_reference_batch(model_key)
+        delta = DeltaScorer(store.reference_results(batch_id),
+                            lambda df: predict_probabilities(df, model, encoder))
+        probabilities = delta(chunk)
+        print(delta.stats())
+    """
+
+    def __init__(self, reference: pd.DataFrame,
+                 predict_proba: Callable[[pd.DataFrame], np.ndarray],
+                 metrics: Optional[MetricsRegistry] = None):
+        """
+        Args:
+            reference (pd.DataFrame): Probabilités du batch de référence (reference_results)
+            predict_proba (Callable): Fonction DataFrame → probabilités de churn brutes
+            metrics (MetricsRegistry): Registre où chronométrer la comparaison (optionnel)
+        """
+        self.predict_proba = predict_proba
+        self.metrics = metrics
+        self._ids = pd.Index(reference.index.astype(str))
+        self._hashes = reference["row_hash"].to_numpy(dtype=np.uint64)
+        self._probabilities = reference["raw_probability"].to_numpy(dtype=np.float64)
+        self.rows = 0
+        self.reused_rows = 0
+
+    def changed_rows(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Lignes à prédire (client absent de la référence ou colonnes modifiées)
+
+        Returns:
+            np.ndarray: Position dans la référence de chaque ligne, -1 si elle est à prédire
+        """
+        id_column = find_client_id_column(df.columns)
+        # Colonnes manquantes: tout est prédit (predict_proba signale l'erreur)
+        if id_column is None or len(self._ids) == 0 or not set(REQUIRED_COLUMNS) <= set(df.columns):
+            return np.full(len(df), -1, dtype=np.intp)
+        ids = df[id_column]
+        positions = self._ids.get_indexer(ids.astype(str))
+        positions[ids.isna().to_numpy()] = -1
+        found = positions >= 0
+        same = np.zeros(len(df), dtype=bool)
+        same[found] = self._hashes[positions[found]] == row_hashes(df[found])
+        positions[~same] = -1
+        return positions
+
+    def __call__(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Probabilités d'un bloc: reprises de la référence ou prédites
+
+        Args:
+            df (pd.DataFrame): Bloc de données clients
+
+        Returns:
+            np.ndarray: Probabilité de churn non arrondie de chaque ligne (float64)
+        """
+        n_rows = len(df)
+        if self.metrics is None:
+            positions = self.changed_rows(df)
+        else:
+            with self.metrics.stage("delta", n_rows):
+                positions = self.changed_rows(df)
+        reused = positions >= 0
+
+        probabilities = np.empty(n_rows, dtype=np.float64)
+        probabilities[reused] = self._probabilities[positions[reused]]
+        changed = ~reused
+        if changed.any():
+            probabilities[changed] = self.predict_proba(df[changed])
+
+        self.rows += n_rows
+        self.reused_rows += int(reused.sum())
+        return probabilities
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Lignes reprises et prédites
+
+        Returns:
+            Dict: rows, reused_rows, scored_rows et reused_rate (0-1)
+        """
+        return {
+            "rows": self.rows,
+            "reused_rows": self.reused_rows,
+            "scored_rows": self.rows - self.reused_rows,
+            "reused_rate": self.reused_rows / self.rows if self.rows else 0.0,
+        }
@@ -0,0 +1,246 @@
+# ============================================================
+# MÉMOÏSATION DES PRÉDICTIONS
+# ============================================================
+# Cache LRU borné devant model.predict_proba, indexé par le
+# vecteur de features encodé et standardisé de chaque ligne
+# Description: Les lignes identiques d'un même appel ne sont
+#              prédites qu'une fois (factorisation + index
+#              inverse); les vecteurs déjà vus (formulaire, API)
+#              sont servis par le cache sans appeler le modèle
+# ============================================================
+
+# ============================================================
+# IMPORTATION DES BIBLIOTHÈQUES
+# ============================================================
+
+import numpy as np                        # Matrices de features et probabilités
+import pandas as pd                       # Factorisation des lignes (table de hachage)
+import threading                          # Cache partagé entre threads
+from collections import OrderedDict       # Ordre d'utilisation (LRU)
+from typing import Dict, List, Optional, Tuple
+
+from churn_metrics import METRIC_PREFIX
+
+# ============================================================
+# PARAMÈTRES
+# ============================================================
+
+# Nombre maximum de vecteurs gardés en cache (~200 octets chacun)
+DEFAULT_CACHE_SIZE = 65_536
+
+# Au-delà de ce nombre de lignes distinctes, un appel est seulement
+# dédoublonné: un gros fichier de clients nouveaux paierait une
+# recherche par ligne et chasserait du cache les vecteurs récents
+DEFAULT_LOOKUP_MAX_ROWS = 10_000
+
+# ============================================================
+# LIGNES DISTINCTES
+# ============================================================
+
+def unique_rows(X: np.ndarray) -> Tuple[np.ndarray, List[bytes], np.ndarray]:
+    """
+    Regroupe les lignes identiques (octet par octet) d'une matrice
+
+    Chaque ligne est vue comme une chaîne d'octets de largeur fixe,
+    factorisée par table de hachage (ordre de première apparition).
+    NumPy retire les octets nuls finaux des chaînes: toutes les
+    lignes ayant la même largeur, deux clés égales restent deux
+    lignes identiques.
+
+    Args:
+        X (np.ndarray): Matrice de features (2D)
+
+    Returns:
+        Tuple: (codes, keys, first) - index de la ligne distincte de
+               chaque ligne, clé (octets) et première occurrence de
+               chaque ligne distincte
+    """
+    X = np.ascontiguousarray(X)
+    rows = X.view(np.dtype(("S", X.dtype.itemsize * X.shape[1]))).ravel()
+    codes, uniques = pd.factorize(rows)
+    first = np.empty(len(uniques), dtype=np.intp)
+    # Écritures en ordre inverse: la dernière écrite est la première occurrence
+    first[codes[::-1]] = np.arange(len(codes) - 1, -1, -1)
+    return codes, uniques.tolist(), first
+
+# ============================================================
+# MODÈLE MÉMOÏSÉ
+# ============================================================
+
+class MemoizedModel:
+    """
+    Modèle dont predict_proba dédoublonne les lignes et garde un cache LRU
+
+    Les probabilités sont identiques à celles du modèle: une même
+    ligne encodée donne toujours le même résultat, seule la ligne
+    d'origine est prédite. Les autres attributs (classes_, n_jobs...)
+    sont ceux du modèle.
+
+    Le cache est propre au modèle chargé: de nouveaux artefacts
+    donnent un nouveau MemoizedModel, ou invalidate(clé) le vide
+    quand l'empreinte des artefacts change.
+
+    Exemple:
+        model = MemoizedModel(model, artifacts_key=fingerprint_files(paths))
+        proba = model.predict_proba(X)[:, 1]
+        print(model.stats())
+    """
+
+    def __init__(self, model, maxsize: int = DEFAULT_CACHE_SIZE,
+                 lookup_max_rows: int = DEFAULT_LOOKUP_MAX_ROWS,
+                 artifacts_key: str = ""):
+        """
+        Args:
+            model: Modèle exposant predict_proba (FlatForest, RandomForestClassifier...)
+            maxsize (int): Nombre maximum de vecteurs en cache (0 = dédoublonnage seul)
+            lookup_max_rows (int): Lignes distinctes au-delà desquelles le cache n'est pas consulté
+            artifacts_key (str): Empreinte des artefacts du modèle (voir invalidate)
+        """
+        self.model = model
+        self.maxsize = maxsize
+        self.lookup_max_rows = lookup_max_rows
+        self.artifacts_key = artifacts_key
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self.calls = 0
+        self.rows = 0                     # Lignes demandées
+        self.unique_rows = 0              # Lignes distinctes (après dédoublonnage)
+        self.model_rows = 0               # Lignes réellement prédites par le modèle
+        self.hits = 0
+        self.misses = 0
+
+    def __getattr__(self, name: str):
+        # Appelé seulement pour les attributs absents du wrapper
+        if name == "model":
+            raise AttributeError(name)
+        return getattr(self.model, name)
+
+    def predict_proba(self, X) -> np.ndarray:
+        """
+        Probabilités par classe, identiques à model.predict_proba(X)
+
+        Args:
+            X: Matrice de features encodées et standardisées
+
+        Returns:
+            np.ndarray: Probabilités (n_lignes, n_classes)
+        """
+        X = np.asarray(X)
+        n_rows = len(X)
+        if n_rows == 0:
+            return self.model.predict_proba(X)
+        codes, keys, first = unique_rows(X)
+        n_unique = len(keys)
+        lookup = 0 < self.maxsize and n_unique <= self.lookup_max_rows
+
+        cached = [None] * n_unique
+        if lookup:
+            with self._lock:
+                for i, key in enumerate(keys):
+                    value = self._cache.get(key)
+                    if value is not None:
+                        self._cache.move_to_end(key)
+                        cached[i] = value
+        missing = [i for i, value in enumerate(cached) if value is None]
+
+        # Une seule prédiction pour toutes les lignes distinctes absentes du cache
+        if len(missing) == n_rows:
+            predicted = self.model.predict_proba(X)
+        else:
+            predicted = self.model.predict_proba(X[first[missing]]) if missing else None
+        if len(missing) == n_unique:
+            unique_proba = predicted
+        else:
+            width = len(next(value for value in cached if value is not None))
+            unique_proba = np.empty((n_unique, width), dtype=np.float64)
+            for i, value in enumerate(cached):
+                if value is not None:
+                    unique_proba[i] = value
+            if missing:
+                unique_proba[missing] = predicted
+
+        with self._lock:
+            if lookup:
+                for position, i in enumerate(missing):
+                    # Copie: une ligne de predicted garderait tout le tableau en mémoire
+                    self._cache[keys[i]] = predicted[position].copy()
+                while len(self._cache) > self.maxsize:
+                    self._cache.popitem(last=False)
+                self.hits += n_unique - len(missing)
+                self.misses += len(missing)
+            self.calls += 1
+            self.rows += n_rows
+            self.unique_rows += n_unique
+            self.model_rows += len(missing)
+
+        # Sans doublon, les lignes distinctes sont déjà dans l'ordre d'entrée
+        return unique_proba if n_unique == n_rows else unique_proba[codes]
+
+    def predict(self, X) -> np.ndarray:
+        """Classes prédites (même règle que RandomForestClassifier.predict)"""
+        return self.model.classes_.take(np.argmax(self.predict_proba(X), axis=1))
+
+    def invalidate(self, artifacts_key: Optional[str] = None) -> bool:
+        """
+        Vide le cache (toujours, ou si l'empreinte des artefacts a changé)
+
+        Args:
+            artifacts_key (str): Empreinte courante des artefacts (optionnel)
+
+        Returns:
+            bool: True si le cache a été vidé
+        """
+        with self._lock:
+            if artifacts_key is not None and artifacts_key == self.artifacts_key:
+                return False
+            if artifacts_key is not None:
+                self.artifacts_key = artifacts_key
+            self._cache.clear()
+            return True
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Compteurs et taux du cache
+
+        Returns:
+            Dict: calls, rows, unique_rows, model_rows, hits, misses, size,
+                  hit_rate (recherches servies par le cache),
+                  duplicate_rate (lignes doublons d'un même appel) et
+                  saved_rate (lignes non envoyées au modèle)
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "calls": self.calls,
+                "rows": self.rows,
+                "unique_rows": self.unique_rows,
+                "model_rows": self.model_rows,
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._cache),
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "duplicate_rate": 1 - self.unique_rows / self.rows if self.rows else 0.0,
+                "saved_rate": 1 - self.model_rows / self.rows if self.rows else 0.0,
+            }
+
+    def to_prometheus(self) -> str:
+        """
+        Export des compteurs au format texte Prometheus
+
+        Returns:
+            str: Compteurs churn_memo_*_total et taille du cache
+        """
+        stats = self.stats()
+        lines = []
+        for name, help_text in [
+            ("rows", "Lignes demandées au modèle mémoïsé"),
+            ("unique_rows", "Lignes distinctes après dédoublonnage"),
+            ("model_rows", "Lignes prédites par le modèle"),
+            ("hits", "Vecteurs servis par le cache"),
+            ("misses", "Vecteurs absents du cache"),
+        ]:
+            metric = f"{METRIC_PREFIX}_memo_{name}_total"
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter", f"{metric} {stats[name]}"]
+        metric = f"{METRIC_PREFIX}_memo_entries"
+        lines += [f"# HELP {metric} Vecteurs en cache", f"# TYPE {metric} gauge", f"{metric} {stats['size']}"]
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,282 @@
+# ============================================================
+# INSTRUMENTATION DU PIPELINE DE PRÉDICTION
+# ============================================================
+# Temps par étape (lecture, encodage, inférence, post-traitement,
+# écriture), débit, histogrammes de latence et pic de mémoire
+# Description: Les mesures sont cumulées dans un registre, journalisées
+#              en enregistrements JSON (logger "churn.metrics") et
+#              exportables au format texte Prometheus
+# ============================================================
+
+# ============================================================
+# IMPORTATION DES BIBLIOTHÈQUES
+# ============================================================
+
+import bisect                             # Classe d'histogramme d'une durée
+import json                               # Enregistrements structurés
+import logging                            # Journalisation des mesures
+import sys                                # Unité de ru_maxrss (macOS)
+import threading                          # Registre partagé entre threads
+import time                               # Chronométrage
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+try:
+    import resource                       # Pic de mémoire (Unix)
+except ImportError:
+    resource = None
+
+# ============================================================
+# PARAMÈTRES
+# ============================================================
+
+# Étapes du pipeline, dans l'ordre d'exécution
+STAGES = [
+    "parse", "delta", "encode", "inference", "postprocess", "recommend",
+    "explain", "aggregate", "write", "store", "export", "request",
+]
+
+# Bornes supérieures des classes des histogrammes de latence (s)
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+# Préfixe des métriques Prometheus
+METRIC_PREFIX = "churn"
+
+logger = logging.getLogger("churn.metrics")
+
+# ============================================================
+# HISTOGRAMME DE LATENCE
+# ============================================================
+
+class LatencyHistogram:
+    """
+    Histogramme à classes fixes (cumulable, comme un histogramme Prometheus)
+
+    Les quantiles sont estimés par interpolation linéaire dans la
+    classe qui les contient, comme histogram_quantile de Prometheus.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        """
+        Args:
+            buckets (tuple): Bornes supérieures croissantes des classes (s)
+        """
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # Dernière classe: +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        """Ajoute une durée"""
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def quantile(self, q: float) -> float:
+        """
+        Quantile estimé (s)
+
+        Args:
+            q (float): Quantile entre 0 et 1 (ex: 0.99)
+
+        Returns:
+            float: Durée estimée (0 sans observation, dernière borne finie
+                   si le quantile tombe dans la classe +Inf)
+        """
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for i, count in enumerate(self.counts):
+            if cumulative + count >= rank and count:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-1]
+
+# ============================================================
+# REGISTRE DES MESURES
+# ============================================================
+
+class MetricsRegistry:
+    """
+    Temps cumulés, lignes traitées et latences par étape
+
+    Un registre peut avoir un parent: chaque mesure y est aussi
+    reportée. Un traitement batch mesure ainsi ses propres étapes tout
+    en alimentant le registre global du processus (METRICS), exporté
+    pour Prometheus.
+
+    Exemple:
+        metrics = MetricsRegistry(parent=METRICS)
+        with metrics.stage("inference", rows=len(X)):
+            proba = model.predict_proba(X)
+        print(metrics.summary())
+    """
+
+    def __init__(self, parent: Optional["MetricsRegistry"] = None):
+        """
+        Args:
+            parent (MetricsRegistry): Registre recevant aussi chaque mesure (optionnel)
+        """
+        self.parent = parent
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._seconds: Dict[str, float] = {}
+        self._rows: Dict[str, int] = {}
+        self._histograms: Dict[str, LatencyHistogram] = {}
+
+    def observe(self, stage: str, seconds: float, rows: int = 0) -> None:
+        """
+        Enregistre une exécution d'étape
+
+        Args:
+            stage (str): Nom de l'étape (voir STAGES)
+            seconds (float): Durée (s)
+            rows (int): Lignes traitées
+        """
+        with self._lock:
+            self._seconds[stage] = self._seconds.get(stage, 0.0) + seconds
+            self._rows[stage] = self._rows.get(stage, 0) + rows
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = LatencyHistogram()
+            histogram.observe(seconds)
+        if self.parent is not None:
+            self.parent.observe(stage, seconds, rows)
+        elif logger.isEnabledFor(logging.DEBUG):
+            logger.debug(json.dumps({"event": "stage", "stage": stage,
+                                     "seconds": round(seconds, 6), "rows": rows}))
+
+    @contextmanager
+    def stage(self, stage: str, rows: int = 0) -> Iterator[None]:
+        """Chronomètre un bloc de code comme une exécution d'étape"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start, rows)
+
+    def timed_iter(self, stage: str, iterable) -> Iterator:
+        """
+        Parcourt un itérable en chronométrant la production de chaque élément
+
+        Sert à mesurer la lecture des blocs d'un fichier (les lignes sont
+        comptées quand l'élément a une longueur).
+        """
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            self.observe(stage, time.perf_counter() - start, len(item) if hasattr(item, "__len__") else 0)
+            yield item
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Statistiques par étape (dans l'ordre de STAGES)
+
+        Returns:
+            Dict: {étape: {calls, seconds, rows, rows_per_second, p50_ms, p99_ms}}
+        """
+        with self._lock:
+            names = sorted(self._seconds, key=lambda s: STAGES.index(s) if s in STAGES else len(STAGES))
+            result = {}
+            for name in names:
+                seconds = self._seconds[name]
+                rows = self._rows[name]
+                histogram = self._histograms[name]
+                result[name] = {
+                    "calls": histogram.count,
+                    "seconds": seconds,
+                    "rows": rows,
+                    "rows_per_second": rows / seconds if seconds > 0 and rows else 0.0,
+                    "p50_ms": histogram.quantile(0.50) * 1000,
+                    "p99_ms": histogram.quantile(0.99) * 1000,
+                }
+            return result
+
+    def to_prometheus(self) -> str:
+        """
+        Export au format texte Prometheus (exposition 0.0.4)
+
+        Returns:
+            str: Histogrammes churn_stage_seconds, compteurs
+                 churn_stage_rows_total et pic de mémoire du processus
+        """
+        name = f"{METRIC_PREFIX}_stage_seconds"
+        lines = [
+            f"# HELP {name} Durée des étapes du pipeline de prédiction (s)",
+            f"# TYPE {name} histogram",
+        ]
+        with self._lock:
+            for stage, histogram in self._histograms.items():
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{stage="{stage}",le="{bound:g}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {histogram.count}')
+                lines.append(f'{name}_sum{{stage="{stage}"}} {histogram.sum:.9g}')
+                lines.append(f'{name}_count{{stage="{stage}"}} {histogram.count}')
+
+            rows_name = f"{METRIC_PREFIX}_stage_rows_total"
+            lines.append(f"# HELP {rows_name} Lignes traitées par étape")
+            lines.append(f"# TYPE {rows_name} counter")
+            for stage, rows in self._rows.items():
+                lines.append(f'{rows_name}{{stage="{stage}"}} {rows}')
+
+        peak = peak_memory_bytes()
+        if peak is not None:
+            memory_name = f"{METRIC_PREFIX}_process_peak_rss_bytes"
+            lines.append(f"# HELP {memory_name} Pic de mémoire résidente du processus")
+            lines.append(f"# TYPE {memory_name} gauge")
+            lines.append(f"{memory_name} {peak}")
+        return "\n".join(lines) + "\n"
+
+    def log_summary(self, event: str, **fields) -> Dict:
+        """
+        Journalise le résumé des étapes en un enregistrement JSON (niveau INFO)
+
+        Args:
+            event (str): Nom de l'événement (ex: "batch")
+            **fields: Champs ajoutés à l'enregistrement (ex: rows, file)
+
+        Returns:
+            Dict: Enregistrement journalisé
+        """
+        record = {"event": event, **fields,
+                  "seconds": round(time.time() - self.started, 6),
+                  "peak_rss_bytes": peak_memory_bytes(),
+                  "stages": self.summary()}
+        logger.info(json.dumps(record, default=float))
+        return record
+
+def peak_memory_bytes() -> Optional[int]:
+    """Pic de mémoire résidente du processus (octets), None hors Unix"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss est en Ko sous Linux, en octets sous macOS
+    return int(peak if sys.platform == "darwin" else peak * 1024)
+
+def format_summary(summary: Dict[str, Dict[str, float]]) -> List[str]:
+    """Lignes texte d'un résumé d'étapes (rapport en ligne de commande)"""
+    total = sum(stats["seconds"] for stats in summary.values()) or 1.0
+    lines = []
+    for stage, stats in summary.items():
+        line = f"{stage:<12} {stats['seconds']:>9.3f} s {stats['seconds'] / total:>6.1%}"
+        if stats["rows_per_second"]:
+            line += f"  {stats['rows_per_second']:>12,.0f} lignes/s"
+        line += f"  p50 {stats['p50_ms']:.2f} ms  p99 {stats['p99_ms']:.2f} ms"
+        lines.append(line)
+    return lines
+
+# Registre global du processus (API, dashboard, ligne de commande)
+METRICS = MetricsRegistry()
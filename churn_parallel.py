@@ -0,0 +1,272 @@
+# ============================================================
+# SCORING PARALLÈLE MULTI-PROCESSUS
+# ============================================================
+# Découpage d'un batch en fragments (shards) prédits sur un pool
+# de processus, puis réassemblage dans l'ordre d'entrée
+# Description: Chaque processus dispose d'une copie du modèle
+#              chargée une seule fois (partagée en copie sur
+#              écriture avec fork, rechargée avec forkserver
+#              ou spawn)
+# ============================================================
+
+# ============================================================
+# IMPORTATION DES BIBLIOTHÈQUES
+# ============================================================
+
+import multiprocessing                    # Choix de la méthode de démarrage
+import os                                 # Nombre de cœurs
+import threading                          # Fork réservé aux processus sans autre thread
+from collections import deque             # Fragments en cours de calcul (ordre conservé)
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np                        # Probabilités des fragments
+import pandas as pd                       # Fragments et résultats
+
+from churn_core import (
+    FEATURES_PATH,
+    MODEL_PATH,
+    SCALER_PATH,
+    THRESHOLD,
+    FeatureEncoder,
+    build_results_frame,
+    load_artifacts,
+    predict_probabilities,
+)
+from churn_memo import MemoizedModel
+
+# ============================================================
+# PARAMÈTRES
+# ============================================================
+
+# Taille minimale d'un fragment: en dessous, le coût d'envoi au
+# processus dépasse le gain du parallélisme
+MIN_SHARD_SIZE = 10_000
+
+# Fragments par processus lors du découpage d'un DataFrame
+# (plusieurs par processus pour lisser les écarts de durée)
+SHARDS_PER_WORKER = 4
+
+# ============================================================
+# ÉTAT DES PROCESSUS DE CALCUL
+# ============================================================
+
+# Artefacts d'un processus de calcul (modèle, encodeur), jamais
+# renseignés dans le processus parent
+_worker_state = {}
+
+def usable_cpus() -> int:
+    """Cœurs utilisables par le processus (affinité CPU du conteneur si disponible)"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0)) or 1
+    return os.cpu_count() or 1
+
+def _load_state(model_path: str, scaler_path: str, features_path: str,
+                sklearn_fallback: bool = False) -> Dict:
+    """
+    Charge les artefacts d'un scorer
+
+    Le modèle est forcé en n_jobs=1: le parallélisme vient des processus,
+    pas des threads joblib de la forêt (évite la sursouscription). Les
+    lignes identiques d'un fragment ne sont prédites qu'une fois.
+
+    Returns:
+        Dict: Modèle (model) et encodeur (encoder)
+    """
+    model, scaler, features = load_artifacts(model_path, scaler_path, features_path,
+                                             sklearn_fallback=sklearn_fallback)
+    if hasattr(model, "n_jobs"):
+        model.n_jobs = 1
+    return {"model": MemoizedModel(model), "encoder": FeatureEncoder(features, scaler=scaler)}
+
+def _set_worker_state(state: Dict) -> None:
+    """Initialisation d'un processus fils (fork): artefacts hérités du scorer parent"""
+    _worker_state.update(state)
+
+def _load_worker_state(model_path: str, scaler_path: str, features_path: str,
+                       sklearn_fallback: bool = False) -> None:
+    """Initialisation d'un processus démarré à neuf (forkserver, spawn): artefacts rechargés"""
+    _worker_state.update(_load_state(model_path, scaler_path, features_path, sklearn_fallback))
+
+def _predict_shard(shard: pd.DataFrame) -> np.ndarray:
+    """Prédit un fragment dans un processus de calcul (probabilités brutes seules)"""
+    return predict_probabilities(shard, _worker_state["model"], _worker_state["encoder"])
+
+def default_start_method() -> str:
+    """
+    Méthode de démarrage des processus de calcul
+
+    fork seulement si le processus n'a qu'un thread: un fork copie les
+    verrous tenus par les autres threads (joblib, cache des prédictions,
+    SQLite), bloqués à jamais dans le fils. Sinon forkserver, ou spawn
+    là où il n'existe pas (Windows).
+
+    Returns:
+        str: 'fork', 'forkserver' ou 'spawn'
+    """
+    methods = multiprocessing.get_all_start_methods()
+    if "fork" in methods and threading.active_count() == 1:
+        return "fork"
+    return "forkserver" if "forkserver" in methods else "spawn"
+
+# ============================================================
+# MOTEUR DE SCORING PARALLÈLE
+# ============================================================
+
+class ParallelScorer:
+    """
+    Pool de processus de scoring partageant les mêmes artefacts
+
+    Avec la méthode fork (Linux, processus sans autre thread), les
+    artefacts sont chargés une fois par le scorer avant la création du
+    pool et transmis à l'initialisation des processus fils: ils lisent
+    les mêmes pages mémoire (copie sur écriture) sans recharger ni
+    dupliquer le modèle. Chaque scorer garde ses propres artefacts:
+    deux scorers n'interfèrent pas. Depuis un processus avec plusieurs
+    threads (Streamlit, API), un fork copierait des verrous tenus par
+    les autres threads: forkserver (ou spawn) est alors utilisé, et
+    chaque processus charge les artefacts une fois à son démarrage.
+
+    Seules les probabilités brutes (8 octets par ligne) reviennent au
+    parent, qui applique le seuil et les niveaux de risque; au plus
+    max_pending fragments sont en vol à la fois: la mémoire reste
+    bornée même pour un flux de blocs sans fin. Chaque bloc d'un flux
+    est découpé en un fragment par processus (MIN_SHARD_SIZE lignes au
+    moins): un seul bloc occupe déjà tout le pool.
+
+    Exemple:
+        with ParallelScorer(workers=8) as scorer:
+            results = scorer.score_frame(df)
+    """
+
+    def __init__(self, workers: Optional[int] = None,
+                 model_path: str = MODEL_PATH,
+                 scaler_path: str = SCALER_PATH,
+                 features_path: str = FEATURES_PATH,
+                 threshold: float = THRESHOLD,
+                 start_method: Optional[str] = None,
+                 sklearn_fallback: bool = False):
+        """
+        Args:
+            workers (int): Nombre de processus (tous les cœurs utilisables par défaut)
+            model_path (str): Chemin du modèle
+            scaler_path (str): Chemin du scaler
+            features_path (str): Chemin de la liste des features
+            threshold (float): Seuil de décision (appliqué dans le processus parent)
+            start_method (str): 'fork', 'forkserver' ou 'spawn' (par défaut: fork si
+                                disponible et le processus n'a qu'un thread)
+            sklearn_fallback (bool): Arbres scikit-learn pour les grands fragments
+                                     (voir load_artifacts)
+
+        Raises:
+            FileNotFoundError: Si un des artefacts est manquant
+        """
+        self.workers = workers or usable_cpus()
+        self.threshold = threshold
+        self.max_pending = 2 * self.workers
+
+        if start_method is None:
+            start_method = default_start_method()
+        artifact_args = (model_path, scaler_path, features_path)
+
+        if start_method == "fork":
+            # Chargés ici et transmis aux processus fils (hérités sans copie ni pickle)
+            initializer, initargs = _set_worker_state, (_load_state(*artifact_args, sklearn_fallback),)
+        else:
+            # Vérification immédiate des fichiers plutôt qu'au premier fragment
+            missing = [p for p in artifact_args if not os.path.exists(p)]
+            if missing:
+                raise FileNotFoundError(f"Fichiers manquants: {', '.join(missing)}")
+            initializer, initargs = _load_worker_state, (*artifact_args, sklearn_fallback)
+
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context(start_method),
+            initializer=initializer,
+            initargs=initargs,
+        )
+
+    def _ordered_map(self, function: Callable, items: Iterable) -> Iterator:
+        """map() sur le pool avec un nombre borné de tâches en vol, dans l'ordre"""
+        pending = deque()
+        for item in items:
+            pending.append(self._executor.submit(function, item))
+            if len(pending) >= self.max_pending:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+    def _chunk_shards(self, chunk: pd.DataFrame) -> List[pd.DataFrame]:
+        """Fragments d'un bloc lu en flux: un par processus, MIN_SHARD_SIZE lignes au moins"""
+        shard_size = max(MIN_SHARD_SIZE, -(-len(chunk) // self.workers))
+        return [chunk.iloc[start:start + shard_size] for start in range(0, len(chunk), shard_size)]
+
+    def _default_results(self, df: pd.DataFrame, probabilities: np.ndarray) -> pd.DataFrame:
+        """Seuil et niveaux de risque du scorer (voir build_results_frame)"""
+        return build_results_frame(probabilities, self.threshold, index=df.index)
+
+    def score_chunks(self, chunks: Iterable[pd.DataFrame],
+                     build_results: Optional[Callable[[pd.DataFrame, np.ndarray], pd.DataFrame]] = None
+                     ) -> Iterator[Tuple[pd.DataFrame, np.ndarray]]:
+        """
+        Prédit un flux de blocs en parallèle (comme stream_scored)
+
+        Args:
+            chunks (Iterable[pd.DataFrame]): Blocs de données clients
+            build_results (Callable): (bloc, probabilités) → colonnes de résultats
+                                      (seuil du scorer par défaut)
+
+        Yields:
+            Tuple[pd.DataFrame, np.ndarray]: Bloc d'origine complété des colonnes de
+                                             prédiction et probabilités brutes du bloc,
+                                             dans l'ordre d'entrée
+        """
+        build_results = build_results or self._default_results
+        pending = deque()
+        in_flight = 0
+
+        def assemble(chunk: pd.DataFrame, futures: list) -> Tuple[pd.DataFrame, np.ndarray]:
+            probabilities = (np.concatenate([future.result() for future in futures]) if futures
+                             else np.empty(0, dtype=np.float64))
+            return pd.concat([chunk, build_results(chunk, probabilities)], axis=1), probabilities
+
+        for chunk in chunks:
+            futures = [self._executor.submit(_predict_shard, shard) for shard in self._chunk_shards(chunk)]
+            pending.append((chunk, futures))
+            in_flight += len(futures)
+            while pending and in_flight >= self.max_pending:
+                chunk, futures = pending.popleft()
+                in_flight -= len(futures)
+                yield assemble(chunk, futures)
+        while pending:
+            yield assemble(*pending.popleft())
+
+    def score_frame(self, df: pd.DataFrame, shard_size: Optional[int] = None) -> pd.DataFrame:
+        """
+        Prédit un DataFrame en le découpant en fragments
+
+        Args:
+            df (pd.DataFrame): Données clients
+            shard_size (int): Lignes par fragment (automatique par défaut)
+
+        Returns:
+            pd.DataFrame: Résultats alignés sur l'index de df
+                          Colonnes: churn_probability, churn_prediction, risk_level
+        """
+        if shard_size is None:
+            shard_size = max(MIN_SHARD_SIZE, -(-len(df) // (self.workers * SHARDS_PER_WORKER)))
+        shards = (df.iloc[start:start + shard_size] for start in range(0, len(df), shard_size))
+        probabilities = list(self._ordered_map(_predict_shard, shards))
+        # DataFrame vide: colonnes et types habituels, sans passer par le pool
+        probabilities = np.concatenate(probabilities) if probabilities else np.empty(0, dtype=np.float64)
+        return self._default_results(df, probabilities)
+
+    def close(self) -> None:
+        """Arrête les processus de calcul"""
+        self._executor.shutdown()
+
+    def __enter__(self) -> "ParallelScorer":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
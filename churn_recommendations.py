@@ -0,0 +1,198 @@
+# ============================================================
+# MOTEUR DE RECOMMANDATIONS
+# ============================================================
+# Règles de recommandation évaluées sur des colonnes entières
+# (masques booléens NumPy) plutôt que client par client
+# Description: Chaque ligne reçoit un masque de bits (un bit par
+#              règle), converti en liste de codes pour les
+#              résultats batch ou en messages pour un client
+# ============================================================
+
+# ============================================================
+# IMPORTATION DES BIBLIOTHÈQUES
+# ============================================================
+
+import numpy as np                        # Masques booléens et de bits
+import pandas as pd                       # Colonne de codes (catégorielle)
+from typing import Callable, Dict, List, Mapping, NamedTuple
+
+# ============================================================
+# RÈGLES
+# ============================================================
+
+class Rule(NamedTuple):
+    """Règle de recommandation: condition vectorisée sur une colonne"""
+    code: str                             # Identifiant court (colonne recommendations des résultats)
+    label: str                            # Libellé court (tableaux du dashboard)
+    column: str                           # Colonne évaluée
+    default: object                       # Valeur supposée si la colonne manque
+    condition: Callable[[np.ndarray], np.ndarray]
+    messages: List[str]                   # Recommandations affichées pour un client
+
+# Règles dans l'ordre d'affichage: le bit i du masque correspond à RULES[i].
+# Exactement un des trois niveaux de risque s'applique à chaque client.
+RULES: List[Rule] = [
+    Rule("urgent_action", "Action urgente (risque élevé)", "risk_level", None,
+         lambda values: values == "High", [
+             "🚨 **Action Urgente**: Contactez ce client immédiatement",
+             "💰 Proposez une offre promotionnelle personnalisée (-20% pendant 3 mois)",
+             "🎁 Offrez un upgrade gratuit vers un forfait supérieur",
+         ]),
+    Rule("active_monitoring", "Surveillance active (risque moyen)", "risk_level", None,
+         lambda values: values == "Medium", [
+             "⚠️ **Surveillance Active**: Planifiez un appel de satisfaction",
+             "📧 Envoyez une campagne email avec des offres exclusives",
+             "🎯 Proposez des services additionnels gratuits (roaming, data extra)",
+         ]),
+    Rule("loyalty", "Fidélisation (risque faible)", "risk_level", None,
+         lambda values: (values != "High") & (values != "Medium"), [
+             "✅ **Client Stable**: Continuez l'engagement régulier",
+             "🌟 Programmes de fidélité et récompenses",
+             "📱 Invitez à parrainer d'autres clients (programme référent)",
+         ]),
+    Rule("support_quality", "Appels support élevés", "support_calls", 0,
+         lambda values: values > 3, [
+             "📞 **Problème détecté**: Nombre élevé d'appels support → Améliorer la qualité de service",
+         ]),
+    Rule("flexible_payment", "Retards de paiement", "payment_delay", 0,
+         lambda values: values > 0, [
+             "💳 **Paiement**: Retards détectés → Proposer un plan de paiement flexible",
+         ]),
+    Rule("annual_contract", "Contrat mensuel", "contract_type", None,
+         lambda values: values == "Monthly", [
+             "📝 **Contrat**: Type mensuel → Encourager passage à contrat annuel avec bonus",
+         ]),
+    Rule("network_coverage", "Qualité réseau faible", "network_quality", 5,
+         lambda values: values < 3, [
+             "📡 **Réseau**: Qualité faible → Vérifier et améliorer la couverture dans sa zone",
+         ]),
+    Rule("auto_payment", "Paiement auto non activé", "auto_payment", 1,
+         lambda values: values == 0, [
+             "🔄 **Paiement Auto**: Non activé → Inciter avec 5% de réduction",
+         ]),
+    Rule("onboarding", "Nouveau client", "tenure_months", 0,
+         lambda values: values < 6, [
+             "🆕 **Nouveau Client**: Ancienneté faible → Programme d'onboarding renforcé",
+         ]),
+]
+
+RULE_CODES = [rule.code for rule in RULES]
+
+# Séparateur des codes dans la colonne recommendations
+CODE_SEPARATOR = ";"
+
+# Colonne ajoutée aux résultats batch
+RECOMMENDATIONS_COLUMN = "recommendations"
+
+def mask_codes(mask: int) -> List[str]:
+    """Codes des règles d'un masque, dans l'ordre de RULES"""
+    return [rule.code for bit, rule in enumerate(RULES) if mask >> bit & 1]
+
+# Libellé de chaque masque possible (catégories de la colonne recommendations)
+CODE_LABELS = [CODE_SEPARATOR.join(mask_codes(mask)) for mask in range(1 << len(RULES))]
+
+# ============================================================
+# ÉVALUATION VECTORISÉE
+# ============================================================
+
+def recommendation_masks(data: Mapping, risk_level=None) -> np.ndarray:
+    """
+    Masque de recommandations de chaque ligne
+
+    Chaque règle est évaluée une fois sur sa colonne entière; le bit i
+    de la ligne k vaut 1 si RULES[i] s'applique au client k.
+
+    Args:
+        data (Mapping): DataFrame ou dictionnaire de colonnes clients
+        risk_level: Niveaux de risque (Low/Medium/High), à défaut data["risk_level"]
+
+    Returns:
+        np.ndarray: Masques uint16, un par ligne
+    """
+    if isinstance(data, pd.DataFrame):
+        n_rows = len(data)
+    else:
+        n_rows = len(risk_level) if risk_level is not None else len(next(iter(data.values()), []))
+
+    masks = np.zeros(n_rows, dtype=np.uint16)
+    for bit, rule in enumerate(RULES):
+        if rule.column == "risk_level" and risk_level is not None:
+            values = risk_level
+        elif rule.column in data:
+            values = data[rule.column]
+        elif rule.default is not None:
+            values = np.full(n_rows, rule.default)
+        else:
+            continue
+        matches = np.asarray(rule.condition(_column_values(values)), dtype=bool)
+        masks |= matches.astype(np.uint16) << bit
+    return masks
+
+def _column_values(values):
+    """
+    Colonne prête à comparer
+
+    Les colonnes numériques passent en float64 (valeurs manquantes:
+    NaN, qui ne déclenche aucune règle). Les colonnes catégorielles et
+    texte restent des Series: pandas les compare sur leurs codes ou en
+    Arrow, sans créer d'objets Python.
+    """
+    if isinstance(values, pd.Series):
+        if pd.api.types.is_numeric_dtype(values.dtype):
+            return values.to_numpy(dtype=np.float64, na_value=np.nan)
+        return values
+    values = np.asarray(values)
+    return values.astype(np.float64) if values.dtype.kind in "biuf" else values
+
+def mask_messages(mask: int) -> List[str]:
+    """Recommandations affichées pour un masque, dans l'ordre de RULES"""
+    return [message for bit, rule in enumerate(RULES) if mask >> bit & 1 for message in rule.messages]
+
+def recommendation_codes(masks: np.ndarray) -> pd.Categorical:
+    """
+    Colonne de codes des recommandations (ex: "urgent_action;annual_contract")
+
+    La colonne est catégorielle sur CODE_LABELS: le code de chaque
+    ligne est son masque, sans conversion ligne par ligne, et le schéma
+    est le même pour tous les blocs (exports Parquet).
+
+    Args:
+        masks (np.ndarray): Masques de recommendation_masks
+
+    Returns:
+        pd.Categorical: Codes séparés par CODE_SEPARATOR
+    """
+    return pd.Categorical.from_codes(masks.astype(np.int16), categories=CODE_LABELS)
+
+def add_recommendations(results: pd.DataFrame, clients: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    Ajoute la colonne recommendations à des résultats de prédiction
+
+    Args:
+        results (pd.DataFrame): Résultats (colonne risk_level), ou bloc
+                                complet données + résultats
+        clients (pd.DataFrame): Données clients alignées (par défaut: results)
+
+    Returns:
+        pd.DataFrame: Copie de results avec la colonne recommendations
+    """
+    masks = recommendation_masks(results if clients is None else clients, results["risk_level"])
+    return results.assign(**{RECOMMENDATIONS_COLUMN: recommendation_codes(masks)})
+
+def rule_counts(masks: np.ndarray) -> np.ndarray:
+    """Nombre de lignes concernées par chaque règle (ordre de RULES)"""
+    return np.array([np.count_nonzero(masks & (1 << bit)) for bit in range(len(RULES))], dtype=np.int64)
+
+def recommend_client(client: Dict, risk_level: str) -> List[str]:
+    """
+    Recommandations d'un client (formulaire individuel)
+
+    Args:
+        client (Dict): Données du client
+        risk_level (str): Niveau de risque prédit
+
+    Returns:
+        List[str]: Recommandations, niveau de risque en tête
+    """
+    columns = {name: [value] for name, value in client.items()}
+    return mask_messages(int(recommendation_masks(columns, [risk_level])[0]))
@@ -0,0 +1,286 @@
+# ============================================================
+# CHURN-SCORE : SCORING BATCH EN LIGNE DE COMMANDE
+# ============================================================
+# Scoring d'un fichier client sans interface Streamlit, avec les
+# mêmes artefacts et le même cœur de prédiction que le dashboard
+# Usage:
+#   python churn_score.py clients.csv -o predictions.parquet
+#   cat clients.csv | python churn_score.py - --chunksize 50000 > out.csv
+#   python churn_score.py clients.jsonl -o out.jsonl --workers 4
+#   python churn_score.py snapshot.parquet -o predictions.parquet
+#   python churn_score.py clients.csv -o out.csv --memory-report --timings
+#   python churn_score.py clients.csv -o out.csv --recommendations
+#   python churn_score.py clients.csv -o out.csv --history churn_history.db
+#   python churn_score.py clients.csv -o out.csv --history --delta
+#   python churn_score.py clients.csv -o out.csv --explain 3
+# ============================================================
+
+# ============================================================
+# IMPORTATION DES BIBLIOTHÈQUES
+# ============================================================
+
+import argparse                           # Analyse des arguments
+import pandas as pd                       # Colonnes d'explication ajoutées aux blocs
+import sqlite3                            # Erreurs de la base d'historique
+import sys                                # Entrées/sorties standard
+import time                               # Mesure du débit
+try:
+    import resource                       # Pic de mémoire (Unix)
+except ImportError:
+    resource = None
+from typing import List, Optional
+
+from churn_cache import fingerprint_files
+from churn_core import (
+    FEATURES_PATH,
+    MODEL_PATH,
+    SCALER_PATH,
+    THRESHOLD,
+    FeatureEncoder,
+    build_results_frame,
+    load_artifacts,
+    predict_probabilities,
+)
+from churn_explain import DEFAULT_TOP_K, ContributionTotals, ForestExplainer, top_contributions
+from churn_forest import LAZY_COMPILED_MIN_ROWS
+from churn_history import DEFAULT_HISTORY_PATH, DEFAULT_KEEP_BATCHES, DeltaScorer, PredictionStore
+from churn_memo import MemoizedModel
+from churn_metrics import METRICS, format_summary
+from churn_parallel import ParallelScorer, usable_cpus
+from churn_recommendations import add_recommendations
+from churn_stream import (
+    DEFAULT_CHUNKSIZE,
+    ChunkWriter,
+    MemoryReport,
+    infer_output_format,
+    iter_chunks,
+    stream_scored,
+)
+
+# ============================================================
+# LIGNE DE COMMANDE
+# ============================================================
+
+def build_parser() -> argparse.ArgumentParser:
+    """Définition des arguments de churn-score"""
+    parser = argparse.ArgumentParser(
+        prog="churn_score.py",
+        description="Prédiction du churn d'un fichier client (CSV, TXT, JSON, JSON lines, Excel, Parquet, Feather)",
+    )
+    parser.add_argument("input", help="Fichier d'entrée, ou '-' pour l'entrée standard")
+    parser.add_argument("-o", "--output", default="-",
+                        help="Fichier de sortie (.csv, .jsonl, .parquet), '-' pour la sortie standard")
+    parser.add_argument("--input-format", choices=["csv", "txt", "json", "jsonl", "xlsx", "parquet", "feather"],
+                        help="Format d'entrée (déduit de l'extension par défaut, csv pour '-')")
+    parser.add_argument("--output-format", choices=["csv", "jsonl", "parquet"],
+                        help="Format de sortie (déduit de l'extension par défaut, csv pour '-')")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE,
+                        help=f"Lignes lues et prédites par bloc (défaut: {DEFAULT_CHUNKSIZE})")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Nombre de processus de calcul (défaut: 1)")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help=f"Seuil de décision (défaut: {THRESHOLD})")
+    parser.add_argument("--recommendations", action="store_true",
+                        help="Ajoute la colonne recommendations (codes des règles appliquées à chaque client)")
+    parser.add_argument("--history", nargs="?", const=DEFAULT_HISTORY_PATH, metavar="BASE",
+                        help=f"Ajoute les prédictions à la base d'historique SQLite (défaut: {DEFAULT_HISTORY_PATH})")
+    parser.add_argument("--keep-batches", type=int, default=DEFAULT_KEEP_BATCHES, metavar="N",
+                        help=f"Avec --history, batchs conservés par modèle, les plus anciens étant supprimés "
+                             f"(défaut: {DEFAULT_KEEP_BATCHES}, 0: tous)")
+    parser.add_argument("--delta", action="store_true",
+                        help="Ne reprédit que les clients nouveaux ou modifiés depuis le dernier batch "
+                             "de l'historique prédit avec les mêmes artefacts (colonne client_id)")
+    parser.add_argument("--explain", nargs="?", type=int, const=DEFAULT_TOP_K, metavar="K",
+                        help=f"Ajoute les K caractéristiques les plus influentes de chaque client "
+                             f"(défaut: {DEFAULT_TOP_K}) et affiche leur importance globale")
+    parser.add_argument("--memory-report", action="store_true",
+                        help="Affiche la mémoire par ligne (types compacts et par défaut) et le pic de mémoire")
+    parser.add_argument("--timings", action="store_true",
+                        help="Affiche le temps par étape (lecture, encodage, inférence, écriture)")
+    parser.add_argument("--metrics-file",
+                        help="Écrit les métriques au format texte Prometheus (ex: collecteur textfile)")
+    parser.add_argument("--model", default=MODEL_PATH, help="Chemin du modèle")
+    parser.add_argument("--scaler", default=SCALER_PATH, help="Chemin du scaler")
+    parser.add_argument("--features", default=FEATURES_PATH, help="Chemin de la liste des features")
+    parser.add_argument("--sklearn-fallback", action="store_true",
+                        help=f"Prédit les blocs d'au moins {LAZY_COMPILED_MIN_ROWS:,} lignes avec les arbres scikit-learn "
+                             "(modèle .pkl chargé dans chaque processus, utile au-delà de quelques "
+                             "centaines de milliers de lignes)")
+    return parser
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Point d'entrée de churn-score
+
+    Args:
+        argv (List[str]): Arguments (sys.argv[1:] par défaut)
+
+    Returns:
+        int: Code de sortie (0 = succès)
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.chunksize < 1 or args.workers < 1:
+        parser.error("--chunksize et --workers doivent être supérieurs ou égaux à 1")
+    if args.delta and args.workers > 1:
+        parser.error("--delta n'est disponible qu'avec un seul processus (--workers 1)")
+    if args.keep_batches < 0:
+        parser.error("--keep-batches doit être positif ou nul")
+    if args.explain is not None and args.explain < 1:
+        parser.error("--explain doit être supérieur ou égal à 1")
+
+    artifact_paths = [args.model, args.scaler, args.features]
+
+    # Pas plus de processus que de cœurs: sur un seul cœur, le pool ne fait que ralentir
+    workers = min(args.workers, usable_cpus())
+    if workers < args.workers:
+        print(f"churn-score: {usable_cpus()} cœur(s) disponible(s), {workers} processus utilisé(s)",
+              file=sys.stderr)
+
+    # Source: chemin, ou entrée standard (le nom sert à choisir le lecteur)
+    if args.input == "-":
+        source = sys.stdin.buffer
+        file_name = f"stdin.{args.input_format or 'csv'}"
+    else:
+        source = args.input
+        file_name = f"{args.input}.{args.input_format}" if args.input_format else args.input
+
+    # Destination: chemin, ou sortie standard
+    output_format = args.output_format or (
+        "csv" if args.output == "-" else infer_output_format(args.output)
+    )
+    if args.output == "-":
+        target = sys.stdout.buffer if output_format == "parquet" else sys.stdout
+    else:
+        target = args.output
+
+    def build_results(df, probabilities):
+        # Seuil et niveaux de risque (même étape que predict_dataframe)
+        with METRICS.stage("postprocess", len(df)):
+            return build_results_frame(probabilities, args.threshold, index=df.index)
+
+    start = time.perf_counter()
+    scorer = None
+    store = None
+    history_batch = None
+    delta = None
+    explainer = None
+    totals = ContributionTotals()
+    try:
+        artifacts_key = fingerprint_files(artifact_paths) if args.history or args.delta else ""
+        # Historique: base de référence du rescoring incrémental et/ou destination des prédictions
+        if args.history or args.delta:
+            store = PredictionStore(args.history or DEFAULT_HISTORY_PATH)
+
+        chunks = METRICS.timed_iter("parse", iter_chunks(source, file_name, chunksize=args.chunksize))
+
+        # Plusieurs processus: pool partagé (probabilités brutes remontées au parent);
+        # sinon prédiction dans ce processus
+        if workers > 1:
+            scorer = ParallelScorer(workers, *artifact_paths, threshold=args.threshold,
+                                    sklearn_fallback=args.sklearn_fallback)
+            scored_chunks = scorer.score_chunks(chunks, build_results)
+        else:
+            model, scaler, features = load_artifacts(*artifact_paths, sklearn_fallback=args.sklearn_fallback)
+            # Lignes identiques prédites une seule fois (dédoublonnage par bloc)
+            model = MemoizedModel(model)
+            encoder = FeatureEncoder(features, scaler=scaler)
+
+            def predict_proba(df):
+                return predict_probabilities(df, model, encoder)
+
+            if args.delta:
+                reference = store.find_reference_batch(artifacts_key)
+                if reference is None:
+                    print("churn-score: aucun batch de référence dans l'historique, scoring complet",
+                          file=sys.stderr)
+                else:
+                    delta = predict_proba = DeltaScorer(store.reference_results(reference), predict_proba, METRICS)
+            scored_chunks = stream_scored(chunks, predict_proba, build_results)
+        if args.explain is not None:
+            # Explications calculées dans ce processus (artefacts chargés ici avec plusieurs processus)
+            if scorer is not None:
+                model, scaler, features = load_artifacts(*artifact_paths)
+                encoder = FeatureEncoder(features, scaler=scaler)
+            explainer = ForestExplainer(model, encoder)
+
+        # Historique: un batch ouvert avant le premier bloc, clos après le dernier
+        if args.history:
+            history_batch = store.start_batch(args.input, args.threshold, artifacts_key)
+
+        memory = MemoryReport() if args.memory_report else None
+        with ChunkWriter(target, output_format) as writer:
+            for scored, probabilities in scored_chunks:
+                if args.recommendations:
+                    with METRICS.stage("recommend", len(scored)):
+                        scored = add_recommendations(scored)
+                if explainer is not None:
+                    contributions = explainer.explain(scored, METRICS)[1]
+                    totals.update(contributions)
+                    scored = pd.concat([scored, top_contributions(contributions, args.explain)], axis=1)
+                if memory is not None:
+                    memory.update(scored)
+                with METRICS.stage("write", len(scored)):
+                    writer.write(scored)
+                if history_batch is not None:
+                    with METRICS.stage("store", len(scored)):
+                        store.append(history_batch, scored, writer.rows - len(scored), probabilities)
+
+        if history_batch is not None:
+            store.finish_batch(history_batch)
+            history_batch = None
+            if args.keep_batches:
+                store.prune(args.keep_batches)
+
+    except (FileNotFoundError, ValueError, ImportError, sqlite3.Error) as e:
+        print(f"churn-score: erreur: {e}", file=sys.stderr)
+        return 1
+
+    finally:
+        # Batch non clos (erreur, Ctrl+C...): supprimé, jamais laissé avec une partie de ses lignes
+        try:
+            if history_batch is not None:
+                store.delete_batch(history_batch)
+        finally:
+            if scorer is not None:
+                scorer.close()
+            if store is not None:
+                store.close()
+
+    # Rapport de débit (sur la sortie d'erreur pour ne pas polluer stdout)
+    elapsed = time.perf_counter() - start
+    rate = writer.rows / elapsed if elapsed > 0 else float("inf")
+    print(f"churn-score: {writer.rows:,} lignes prédites en {elapsed:.2f} s "
+          f"({rate:,.0f} lignes/s, {workers} processus)", file=sys.stderr)
+    METRICS.log_summary("score", file=args.input, rows=writer.rows, workers=workers)
+    if args.timings:
+        # Avec plusieurs processus, l'encodage et l'inférence sont mesurés dans les workers (non remontés)
+        for line in format_summary(METRICS.summary()):
+            print(f"churn-score: {line}", file=sys.stderr)
+        if scorer is None:
+            memo = model.stats()
+            print(f"churn-score: lignes distinctes: {memo['unique_rows']:,} sur {memo['rows']:,} "
+                  f"({memo['saved_rate']:.1%} non reprédites)", file=sys.stderr)
+    if delta is not None:
+        stats = delta.stats()
+        print(f"churn-score: rescoring incrémental: {stats['reused_rows']:,} lignes reprises, "
+              f"{stats['scored_rows']:,} prédites", file=sys.stderr)
+    if explainer is not None:
+        print("churn-score: importance globale des caractéristiques (contribution moyenne absolue):",
+              file=sys.stderr)
+        for column, row in totals.to_frame().iterrows():
+            print(f"churn-score:   {column:<16} {row['mean_abs_contribution']:.4f} "
+                  f"(moyenne {row['mean_contribution']:+.4f})", file=sys.stderr)
+    if args.metrics_file:
+        with open(args.metrics_file, "w", encoding="utf-8") as f:
+            f.write(METRICS.to_prometheus())
+    if memory is not None:
+        print(f"churn-score: mémoire des blocs: {memory}", file=sys.stderr)
+        if resource is not None:
+            # ru_maxrss est en Ko sous Linux
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+            print(f"churn-score: pic de mémoire: {peak:,.0f} Mo", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1091 @@
+# ============================================================
+# SCORING BATCH PAR BLOCS (STREAMING)
+# ============================================================
+# Lecture par blocs des fichiers clients, prédiction bloc par
+# bloc et agrégation incrémentale des métriques et histogrammes
+# Description: La mémoire utilisée dépend de la taille des blocs
+#              et non plus de la taille du fichier
+# ============================================================
+
+# ============================================================
+# IMPORTATION DES BIBLIOTHÈQUES
+# ============================================================
+
+import numpy as np                        # Histogrammes et compteurs
+import pandas as pd                       # Lecture par blocs et résultats
+import csv                                # Détection du séparateur CSV
+import gzip                               # Export CSV compressé
+import os                                 # Chemins de fichiers
+import shutil                             # Copie par blocs d'octets
+from collections import defaultdict       # Types de lecture CSV des colonnes non requises
+from io import StringIO                   # Top clients relus depuis le JSON du cache
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from churn_core import RISK_LEVELS
+from churn_history import CLIENT_ID_COLUMNS
+from churn_metrics import MetricsRegistry
+from churn_recommendations import RECOMMENDATIONS_COLUMN, RULES, rule_counts
+from churn_tuning import LABEL_COLUMNS
+
+# ============================================================
+# PARAMÈTRES
+# ============================================================
+
+# Nombre de lignes lues et prédites à la fois
+DEFAULT_CHUNKSIZE = 100_000
+
+# Nombre de classes de l'histogramme des probabilités (sur [0, 1])
+HISTOGRAM_BINS = 30
+
+# Lignes mesurées à partir desquelles le rapport mémoire compare les
+# types compacts aux types par défaut (en dessous, l'écart n'a pas de sens)
+MEMORY_REPORT_MIN_ROWS = 1000
+
+# Pas de l'index des positions des lignes dans le fichier de résultats:
+# une page de résultats est lue sans reparcourir le début du fichier
+RESULTS_INDEX_ROWS = 10_000
+
+# Types compacts des colonnes requises (lecture CSV typée, conversion
+# des autres formats): entiers courts, catégorie pour le contrat. Les
+# montants restent en float64: un float32 arrondirait 75.35 avant la
+# standardisation et changerait certaines prédictions
+INPUT_DTYPES = {
+    "age": "int16",
+    "tenure_months": "int16",
+    "monthly_charges": "float64",
+    "data_usage_gb": "float64",
+    "voice_minutes": "int32",
+    "support_calls": "int16",
+    "network_quality": "int8",
+    "payment_delay": "int16",
+    "auto_payment": "int8",
+    "contract_type": "category",
+}
+
+# Types de lecture CSV: les entiers sont lus en float64 (valeurs "25.0"
+# des exports Excel, valeurs hors de l'intervalle du type compact), puis
+# compactés par compact_frame quand c'est sans perte
+CSV_READ_DTYPES = {
+    name: "float64" if dtype.startswith("int") else dtype
+    for name, dtype in INPUT_DTYPES.items()
+}
+
+# Types de relecture des fichiers de résultats sans schéma enregistré
+# (BatchSummary.dtypes): colonnes numériques requises, probabilité et
+# prédiction; les autres colonnes sont relues en texte
+RESULT_READ_DTYPES = {
+    **{name: dtype for name, dtype in CSV_READ_DTYPES.items() if dtype != "category"},
+    "churn_probability": "float64",
+    "churn_prediction": "int8",
+}
+
+# Séparateurs reconnus et taille de l'échantillon analysé (début du fichier)
+CSV_DELIMITERS = ",;\t|"
+SNIFF_BYTES = 1024
+
+# Taille des blocs d'octets parsés par Arrow (les blocs plus grands
+# sortent du cache processeur et ralentissent la conversion), regroupés
+# ensuite en blocs de chunksize lignes
+CSV_BLOCK_BYTES = 1024 * 1024
+
+# Formats colonnes Arrow lus en entrée, par extension de fichier
+COLUMNAR_FORMATS = {
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".feather": "arrow",
+    ".arrow": "arrow",
+    ".ipc": "arrow",
+}
+
+# Formats de sortie écrits bloc par bloc, par extension de fichier
+OUTPUT_FORMATS = {
+    ".csv": "csv",
+    ".txt": "csv",
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+    ".parquet": "parquet",
+    ".pq": "parquet",
+}
+
+# ============================================================
+# LECTURE PAR BLOCS
+# ============================================================
+
+def iter_chunks(source, file_name: str,
+                chunksize: int = DEFAULT_CHUNKSIZE,
+                columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+    """
+    Lit un fichier client bloc par bloc
+
+    CSV/TXT, JSON lines, Parquet et Arrow IPC (Feather) sont réellement
+    lus par blocs. Excel et JSON (tableau) ne se lisent qu'en entier:
+    le DataFrame est alors découpé en blocs pour garder le même
+    pipeline en aval. Les nombres JSON sont décodés avec precise_float
+    pour donner les mêmes valeurs qu'en CSV.
+
+    Les CSV sont lus avec des types explicites (CSV_READ_DTYPES) et le
+    séparateur détecté sur le premier Ko (virgule, point-virgule,
+    tabulation ou barre verticale). Les colonnes requises de tous les
+    formats sont converties dans les types compacts (INPUT_DTYPES)
+    quand c'est sans perte.
+
+    Comme en CSV, toutes les colonnes du fichier sont gardées par
+    défaut (identifiants, étiquettes, colonnes métier). Avec columns,
+    Parquet et Arrow ne décodent que ces colonnes, plus l'identifiant
+    client (CLIENT_ID_COLUMNS) et l'étiquette (LABEL_COLUMNS) quand le
+    fichier les contient: les autres colonnes ne sont jamais lues.
+
+    Args:
+        source: Chemin ou objet fichier (ex: fichier uploadé Streamlit)
+        file_name (str): Nom du fichier, utilisé pour détecter le format
+        chunksize (int): Nombre de lignes par bloc
+        columns (List[str]): Colonnes lues en Parquet/Arrow (toutes par défaut)
+
+    Yields:
+        pd.DataFrame: Blocs successifs, index continu sur tout le fichier
+
+    Raises:
+        ValueError: Si le format du fichier n'est pas supporté
+    """
+    name = file_name.lower()
+
+    if name.endswith((".csv", ".txt")):
+        yield from _iter_csv_chunks(source, chunksize)
+
+    elif name.endswith((".jsonl", ".ndjson")):
+        with pd.read_json(source, lines=True, chunksize=chunksize,
+                          precise_float=True) as reader:
+            for chunk in reader:
+                yield compact_frame(chunk)
+
+    elif name.endswith(".json"):
+        yield from _split(compact_frame(pd.read_json(source, precise_float=True)), chunksize)
+
+    elif name.endswith(".xlsx"):
+        yield from _split(compact_frame(pd.read_excel(source)), chunksize)
+
+    elif os.path.splitext(name)[1] in COLUMNAR_FORMATS:
+        fmt = COLUMNAR_FORMATS[os.path.splitext(name)[1]]
+        yield from _iter_columnar_chunks(source, fmt, chunksize, columns)
+
+    else:
+        raise ValueError(f"Format de fichier non supporté: {file_name}")
+
+def _iter_csv_chunks(source, chunksize: int) -> Iterator[pd.DataFrame]:
+    """
+    Lecture CSV typée par blocs (parseur Arrow)
+
+    Le début du fichier est lu une seule fois pour détecter le
+    séparateur et les noms de colonnes, puis le fichier est parsé en
+    une seule passe: colonnes requises selon CSV_READ_DTYPES, autres
+    colonnes (identifiant, étiquette, colonnes métier) en texte. Un
+    type déduit du premier bloc casserait la lecture dès qu'une valeur
+    plus loin ne s'y conforme pas (ex: identifiant "C-999" après des
+    identifiants numériques). Sans pyarrow, pandas lit le fichier avec
+    le même séparateur et les mêmes types (lecteur fermé explicitement,
+    sinon pandas ferme aussi le fichier source si le générateur est
+    abandonné).
+
+    Raises:
+        ValueError: Si une valeur ne correspond pas au type de sa colonne
+    """
+    delimiter = sniff_delimiter(_peek(source, SNIFF_BYTES))
+
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pa_csv
+    except ImportError:
+        dtypes = defaultdict(lambda: str, CSV_READ_DTYPES)
+        with pd.read_csv(source, sep=delimiter, dtype=dtypes, chunksize=chunksize) as reader:
+            for chunk in reader:
+                yield compact_frame(chunk)
+        return
+
+    column_types = {name: pa.string() for name in _header_names(source, delimiter)}
+    column_types.update({
+        name: (pa.dictionary(pa.int32(), pa.string()) if dtype == "category"
+               else pa.from_numpy_dtype(np.dtype(dtype)))
+        for name, dtype in CSV_READ_DTYPES.items()
+    })
+
+    # Un flux est lu par ses propres read(): sa position suit la lecture
+    # (barre de progression du dashboard)
+    data = str(source) if isinstance(source, (str, os.PathLike)) else source
+
+    try:
+        reader = pa_csv.open_csv(
+            data,
+            read_options=pa_csv.ReadOptions(block_size=CSV_BLOCK_BYTES),
+            parse_options=pa_csv.ParseOptions(delimiter=delimiter),
+            # Texte vide ou "NA" manquant, comme pd.read_csv
+            convert_options=pa_csv.ConvertOptions(column_types=column_types, strings_can_be_null=True),
+        )
+        for chunk in _iter_frames(_regroup(reader, chunksize)):
+            yield compact_frame(chunk)
+    except pa.ArrowInvalid as e:
+        raise ValueError(f"Lecture CSV impossible: {e}") from e
+
+def sniff_delimiter(sample: bytes) -> str:
+    """
+    Séparateur d'un CSV détecté sur un échantillon de son début
+
+    Args:
+        sample (bytes): Premiers octets du fichier (SNIFF_BYTES)
+
+    Returns:
+        str: Séparateur parmi CSV_DELIMITERS (',' si indécidable)
+    """
+    text = sample.decode("utf-8-sig", errors="ignore")
+    lines = text.splitlines()
+    if len(lines) > 1 and not text.endswith(("\n", "\r")):
+        # Dernière ligne tronquée par la taille de l'échantillon
+        lines = lines[:-1]
+    try:
+        return csv.Sniffer().sniff("\n".join(lines), delimiters=CSV_DELIMITERS).delimiter
+    except csv.Error:
+        return ","
+
+def _header_names(source, delimiter: str) -> List[str]:
+    """
+    Noms de colonnes d'un CSV, lus sur sa première ligne
+
+    L'échantillon lu double tant que la ligne d'en-tête n'est pas
+    complète (au plus CSV_BLOCK_BYTES).
+
+    Args:
+        source: Chemin ou flux (position inchangée)
+        delimiter (str): Séparateur (sniff_delimiter)
+
+    Returns:
+        List[str]: Noms des colonnes, dans l'ordre du fichier
+    """
+    size = SNIFF_BYTES
+    sample = _peek(source, size)
+    while b"\n" not in sample and len(sample) == size and size < CSV_BLOCK_BYTES:
+        size *= 2
+        sample = _peek(source, size)
+    header = sample.decode("utf-8-sig", errors="ignore").splitlines()[:1]
+    return next(csv.reader(header, delimiter=delimiter), [])
+
+def _peek(source, size: int) -> bytes:
+    """Premiers octets d'un chemin ou d'un flux, sans avancer sa position"""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            return f.read(size)
+    if hasattr(source, "peek"):
+        # Flux non rembobinable (ex: entrée standard): lecture dans le tampon
+        return source.peek(size)[:size]
+    position = source.tell()
+    sample = source.read(size)
+    source.seek(position)
+    return sample
+
+def _iter_columnar_chunks(source, fmt: str, chunksize: int,
+                          columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+    """
+    Lecture Parquet / Arrow IPC par blocs, éventuellement limitée à des colonnes
+
+    Un chemin est projeté en mémoire (memory map) et un fichier uploadé
+    est lu depuis son tampon, sans copie. Les colonnes demandées
+    absentes du fichier sont ignorées, comme pour les autres formats
+    (valeur 0 à l'encodage).
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.ipc as ipc
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("La lecture Parquet/Arrow nécessite pyarrow (pip install pyarrow)") from e
+
+    if isinstance(source, (str, os.PathLike)):
+        data = pa.memory_map(str(source))
+    elif hasattr(source, "getbuffer"):
+        data = pa.BufferReader(pa.py_buffer(source.getbuffer()))
+    else:
+        # Flux non rembobinable (ex: entrée standard): lu en entier
+        data = pa.BufferReader(pa.py_buffer(source.read()))
+
+    if fmt == "parquet":
+        parquet_file = pq.ParquetFile(data)
+        selected = projected_columns(parquet_file.schema_arrow.names, columns)
+        batches = parquet_file.iter_batches(batch_size=chunksize, columns=selected)
+    else:
+        try:
+            reader = ipc.open_file(data)
+            batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+        except pa.ArrowInvalid:
+            # Format flux IPC (sans pied de page)
+            data.seek(0)
+            batches = ipc.open_stream(data)
+        batches = _select_columns(_rebatch(batches, chunksize), columns)
+
+    for chunk in _iter_frames(batches):
+        yield compact_frame(chunk)
+
+def _iter_frames(batches: Iterable) -> Iterator[pd.DataFrame]:
+    """Convertit des blocs Arrow en DataFrames, index continu sur tout le fichier"""
+    start = 0
+    for batch in batches:
+        chunk = batch.to_pandas(split_blocks=True)
+        chunk.index = pd.RangeIndex(start, start + len(chunk))
+        start += len(chunk)
+        yield chunk
+
+def _rebatch(batches: Iterable, chunksize: int) -> Iterator:
+    """Redécoupe des RecordBatch Arrow en tranches de chunksize lignes (sans copie)"""
+    for batch in batches:
+        for offset in range(0, batch.num_rows, chunksize):
+            yield batch.slice(offset, chunksize)
+
+def _regroup(batches: Iterable, chunksize: int) -> Iterator:
+    """Regroupe des RecordBatch Arrow en tables de chunksize lignes (la dernière peut être plus courte)"""
+    import pyarrow as pa
+
+    pending, rows = [], 0
+    for batch in batches:
+        pending.append(batch)
+        rows += batch.num_rows
+        while rows >= chunksize:
+            table = pa.Table.from_batches(pending)
+            yield table.slice(0, chunksize)
+            pending = table.slice(chunksize).to_batches()
+            rows -= chunksize
+    if rows:
+        yield pa.Table.from_batches(pending)
+
+def projected_columns(names: List[str], columns: Optional[List[str]] = None) -> List[str]:
+    """
+    Colonnes d'un fichier colonnes gardées à la lecture
+
+    Args:
+        names (List[str]): Colonnes du fichier (schéma)
+        columns (List[str]): Colonnes demandées (None: toutes)
+
+    Returns:
+        List[str]: Colonnes du fichier, dans son ordre: toutes, ou les colonnes
+                   demandées plus l'identifiant client et l'étiquette présents
+    """
+    if columns is None:
+        return list(names)
+    kept = set(columns) | set(CLIENT_ID_COLUMNS) | set(LABEL_COLUMNS)
+    return [name for name in names if name in kept]
+
+def _select_columns(batches: Iterable, columns: Optional[List[str]]) -> Iterator:
+    """Garde les colonnes projetées de chaque RecordBatch (voir projected_columns)"""
+    for batch in batches:
+        yield batch if columns is None else batch.select(projected_columns(batch.schema.names, columns))
+
+def _split(df: pd.DataFrame, chunksize: int) -> Iterator[pd.DataFrame]:
+    """Découpe un DataFrame déjà chargé en blocs de chunksize lignes"""
+    for start in range(0, len(df), chunksize):
+        yield df.iloc[start:start + chunksize]
+
+# ============================================================
+# TYPES COMPACTS
+# ============================================================
+
+def compact_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convertit les colonnes requises dans leurs types compacts (INPUT_DTYPES)
+
+    Seules les conversions sans perte sont faites: une colonne dont une
+    valeur sort de l'intervalle du type cible, ou une colonne flottante
+    avec des valeurs manquantes ou décimales, est laissée telle quelle
+    (une colonne flottante aux valeurs entières, ex: "25.0", est
+    compactée). Les autres colonnes ne changent pas.
+
+    Args:
+        df (pd.DataFrame): Bloc lu (JSON, Excel, Parquet...)
+
+    Returns:
+        pd.DataFrame: Bloc aux colonnes requises compactées
+    """
+    changes = {}
+    for name, dtype in INPUT_DTYPES.items():
+        if name not in df.columns:
+            continue
+        series = df[name]
+        if dtype == "category":
+            if not isinstance(series.dtype, pd.CategoricalDtype) and series.dtype.kind in "OUT":
+                changes[name] = series.astype("category")
+            continue
+        target = np.dtype(dtype)
+        if not isinstance(series.dtype, np.dtype) or series.dtype == target or target.kind != "i":
+            continue
+        values = series.to_numpy()
+        info = np.iinfo(target)
+        if series.dtype.kind == "f" and not (np.isfinite(values).all() and (values == np.trunc(values)).all()):
+            continue
+        if series.dtype.kind in "iuf" and (len(values) == 0 or (info.min <= values.min() and values.max() <= info.max)):
+            changes[name] = series.astype(target)
+    return df.assign(**changes) if changes else df
+
+class MemoryReport:
+    """
+    Mémoire occupée par ligne, en types compacts et en types par défaut
+
+    Les types par défaut sont ceux qu'infère pandas sans schéma:
+    entiers et flottants sur 64 bits, texte pour les catégories. Une
+    catégorie ne compte que ses codes: sa table de modalités, fixe par
+    bloc (jusqu'à 512 combinaisons de recommandations), ne grandit pas
+    avec le nombre de lignes.
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.compact_bytes = 0
+        self.default_bytes = 0
+
+    def update(self, df: pd.DataFrame) -> None:
+        """
+        Intègre un bloc (données d'entrée et/ou prédictions)
+
+        Args:
+            df (pd.DataFrame): Bloc à mesurer
+        """
+        self.rows += len(df)
+        for _, series in df.items():
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                compact = series.cat.codes.nbytes
+                default = int(series.astype(series.cat.categories.dtype)
+                              .memory_usage(deep=True, index=False))
+            elif isinstance(series.dtype, np.dtype) and series.dtype.kind in "iuf":
+                compact = series.nbytes
+                default = 8 * len(series)
+            else:
+                compact = default = int(series.memory_usage(deep=True, index=False))
+            self.compact_bytes += compact
+            self.default_bytes += default
+
+    @property
+    def bytes_per_row(self) -> float:
+        """Octets par ligne avec les types compacts"""
+        return self.compact_bytes / self.rows if self.rows else 0.0
+
+    @property
+    def default_bytes_per_row(self) -> float:
+        """Octets par ligne avec les types par défaut"""
+        return self.default_bytes / self.rows if self.rows else 0.0
+
+    def __str__(self) -> str:
+        if self.rows < MEMORY_REPORT_MIN_ROWS or not self.compact_bytes:
+            return f"{self.bytes_per_row:,.0f} octets/ligne ({self.rows:,} lignes, trop peu pour comparer)"
+        ratio = self.default_bytes / self.compact_bytes
+        return (f"{self.bytes_per_row:,.0f} octets/ligne "
+                f"(types par défaut: {self.default_bytes_per_row:,.0f}, x{ratio:.1f})")
+
+# ============================================================
+# AGRÉGATION INCRÉMENTALE
+# ============================================================
+
+class BatchSummary:
+    """
+    Agrégats d'un scoring batch, mis à jour bloc par bloc
+
+    Conserve uniquement des compteurs, un histogramme à classes fixes,
+    les statistiques descriptives des colonnes numériques et les top_k
+    clients les plus à risque: jamais le fichier complet.
+    """
+
+    def __init__(self, top_k: int = 10, bins: int = HISTOGRAM_BINS):
+        """
+        Args:
+            top_k (int): Nombre de clients à plus haut risque conservés
+            bins (int): Nombre de classes de l'histogramme des probabilités
+        """
+        self.top_k = top_k
+        self.total = 0
+        self.churn_count = 0
+        self.probability_sum = 0.0
+        self.risk_counts = np.zeros(len(RISK_LEVELS), dtype=np.int64)
+        # Clients concernés par chaque règle de recommandation (si la colonne est présente)
+        self.recommendation_counts = np.zeros(len(RULES), dtype=np.int64)
+        self.bin_edges = np.linspace(0.0, 1.0, bins + 1)
+        self.histogram = np.zeros(bins, dtype=np.int64)
+        self.top_risk: Optional[pd.DataFrame] = None
+        self.columns: Optional[List[str]] = None
+        # Types de relecture du fichier de résultats, communs à tous les blocs (read_dtypes)
+        self.dtypes: Dict[str, str] = {}
+        self.memory = MemoryReport()
+        # Temps par étape du traitement et pic de mémoire (renseignés par l'appelant)
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.peak_memory_bytes: Optional[int] = None
+        # Position (octets) des lignes 0, RESULTS_INDEX_ROWS, 2 × RESULTS_INDEX_ROWS...
+        # du fichier de résultats (renseignée par write_indexed_csv)
+        self.row_offsets: List[int] = []
+        # Lignes reprises d'un batch passé (rescoring incrémental, renseigné par l'appelant)
+        self.reused_rows = 0
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    def update(self, scored: pd.DataFrame) -> None:
+        """
+        Intègre un bloc de résultats (données d'origine + prédictions)
+
+        Args:
+            scored (pd.DataFrame): Bloc avec les colonnes churn_probability,
+                                   churn_prediction et risk_level
+        """
+        if self.columns is None:
+            self.columns = list(scored.columns)
+        self.dtypes = merge_read_dtypes(self.dtypes, read_dtypes(scored))
+
+        proba = scored["churn_probability"].to_numpy(dtype=np.float64)
+        self.total += len(scored)
+        self.memory.update(scored)
+        self.churn_count += int(scored["churn_prediction"].sum())
+        self.probability_sum += float(proba.sum())
+        self.risk_counts += np.bincount(
+            scored["risk_level"].cat.codes.to_numpy(), minlength=len(RISK_LEVELS)
+        )
+        self.histogram += np.histogram(proba, bins=self.bin_edges)[0]
+        if RECOMMENDATIONS_COLUMN in scored:
+            # Les codes de la colonne catégorielle sont les masques de recommandations
+            self.recommendation_counts += rule_counts(scored[RECOMMENDATIONS_COLUMN].cat.codes.to_numpy())
+
+        # Top clients: nlargest sur (top courant + bloc) reste exact
+        candidates = scored.nlargest(self.top_k, "churn_probability")
+        if self.top_risk is not None:
+            candidates = pd.concat([self.top_risk, candidates])
+        self.top_risk = candidates.nlargest(self.top_k, "churn_probability")
+
+        # Statistiques descriptives des colonnes d'entrée numériques
+        inputs = scored.drop(columns=["churn_probability", "churn_prediction"])
+        for column in inputs.select_dtypes(include="number").columns:
+            self._update_stats(column, inputs[column].to_numpy(dtype=np.float64))
+
+    def _update_stats(self, column: str, values: np.ndarray) -> None:
+        """Fusion des moyennes/variances par blocs (méthode de Chan)"""
+        values = values[~np.isnan(values)]
+        n = len(values)
+        if n == 0:
+            return
+        mean = float(values.mean())
+        m2 = float(((values - mean) ** 2).sum())
+        stats = self._stats.get(column)
+        if stats is None:
+            self._stats[column] = {"count": n, "mean": mean, "m2": m2,
+                                   "min": float(values.min()), "max": float(values.max())}
+            return
+        total = stats["count"] + n
+        delta = mean - stats["mean"]
+        stats["m2"] += m2 + delta ** 2 * stats["count"] * n / total
+        stats["mean"] += delta * n / total
+        stats["count"] = total
+        stats["min"] = min(stats["min"], float(values.min()))
+        stats["max"] = max(stats["max"], float(values.max()))
+
+    @property
+    def churn_rate(self) -> float:
+        """Part des clients prédits comme partants (0-1)"""
+        return self.churn_count / self.total if self.total else 0.0
+
+    @property
+    def mean_probability(self) -> float:
+        """Probabilité de churn moyenne"""
+        return self.probability_sum / self.total if self.total else 0.0
+
+    def risk_counts_series(self) -> pd.Series:
+        """Nombre de clients par niveau de risque (niveaux vides exclus)"""
+        counts = pd.Series(self.risk_counts, index=RISK_LEVELS)
+        return counts[counts > 0].sort_values(ascending=False)
+
+    def recommendation_frame(self) -> pd.DataFrame:
+        """Clients et part du batch concernés par chaque règle de recommandation"""
+        return pd.DataFrame({
+            "code": [rule.code for rule in RULES],
+            "label": [rule.label for rule in RULES],
+            "count": self.recommendation_counts,
+            "share": self.recommendation_counts / self.total if self.total else 0.0,
+        })
+
+    def histogram_frame(self) -> pd.DataFrame:
+        """Histogramme des probabilités: centre, bornes et effectif de chaque classe"""
+        return pd.DataFrame({
+            "bin_start": self.bin_edges[:-1],
+            "bin_end": self.bin_edges[1:],
+            "bin_center": (self.bin_edges[:-1] + self.bin_edges[1:]) / 2,
+            "count": self.histogram,
+        })
+
+    def describe(self) -> pd.DataFrame:
+        """
+        Statistiques descriptives des colonnes numériques d'entrée
+
+        Returns:
+            pd.DataFrame: count, mean, std, min, max par colonne (comme df.describe)
+        """
+        rows = {}
+        for column, stats in self._stats.items():
+            count = stats["count"]
+            rows[column] = {
+                "count": count,
+                "mean": stats["mean"],
+                "std": np.sqrt(stats["m2"] / (count - 1)) if count > 1 else np.nan,
+                "min": stats["min"],
+                "max": stats["max"],
+            }
+        return pd.DataFrame(rows)
+
+    def to_dict(self) -> Dict:
+        """
+        Agrégats en types JSON (enregistrement dans le cache des résultats)
+
+        Les tableaux NumPy deviennent des listes, le rapport mémoire un
+        dictionnaire et les top clients un tableau JSON avec son schéma
+        (types des colonnes, catégories). Rien n'est dépicklé à la
+        relecture (from_dict).
+
+        Returns:
+            Dict: Attributs du résumé
+        """
+        state = {}
+        for name, value in vars(self).items():
+            if isinstance(value, np.ndarray):
+                value = value.tolist()
+            elif isinstance(value, MemoryReport):
+                value = dict(vars(value))
+            elif isinstance(value, pd.DataFrame):
+                value = {
+                    "table": value.to_json(orient="table", double_precision=15),
+                    "dtypes": {column: str(dtype) for column, dtype in value.dtypes.items()
+                               if isinstance(dtype, np.dtype) and dtype.kind in "biuf"},
+                }
+            state[name] = value
+        return state
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> "BatchSummary":
+        """
+        Résumé relu depuis to_dict()
+
+        Args:
+            state (Dict): Attributs enregistrés
+
+        Returns:
+            BatchSummary: Résumé identique à celui enregistré
+        """
+        summary = cls(top_k=state.get("top_k", 10), bins=len(state.get("histogram", [])) or HISTOGRAM_BINS)
+        for name, value in state.items():
+            current = getattr(summary, name, None)
+            if isinstance(current, np.ndarray):
+                value = np.asarray(value, dtype=current.dtype)
+            elif isinstance(current, MemoryReport):
+                report = MemoryReport()
+                vars(report).update(value)
+                value = report
+            elif name == "top_risk" and value is not None:
+                value = pd.read_json(StringIO(value["table"]), orient="table").astype(value["dtypes"])
+            setattr(summary, name, value)
+        return summary
+
+# ============================================================
+# PIPELINE DE SCORING
+# ============================================================
+
+def stream_scored(chunks: Iterable[pd.DataFrame],
+                  predict_proba: Callable[[pd.DataFrame], np.ndarray],
+                  build_results: Callable[[pd.DataFrame, np.ndarray], pd.DataFrame],
+                  summary: BatchSummary = None,
+                  metrics: Optional[MetricsRegistry] = None) -> Iterator[Tuple[pd.DataFrame, np.ndarray]]:
+    """
+    Prédit chaque bloc et le fusionne avec ses données d'origine
+
+    Les probabilités brutes de chaque bloc sont aussi renvoyées: les
+    probabilités non arrondies servent à l'historique (rescoring
+    incrémental) et au réglage du seuil (churn_tuning).
+
+    Args:
+        chunks (Iterable[pd.DataFrame]): Blocs de données clients
+        predict_proba (Callable): Fonction DataFrame → probabilités de churn brutes
+        build_results (Callable): Fonction (DataFrame, probabilités) → résultats alignés sur l'index
+        summary (BatchSummary): Agrégats mis à jour à chaque bloc (optionnel)
+        metrics (MetricsRegistry): Registre où chronométrer l'agrégation (optionnel)
+
+    Yields:
+        Tuple[pd.DataFrame, np.ndarray]: Bloc complété des colonnes de prédiction
+                                         et probabilités brutes de ses lignes
+    """
+    for chunk in chunks:
+        probabilities = predict_proba(chunk)
+        scored = pd.concat([chunk, build_results(chunk, probabilities)], axis=1)
+        if summary is not None:
+            if metrics is None:
+                summary.update(scored)
+            else:
+                with metrics.stage("aggregate", len(scored)):
+                    summary.update(scored)
+        yield scored, probabilities
+
+def read_dtypes(df: pd.DataFrame) -> Dict[str, str]:
+    """
+    Types de relecture CSV des colonnes d'un bloc
+
+    Les types numériques et booléens (NumPy ou nullables) sont gardés;
+    les autres colonnes (texte, catégories, dates) sont relues en texte.
+    Une catégorie relue bloc par bloc n'aurait pas les mêmes modalités
+    d'un bloc à l'autre.
+
+    Args:
+        df (pd.DataFrame): Bloc de résultats
+
+    Returns:
+        Dict[str, str]: Type pandas de chaque colonne
+    """
+    dtypes = {}
+    for name, dtype in df.dtypes.items():
+        if not isinstance(dtype, pd.CategoricalDtype) and (
+                pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_numeric_dtype(dtype)):
+            dtypes[name] = str(dtype)
+        else:
+            dtypes[name] = "str"
+    return dtypes
+
+def merge_read_dtypes(current: Dict[str, str], new: Dict[str, str]) -> Dict[str, str]:
+    """
+    Types de relecture communs à deux séries de blocs
+
+    Deux types numériques NumPy différents sont élargis au type qui
+    contient les deux (ex: int16 et float64 → float64); tout autre
+    désaccord donne du texte.
+
+    Args:
+        current (Dict[str, str]): Types des blocs déjà écrits
+        new (Dict[str, str]): Types du bloc suivant
+
+    Returns:
+        Dict[str, str]: Types valables pour tous les blocs
+    """
+    merged = dict(current)
+    for name, dtype in new.items():
+        previous = merged.setdefault(name, dtype)
+        if previous == dtype:
+            continue
+        try:
+            kinds = np.dtype(previous).kind + np.dtype(dtype).kind
+        except TypeError:
+            kinds = ""
+        merged[name] = (str(np.promote_types(previous, dtype))
+                        if kinds and set(kinds) <= set("iuf") else "str")
+    return merged
+
+def iter_spooled(path: str, chunksize: int = DEFAULT_CHUNKSIZE,
+                 dtypes: Optional[Dict[str, str]] = None) -> Iterator[pd.DataFrame]:
+    """
+    Relit par blocs un fichier de résultats écrit sur disque (CSV)
+
+    Tous les blocs sont relus avec les mêmes types: ceux enregistrés à
+    l'écriture (BatchSummary.dtypes), sinon RESULT_READ_DTYPES. Les
+    colonnes sans type sont relues en texte: un identifiant "007" garde
+    ses zéros et un type n'est jamais déduit d'un seul bloc (l'export
+    Parquet exige le même schéma pour tous les blocs).
+
+    Args:
+        path (str): Fichier CSV de résultats
+        chunksize (int): Nombre de lignes par bloc
+        dtypes (Dict[str, str]): Types des colonnes (BatchSummary.dtypes)
+
+    Yields:
+        pd.DataFrame: Blocs de résultats
+    """
+    with pd.read_csv(path, chunksize=chunksize, dtype=_result_dtypes(dtypes)) as reader:
+        yield from reader
+
+def _result_dtypes(dtypes: Optional[Dict[str, str]]) -> defaultdict:
+    """Types de relecture d'un fichier de résultats, texte par défaut"""
+    return defaultdict(lambda: str, RESULT_READ_DTYPES if not dtypes else dtypes)
+
+def read_results_page(path: str, start: int, nrows: int,
+                      columns: Optional[List[str]] = None,
+                      row_offsets: Optional[List[int]] = None,
+                      dtypes: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+    """
+    Lit une page d'un fichier de résultats CSV
+
+    Avec l'index des positions (write_indexed_csv), la lecture commence
+    à la ligne indexée qui précède la page: au plus RESULTS_INDEX_ROWS
+    lignes sont sautées, quelle que soit la taille du fichier. Sans
+    index, le début du fichier est reparcouru.
+
+    Args:
+        path (str): Fichier CSV de résultats
+        start (int): Première ligne de la page (0 = première ligne de données)
+        nrows (int): Nombre de lignes de la page
+        columns (List[str]): Colonnes du fichier (requises avec row_offsets)
+        row_offsets (List[int]): Index des positions (BatchSummary.row_offsets)
+        dtypes (Dict[str, str]): Types des colonnes (BatchSummary.dtypes, voir iter_spooled)
+
+    Returns:
+        pd.DataFrame: Lignes de la page, indexées par leur numéro dans le fichier
+    """
+    block = start // RESULTS_INDEX_ROWS
+    if row_offsets and columns and block < len(row_offsets):
+        with open(path, "rb") as f:
+            f.seek(row_offsets[block])
+            page = pd.read_csv(f, header=None, names=columns, dtype=_result_dtypes(dtypes),
+                               skiprows=start - block * RESULTS_INDEX_ROWS, nrows=nrows)
+    else:
+        page = pd.read_csv(path, skiprows=range(1, start + 1), nrows=nrows, dtype=_result_dtypes(dtypes))
+    page.index = pd.RangeIndex(start, start + len(page))
+    return page
+
+# ============================================================
+# ÉCRITURE PAR BLOCS
+# ============================================================
+
+def write_indexed_csv(chunk: pd.DataFrame, f, row_offsets: List[int], first_row: int) -> None:
+    """
+    Écrit un bloc de résultats CSV en notant la position des lignes indexées
+
+    L'en-tête est écrit avant le premier bloc (first_row == 0); la
+    position de chaque ligne multiple de RESULTS_INDEX_ROWS est ajoutée
+    à row_offsets (voir read_results_page).
+
+    Args:
+        chunk (pd.DataFrame): Bloc de résultats
+        f: Fichier texte ouvert en écriture
+        row_offsets (List[int]): Index des positions, complété sur place
+        first_row (int): Numéro de la première ligne du bloc dans le fichier
+    """
+    if first_row == 0:
+        chunk.head(0).to_csv(f, index=False)
+    bounds = sorted({0, len(chunk), *range(-first_row % RESULTS_INDEX_ROWS, len(chunk), RESULTS_INDEX_ROWS)})
+    for begin, end in zip(bounds, bounds[1:]):
+        if (first_row + begin) % RESULTS_INDEX_ROWS == 0:
+            row_offsets.append(f.tell())
+        chunk.iloc[begin:end].to_csv(f, index=False, header=False)
+
+def infer_output_format(path: str, default: str = "csv") -> str:
+    """
+    Déduit le format de sortie de l'extension du fichier
+
+    Args:
+        path (str): Chemin du fichier de sortie
+        default (str): Format retenu si l'extension est inconnue
+
+    Returns:
+        str: 'csv', 'jsonl' ou 'parquet'
+    """
+    return OUTPUT_FORMATS.get(os.path.splitext(str(path))[1].lower(), default)
+
+class ChunkWriter:
+    """
+    Écrit des blocs de résultats dans un fichier CSV, JSON lines ou Parquet
+
+    L'en-tête (CSV) ou le schéma (Parquet) est fixé par le premier bloc;
+    aucun bloc n'est conservé après écriture.
+    """
+
+    def __init__(self, target, fmt: str = "csv"):
+        """
+        Args:
+            target: Chemin du fichier ou flux ouvert (ex: sys.stdout)
+            fmt (str): Format de sortie ('csv', 'jsonl' ou 'parquet')
+
+        Raises:
+            ValueError: Si le format n'est pas supporté
+        """
+        if fmt not in set(OUTPUT_FORMATS.values()):
+            raise ValueError(f"Format de sortie non supporté: {fmt}")
+        self.fmt = fmt
+        self.rows = 0
+        self._parquet_writer = None
+
+        # Les chemins sont ouverts (et fermés) par l'écrivain, pas les flux
+        self._owns_handle = isinstance(target, (str, os.PathLike))
+        if self._owns_handle and fmt != "parquet":
+            self._handle = open(target, "w", encoding="utf-8", newline="")
+        else:
+            self._handle = target
+
+    def write(self, chunk: pd.DataFrame) -> None:
+        """
+        Ajoute un bloc à la sortie
+
+        Args:
+            chunk (pd.DataFrame): Bloc de résultats
+        """
+        if self.fmt == "csv":
+            chunk.to_csv(self._handle, index=False, header=self.rows == 0)
+
+        elif self.fmt == "jsonl":
+            if len(chunk):
+                text = chunk.to_json(orient="records", lines=True, force_ascii=False)
+                self._handle.write(text if text.endswith("\n") else text + "\n")
+
+        else:
+            self._write_parquet(chunk)
+
+        self.rows += len(chunk)
+
+    def _write_parquet(self, chunk: pd.DataFrame) -> None:
+        """Écriture Parquet incrémentale (pyarrow requis)"""
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("L'export Parquet nécessite pyarrow (pip install pyarrow)") from e
+
+        if self._parquet_writer is None:
+            schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+            # Colonne vide dans le premier bloc (type null): texte pour les blocs suivants
+            schema = pa.schema(
+                [field.with_type(pa.string()) if pa.types.is_null(field.type) else field for field in schema],
+                metadata=schema.metadata,
+            )
+            self._parquet_writer = pq.ParquetWriter(self._handle, schema)
+
+        # Tous les blocs sont convertis dans le schéma du premier, sans perte
+        # (ex: int16 → float64), sinon l'écriture s'arrête sur un message clair
+        try:
+            table = pa.Table.from_pandas(chunk, schema=self._parquet_writer.schema, preserve_index=False)
+        except (KeyError, pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError) as e:
+            raise ValueError(f"Bloc incompatible avec le schéma Parquet du premier bloc: {e}") from e
+        self._parquet_writer.write_table(table)
+
+    def close(self) -> None:
+        """Termine le fichier (pied de page Parquet) et ferme les chemins ouverts"""
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+        if self._owns_handle and self.fmt != "parquet":
+            self._handle.close()
+        elif hasattr(self._handle, "flush"):
+            self._handle.flush()
+
+    def __enter__(self) -> "ChunkWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+# ============================================================
+# EXPORTS DEPUIS LES RÉSULTATS SUR DISQUE
+# ============================================================
+
+# Nombre maximum de lignes de données par feuille Excel
+# (limite Excel: 1 048 576 lignes, en-tête compris)
+EXCEL_MAX_ROWS = 1_048_575
+
+def export_csv_gz(path: str, target, compresslevel: int = 6) -> None:
+    """
+    Compresse le fichier de résultats en CSV gzip, par blocs d'octets
+
+    Args:
+        path (str): Fichier CSV de résultats
+        target: Chemin ou flux binaire de sortie
+        compresslevel (int): Niveau de compression gzip (1 à 9)
+    """
+    with open(path, "rb") as source, gzip.open(target, "wb", compresslevel=compresslevel) as output:
+        shutil.copyfileobj(source, output, length=1024 * 1024)
+
+def export_excel(path: str, target, max_rows: Optional[int] = None,
+                 sheet_name: str = "Predictions",
+                 rows_per_sheet: int = EXCEL_MAX_ROWS,
+                 dtypes: Optional[Dict[str, str]] = None) -> int:
+    """
+    Construit le fichier Excel des résultats bloc par bloc
+
+    Les lignes sont écrites une à une par xlsxwriter en mode
+    constant_memory au lieu de garder toute la feuille en mémoire
+    (to_excel écrit colonne par colonne, incompatible avec ce mode).
+    Au-delà de rows_per_sheet lignes, les résultats continuent sur
+    une nouvelle feuille (Predictions_2, Predictions_3...).
+
+    Args:
+        path (str): Fichier CSV de résultats
+        target: Chemin ou flux binaire de sortie
+        max_rows (int): Nombre maximum de lignes exportées (toutes par défaut)
+        sheet_name (str): Nom de la première feuille Excel
+        rows_per_sheet (int): Lignes de données par feuille
+        dtypes (Dict[str, str]): Types des colonnes (BatchSummary.dtypes, voir iter_spooled)
+
+    Returns:
+        int: Nombre de lignes exportées
+    """
+    import xlsxwriter                     # Import local: inutile hors export Excel
+
+    workbook = xlsxwriter.Workbook(target, {"constant_memory": True})
+    header_format = workbook.add_format({"bold": True, "border": 1, "align": "center"})
+
+    worksheet = None
+    sheet_row = 0
+    exported = 0
+    for chunk in iter_spooled(path, dtypes=dtypes):
+        if max_rows is not None:
+            chunk = chunk.iloc[:max_rows - exported]
+        # Valeurs manquantes → cellules vides (comme to_excel)
+        values = chunk.astype(object).where(chunk.notna(), None)
+        for row in values.itertuples(index=False, name=None):
+            if worksheet is None or sheet_row > rows_per_sheet:
+                number = len(workbook.worksheets()) + 1
+                worksheet = workbook.add_worksheet(sheet_name if number == 1 else f"{sheet_name}_{number}")
+                worksheet.write_row(0, 0, list(chunk.columns), header_format)
+                sheet_row = 1
+            worksheet.write_row(sheet_row, 0, row)
+            sheet_row += 1
+        exported += len(chunk)
+        if max_rows is not None and exported >= max_rows:
+            break
+
+    if worksheet is None:
+        # Aucun résultat: feuille vide avec l'en-tête
+        worksheet = workbook.add_worksheet(sheet_name)
+        worksheet.write_row(0, 0, list(pd.read_csv(path, nrows=0).columns), header_format)
+
+    workbook.close()
+    return exported
+
+def export_json(path: str, target, dtypes: Optional[Dict[str, str]] = None) -> None:
+    """
+    Écrit le JSON (liste d'enregistrements) des résultats bloc par bloc
+
+    Le texte est écrit au fil de l'eau: seul le bloc courant est en mémoire.
+
+    Args:
+        path (str): Fichier CSV de résultats
+        target: Chemin ou flux texte de sortie
+        dtypes (Dict[str, str]): Types des colonnes (BatchSummary.dtypes, voir iter_spooled)
+    """
+    handle = open(target, "w", encoding="utf-8") if isinstance(target, (str, os.PathLike)) else target
+    try:
+        handle.write("[\n")
+        first = True
+        for chunk in iter_spooled(path, dtypes=dtypes):
+            # Retrait des crochets de chaque bloc pour former un seul tableau
+            text = chunk.to_json(orient="records", indent=2)[1:-1].strip("\n")
+            if not text:
+                continue
+            if not first:
+                handle.write(",\n")
+            handle.write(text)
+            first = False
+        handle.write("\n]")
+    finally:
+        if handle is not target:
+            handle.close()
+
+def export_jsonl(path: str, target, dtypes: Optional[Dict[str, str]] = None) -> None:
+    """
+    Écrit les résultats en JSON lines (un enregistrement par ligne)
+
+    Args:
+        path (str): Fichier CSV de résultats
+        target: Chemin ou flux texte de sortie
+        dtypes (Dict[str, str]): Types des colonnes (BatchSummary.dtypes, voir iter_spooled)
+    """
+    with ChunkWriter(target, "jsonl") as writer:
+        for chunk in iter_spooled(path, dtypes=dtypes):
+            writer.write(chunk)
+
+def export_parquet(path: str, target, dtypes: Optional[Dict[str, str]] = None) -> None:
+    """
+    Écrit les résultats en Parquet, un groupe de lignes par bloc (pyarrow requis)
+
+    Args:
+        path (str): Fichier CSV de résultats
+        target: Chemin ou flux binaire de sortie
+        dtypes (Dict[str, str]): Types des colonnes (BatchSummary.dtypes, voir iter_spooled)
+    """
+    with ChunkWriter(target, "parquet") as writer:
+        for chunk in iter_spooled(path, dtypes=dtypes):
+            writer.write(chunk)
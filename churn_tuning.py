@@ -0,0 +1,262 @@
+# ============================================================
+# RÉGLAGE DU SEUIL ET DES NIVEAUX DE RISQUE
+# ============================================================
+# Index trié des probabilités brutes d'un batch, avec le cumul
+# des vrais churners quand le fichier contient leur étiquette
+# Description: Le nombre de clients à risque, les niveaux de
+#              risque et la précision / le rappel / le F1 d'un
+#              seuil quelconque se lisent par recherche
+#              dichotomique (O(log n)), sans relancer le modèle
+# ============================================================
+
+# ============================================================
+# IMPORTATION DES BIBLIOTHÈQUES
+# ============================================================
+
+import numpy as np                        # Tri, recherche dichotomique et cumuls
+import os                                 # Chemins des tableaux .npy
+import pandas as pd                       # Étiquettes et courbes
+from typing import Dict, Iterable, List, Optional
+
+from churn_core import RISK_BINS
+
+# ============================================================
+# PARAMÈTRES
+# ============================================================
+
+# Colonnes reconnues comme étiquette (churn réel), par ordre de priorité
+LABEL_COLUMNS = ["churn", "churned", "Churn", "label", "target"]
+
+# Valeurs texte reconnues dans la colonne d'étiquette
+TRUE_LABELS = {"1", "1.0", "true", "yes", "oui", "churn"}
+FALSE_LABELS = {"0", "0.0", "false", "no", "non"}
+
+# Étiquette manquante (ligne exclue de la précision et du rappel)
+MISSING_LABEL = -1
+
+# Tableaux enregistrés dans l'entrée de cache d'un batch
+TUNING_FILES = {
+    "probabilities": "tuning_probabilities.npy",
+    "positives": "tuning_positives.npy",
+    "labelled": "tuning_labelled.npy",
+}
+
+# ============================================================
+# ÉTIQUETTES
+# ============================================================
+
+def find_label_column(columns: Iterable[str]) -> Optional[str]:
+    """
+    Colonne contenant le churn réel des clients
+
+    Args:
+        columns (Iterable[str]): Colonnes du fichier
+
+    Returns:
+        str: Première colonne de LABEL_COLUMNS présente, None sinon
+    """
+    columns = set(columns)
+    return next((column for column in LABEL_COLUMNS if column in columns), None)
+
+def label_values(series: pd.Series) -> np.ndarray:
+    """
+    Étiquettes d'une colonne: 1 (churn), 0 (fidèle) ou MISSING_LABEL
+
+    Les colonnes numériques ou booléennes valent 1 quand la valeur est
+    non nulle; les colonnes texte sont lues avec TRUE_LABELS et
+    FALSE_LABELS (sans tenir compte de la casse).
+
+    Args:
+        series (pd.Series): Colonne d'étiquette
+
+    Returns:
+        np.ndarray: Étiquettes int8, une par ligne
+    """
+    if pd.api.types.is_bool_dtype(series.dtype) or pd.api.types.is_numeric_dtype(series.dtype):
+        values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        labels = (values != 0).astype(np.int8)
+        labels[np.isnan(values)] = MISSING_LABEL
+        return labels
+    text = series.astype(str).str.strip().str.lower()
+    labels = np.full(len(series), MISSING_LABEL, dtype=np.int8)
+    labels[text.isin(TRUE_LABELS).to_numpy()] = 1
+    labels[text.isin(FALSE_LABELS).to_numpy()] = 0
+    labels[series.isna().to_numpy()] = MISSING_LABEL
+    return labels
+
+# ============================================================
+# INDEX DES PROBABILITÉS
+# ============================================================
+
+class ProbabilityIndex:
+    """
+    Probabilités brutes triées d'un batch, interrogées par seuil
+
+    Les règles sont celles de build_results_frame: un client est à
+    risque si sa probabilité est supérieure ou égale au seuil, et son
+    niveau de risque suit np.digitize sur les bornes. Chaque requête
+    est une recherche dichotomique dans les probabilités triées; avec
+    des étiquettes, les cumuls de churners et de lignes étiquetées
+    donnent la matrice de confusion de n'importe quel seuil.
+
+    Exemple:
+        index = ProbabilityIndex.build(probabilities, labels)
+        index.churn_count(0.45), index.risk_counts([0.3, 0.7])
+        index.scores(0.45)  # precision, recall, f1
+    """
+
+    def __init__(self, probabilities: np.ndarray,
+                 positives: Optional[np.ndarray] = None,
+                 labelled: Optional[np.ndarray] = None):
+        """
+        Args:
+            probabilities (np.ndarray): Probabilités triées par ordre croissant
+            positives (np.ndarray): Churners parmi les i premières probabilités (n + 1 valeurs)
+            labelled (np.ndarray): Lignes étiquetées parmi les i premières probabilités (n + 1 valeurs)
+        """
+        self.probabilities = probabilities
+        self.positives = positives
+        self.labelled = labelled
+
+    @classmethod
+    def build(cls, probabilities: np.ndarray, labels: Optional[np.ndarray] = None) -> "ProbabilityIndex":
+        """
+        Trie les probabilités d'un batch (et leurs étiquettes)
+
+        Args:
+            probabilities (np.ndarray): Probabilités de churn brutes, dans l'ordre du fichier
+            labels (np.ndarray): Étiquettes alignées (label_values), optionnel
+
+        Returns:
+            ProbabilityIndex: Index prêt à interroger
+        """
+        probabilities = np.asarray(probabilities, dtype=np.float64)
+        if labels is None:
+            return cls(np.sort(probabilities))
+        order = np.argsort(probabilities, kind="stable")
+        labels = np.asarray(labels)[order]
+        positives = np.concatenate([[0], np.cumsum(labels == 1, dtype=np.int64)])
+        labelled = np.concatenate([[0], np.cumsum(labels != MISSING_LABEL, dtype=np.int64)])
+        return cls(probabilities[order], positives, labelled)
+
+    def __len__(self) -> int:
+        return len(self.probabilities)
+
+    @property
+    def has_labels(self) -> bool:
+        """Indique si des lignes du batch ont une étiquette"""
+        return self.labelled is not None and self.labelled[-1] > 0
+
+    def _below(self, threshold) -> np.ndarray:
+        """Nombre de probabilités strictement inférieures à chaque seuil"""
+        return np.searchsorted(self.probabilities, threshold, side="left")
+
+    def churn_count(self, threshold: float) -> int:
+        """Clients dont la probabilité atteint le seuil (churn_prediction = 1)"""
+        return len(self) - int(self._below(threshold))
+
+    def risk_counts(self, risk_bins: List[float] = RISK_BINS) -> np.ndarray:
+        """
+        Nombre de clients par niveau de risque (ordre de RISK_LEVELS)
+
+        Args:
+            risk_bins (List[float]): Bornes croissantes des niveaux Medium et High
+
+        Returns:
+            np.ndarray: Effectifs int64
+        """
+        edges = np.concatenate([[0], self._below(np.asarray(risk_bins, dtype=np.float64)), [len(self)]])
+        return np.diff(edges).astype(np.int64)
+
+    def confusion(self, threshold) -> Dict[str, np.ndarray]:
+        """
+        Matrice de confusion des lignes étiquetées, pour un ou plusieurs seuils
+
+        Args:
+            threshold: Seuil (float) ou tableau de seuils
+
+        Returns:
+            Dict: tp, fp, fn, tn (entiers, ou tableaux alignés sur les seuils)
+        """
+        if self.positives is None:
+            raise ValueError("Aucune étiquette dans ce batch")
+        below = self._below(threshold)
+        positives_below = self.positives[below]
+        labelled_below = self.labelled[below]
+        tp = self.positives[-1] - positives_below
+        fp = (self.labelled[-1] - labelled_below) - tp
+        return {"tp": tp, "fp": fp, "fn": positives_below, "tn": labelled_below - positives_below}
+
+    def scores(self, threshold) -> Dict[str, np.ndarray]:
+        """
+        Précision, rappel et F1 pour un ou plusieurs seuils (0 si indéfini)
+
+        Args:
+            threshold: Seuil (float) ou tableau de seuils
+
+        Returns:
+            Dict: precision, recall, f1 (floats, ou tableaux alignés sur les seuils)
+        """
+        counts = self.confusion(threshold)
+        tp = np.asarray(counts["tp"], dtype=np.float64)
+        predicted = tp + counts["fp"]
+        actual = tp + counts["fn"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            precision = np.where(predicted > 0, tp / predicted, 0.0)
+            recall = np.where(actual > 0, tp / actual, 0.0)
+            f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+        if np.ndim(threshold) == 0:
+            return {"precision": float(precision), "recall": float(recall), "f1": float(f1)}
+        return {"precision": precision, "recall": recall, "f1": f1}
+
+    def curve(self, thresholds: np.ndarray) -> pd.DataFrame:
+        """
+        Courbes précision / rappel / F1 sur une grille de seuils
+
+        Args:
+            thresholds (np.ndarray): Seuils évalués
+
+        Returns:
+            pd.DataFrame: Colonnes threshold, precision, recall, f1 et churn_count
+        """
+        thresholds = np.asarray(thresholds, dtype=np.float64)
+        return pd.DataFrame({
+            "threshold": thresholds,
+            **self.scores(thresholds),
+            "churn_count": len(self) - self._below(thresholds),
+        })
+
+    def save(self, directory: str) -> None:
+        """
+        Enregistre l'index en tableaux .npy (un fichier chacun)
+
+        Args:
+            directory (str): Répertoire de destination (entrée de cache du batch)
+        """
+        for name, file_name in TUNING_FILES.items():
+            values = getattr(self, name)
+            if values is not None:
+                np.save(os.path.join(directory, file_name), values, allow_pickle=False)
+
+    @classmethod
+    def load(cls, directory: str, mmap_mode: Optional[str] = "r") -> Optional["ProbabilityIndex"]:
+        """
+        Relit un index enregistré par save(), en projection mémoire
+
+        Args:
+            directory (str): Répertoire des tableaux
+            mmap_mode (str): Mode de projection mémoire de np.load (None: copie)
+
+        Returns:
+            ProbabilityIndex: Index, None s'il est absent (batch plus ancien) ou illisible
+        """
+        arrays = {}
+        try:
+            for name, file_name in TUNING_FILES.items():
+                path = os.path.join(directory, file_name)
+                # np.asarray garde la projection mais évite la sous-classe np.memmap à chaque opération
+                arrays[name] = (np.asarray(np.load(path, mmap_mode=mmap_mode, allow_pickle=False))
+                                if name == "probabilities" or os.path.exists(path) else None)
+        except (OSError, ValueError):
+            return None
+        return cls(**arrays)
@@ -0,0 +1,102 @@
+# ============================================================
+# FIXTURES DES TESTS DE NON-RÉGRESSION
+# ============================================================
+# Modèle, scaler et données clients synthétiques partagés par les
+# fichiers test_*.py
+# Description: Petite forêt aléatoire entraînée à la volée comme le
+#              modèle de production (get_dummies + StandardScaler),
+#              sans dépendre des artefacts .pkl du dépôt
+# ============================================================
+
+# ============================================================
+# IMPORTATION DES BIBLIOTHÈQUES
+# ============================================================
+
+import joblib                             # Artefacts enregistrés comme en production
+import numpy as np                        # Génération des données synthétiques
+import pandas as pd                       # Données clients sous forme de DataFrame
+import pytest                             # Fixtures partagées
+from sklearn.ensemble import RandomForestClassifier  # Modèle de référence
+from sklearn.preprocessing import StandardScaler     # Standardisation de référence
+
+from churn_core import CATEGORICAL_COLUMNS, FeatureEncoder  # Encodeur testé
+
+# ============================================================
+# DONNÉES SYNTHÉTIQUES
+# ============================================================
+
+# Catégories vues à l'entraînement ("One year" reste inconnue du modèle)
+TRAINING_CONTRACTS = ["Monthly", "Two year"]
+
+def make_clients(n_rows: int, seed: int = 0, contracts=("Monthly", "Two year", "One year")) -> pd.DataFrame:
+    """
+    Données clients aléatoires au schéma de REQUIRED_COLUMNS
+
+    Args:
+        n_rows (int): Nombre de clients
+        seed (int): Graine du générateur
+        contracts: Valeurs possibles de contract_type
+
+    Returns:
+        pd.DataFrame: Une ligne par client, avec client_id
+    """
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "client_id": [f"C-{i}" for i in range(n_rows)],
+        "age": rng.integers(18, 80, n_rows),
+        "tenure_months": rng.integers(0, 72, n_rows),
+        "monthly_charges": rng.uniform(20, 120, n_rows).round(2),
+        "data_usage_gb": rng.uniform(0, 60, n_rows).round(1),
+        "voice_minutes": rng.integers(0, 1500, n_rows),
+        "support_calls": rng.integers(0, 8, n_rows),
+        "network_quality": rng.integers(1, 6, n_rows),
+        "payment_delay": rng.integers(0, 30, n_rows),
+        "auto_payment": rng.integers(0, 2, n_rows),
+        "contract_type": rng.choice(list(contracts), n_rows),
+    })
+
+def baseline_matrix(df: pd.DataFrame, features, scaler) -> np.ndarray:
+    """Encodage historique: get_dummies + reindex + scaler.transform"""
+    encoded = pd.get_dummies(df.drop(columns="client_id", errors="ignore"), columns=CATEGORICAL_COLUMNS)
+    return scaler.transform(encoded.reindex(columns=features, fill_value=0))
+
+# ============================================================
+# ARTEFACTS ENTRAÎNÉS
+# ============================================================
+
+@pytest.fixture(scope="session")
+def artifacts():
+    """Forêt, scaler et colonnes entraînés comme les artefacts de production"""
+    train = make_clients(2000, seed=1, contracts=TRAINING_CONTRACTS)
+    encoded = pd.get_dummies(train.drop(columns="client_id"), columns=CATEGORICAL_COLUMNS)
+    features = list(encoded.columns)
+    scaler = StandardScaler().fit(encoded.astype(np.float64))
+    rng = np.random.default_rng(2)
+    churn = ((train["support_calls"] + train["payment_delay"] / 5 - train["tenure_months"] / 12
+              + rng.normal(0, 1.5, len(train))) > 1).astype(int)
+    model = RandomForestClassifier(n_estimators=25, max_depth=8, random_state=0)
+    model.fit(scaler.transform(encoded.astype(np.float64)), churn)
+    return model, scaler, features
+
+@pytest.fixture(scope="session")
+def encoder(artifacts):
+    """Encodeur avec le scaler fusionné"""
+    _, scaler, features = artifacts
+    return FeatureEncoder(features, scaler=scaler)
+
+def save_artifacts(directory, model, scaler, features):
+    """
+    Enregistre des artefacts comme rf_churn_model.pkl, scaler.pkl et features.pkl
+
+    Returns:
+        tuple: Chemins (modèle, scaler, features)
+    """
+    paths = tuple(str(directory / name) for name in ["rf_churn_model.pkl", "scaler.pkl", "features.pkl"])
+    for path, artifact in zip(paths, [model, scaler, features]):
+        joblib.dump(artifact, path)
+    return paths
+
+@pytest.fixture(scope="session")
+def artifact_paths(artifacts, tmp_path_factory):
+    """Chemins des artefacts synthétiques enregistrés sur disque"""
+    return save_artifacts(tmp_path_factory.mktemp("artifacts"), *artifacts)
@@ -16,15 +16,87 @@
 import streamlit as st                    # Framework pour créer l'interface web
 import pandas as pd                       # Manipulation de données tabulaires
 import numpy as np                        # Calculs numériques et manipulation d'arrays
-import joblib                             # Chargement des modèles ML sauvegardés
 import os                                 # Opérations sur le système de fichiers
-import plotly.express as px               # Visualisations interactives
-import plotly.graph_objects as go         # Graphiques personnalisés Plotly
 from datetime import datetime             # Manipulation de dates et heures
-from typing import List, Dict, Tuple      # Annotations de types pour le code
+from typing import TYPE_CHECKING, List, Dict, Optional, Tuple  # Annotations de types pour le code
 import warnings                           # Gestion des avertissements
 warnings.filterwarnings('ignore')         # Suppression des warnings non-critiques
 
+from churn_batching import MicroBatcher   # Regroupement des prédictions unitaires
+from churn_cache import (                 # Cache des résultats batch
+    PROBABILITIES_FILE,
+    RESULTS_FILE,
+    ResultCache,
+    fingerprint_files,
+    hash_content,
+    make_key,
+)
+from churn_core import (                  # Cœur de prédiction partagé
+    FEATURES_PATH,
+    MODEL_PATH,
+    RISK_BINS,
+    RISK_LEVELS,
+    SCALER_PATH,
+    THRESHOLD,
+    FeatureEncoder,
+    build_results_frame,
+    load_artifacts,
+    predict_dataframe,
+    predict_probabilities,
+    predict_records,
+    results_to_records,
+    warm_up,
+)
+from churn_explain import (               # Contributions des caractéristiques (Saabas)
+    DEFAULT_EXPLAIN_ROWS,
+    ForestExplainer,
+    contribution_records,
+    explain_results_file,
+    feature_label,
+)
+from churn_history import (               # Historique des prédictions (SQLite)
+    DEFAULT_HISTORY_PATH,
+    DEFAULT_KEEP_BATCHES,
+    FORM_SOURCE,
+    DeltaScorer,
+    PredictionStore,
+    find_client_id_column,
+)
+from churn_memo import MemoizedModel      # Dédoublonnage et cache LRU des prédictions
+from churn_metrics import (               # Temps par étape et latences
+    METRICS,
+    MetricsRegistry,
+    peak_memory_bytes,
+)
+from churn_recommendations import (      # Règles de recommandation vectorisées
+    add_recommendations,
+    recommend_client,
+)
+from churn_stream import (                # Scoring batch par blocs
+    EXCEL_MAX_ROWS,
+    BatchSummary,
+    export_csv_gz,
+    export_excel,
+    export_json,
+    export_jsonl,
+    export_parquet,
+    iter_chunks,
+    iter_spooled,
+    read_results_page,
+    stream_scored,
+    write_indexed_csv,
+)
+from churn_tuning import (                # Réglage du seuil et des niveaux de risque
+    ProbabilityIndex,
+    find_label_column,
+    label_values,
+)
+
+# plotly.express (et narwhals) n'est importé qu'au premier graphique
+# affiché: le démarrage et la première prédiction ne le chargent pas
+if TYPE_CHECKING:
+    import plotly.graph_objects as go
+
 # ============================================================
 # CONFIGURATION INITIALE DE STREAMLIT
 # ============================================================
@@ -124,38 +196,148 @@ def load_ml_artifacts():
     Raises:
         FileNotFoundError: Si un des fichiers est manquant
     """
-    # Définition des chemins des fichiers
-    model_path = "rf_churn_model.pkl"
-    scaler_path = "scaler.pkl"
-    features_path = "features.pkl"
-    
-    # Vérification de l'existence de tous les fichiers requis
-    missing_files = []
-    for path in [model_path, scaler_path, features_path]:
-        if not os.path.exists(path):
-            missing_files.append(path)
+    # Chargement des artefacts (vérifie d'abord que les fichiers existent)
+    try:
+        return load_artifacts(MODEL_PATH, SCALER_PATH, FEATURES_PATH)
     
     # Affichage d'erreur si des fichiers manquent
-    if missing_files:
-        st.error(f"Fichiers manquants: {', '.join(missing_files)}")
+    except FileNotFoundError as e:
+        st.error(str(e))
         st.info("Assurez-vous que les fichiers .pkl sont dans le même répertoire que l'application")
         st.stop()
     
-    # Chargement des artefacts
-    try:
-        model = joblib.load(model_path)
-        scaler = joblib.load(scaler_path)
-        features = joblib.load(features_path)
-        return model, scaler, features
     except Exception as e:
         st.error(f"Erreur lors du chargement des modèles: {str(e)}")
         st.stop()
 
+@st.cache_resource  # Encodeur construit une seule fois par processus
+def load_feature_encoder(features: List[str], _scaler) -> FeatureEncoder:
+    """
+    Construit l'encodeur des features à partir de features.pkl et scaler.pkl
+    
+    Args:
+        features (List[str]): Colonnes attendues par le modèle
+        _scaler: StandardScaler fusionné à l'encodage (non haché par le cache)
+    
+    Returns:
+        FeatureEncoder: Encodeur précompilé (catégories, ordre et standardisation figés)
+    """
+    return FeatureEncoder(features, scaler=_scaler)
+
+@st.cache_resource  # Un seul cache de prédictions par version des artefacts
+def load_memoized_model(_model, artifacts_key: str) -> MemoizedModel:
+    """
+    Place le cache des prédictions devant le modèle
+    
+    Les lignes identiques d'un batch ne sont prédites qu'une fois, et
+    les vecteurs déjà vus (formulaire, petits lots) sont servis par le
+    cache. Une nouvelle empreinte des artefacts donne un cache vide.
+    
+    Args:
+        _model: Modèle entraîné (non haché par le cache)
+        artifacts_key (str): Empreinte des artefacts du modèle
+    
+    Returns:
+        MemoizedModel: Modèle mémoïsé partagé par toutes les sessions
+    """
+    return MemoizedModel(_model, artifacts_key=artifacts_key)
+
+@st.cache_resource  # Un seul regroupeur partagé par toutes les sessions
+def load_prediction_batcher(_model, _encoder: FeatureEncoder) -> MicroBatcher:
+    """
+    Crée le regroupeur des prédictions du formulaire individuel
+    
+    Les soumissions simultanées de plusieurs agents sont prédites
+    en un seul appel au modèle (micro-batching).
+    
+    Args:
+        _model: Modèle entraîné (non haché par le cache)
+        _encoder (FeatureEncoder): Encodeur des features (non haché par le cache)
+    
+    Returns:
+        MicroBatcher: Regroupeur partagé
+    """
+    return MicroBatcher(lambda records: predict_records(records, _model, _encoder, THRESHOLD))
+
+@st.cache_resource  # Préchauffage une seule fois par processus
+def warm_up_model(_model, _encoder: FeatureEncoder) -> float:
+    """
+    Prédictions à vide au chargement du modèle
+    
+    Le premier agent ne paie pas les initialisations de la première
+    prédiction du processus (voir churn_core.warm_up).
+    
+    Args:
+        _model: Modèle entraîné (non haché par le cache)
+        _encoder (FeatureEncoder): Encodeur des features (non haché par le cache)
+    
+    Returns:
+        float: Durée du préchauffage (s)
+    """
+    return warm_up(_model, _encoder, THRESHOLD)
+
+@st.cache_resource  # Explicateur partagé par toutes les sessions
+def load_explainer(_model, _encoder: FeatureEncoder, artifacts_key: str) -> Optional[ForestExplainer]:
+    """
+    Crée l'explicateur des prédictions (contributions par caractéristique)
+    
+    Args:
+        _model: Modèle entraîné (non haché par le cache)
+        _encoder (FeatureEncoder): Encodeur des features (non haché par le cache)
+        artifacts_key (str): Empreinte des artefacts (un nouveau modèle recrée l'explicateur)
+    
+    Returns:
+        ForestExplainer: Explicateur, None si le modèle n'est pas une forêt
+    """
+    try:
+        return ForestExplainer(_model, _encoder)
+    except ValueError:
+        return None
+
+@st.cache_resource  # Cache disque partagé par toutes les sessions
+def load_result_cache() -> ResultCache:
+    """
+    Ouvre le cache des résultats batch (résultats, agrégats, exports)
+    
+    Returns:
+        ResultCache: Cache indexé par l'empreinte des fichiers uploadés
+    """
+    return ResultCache()
+
+@st.cache_resource  # Base d'historique partagée par toutes les sessions
+def load_prediction_store() -> PredictionStore:
+    """
+    Ouvre la base d'historique des prédictions (batchs et formulaire)
+    
+    Returns:
+        PredictionStore: Base SQLite locale
+    """
+    return PredictionStore(DEFAULT_HISTORY_PATH)
+
 # Chargement des artefacts au démarrage
 model, scaler, features = load_ml_artifacts()
+encoder = load_feature_encoder(features, scaler)
+warm_up_model(model, encoder)
 
-# Seuil de probabilité optimisé pour maximiser le recall
-THRESHOLD = 0.50
+# Empreinte des artefacts: un nouveau modèle invalide les résultats et les prédictions en cache
+ARTIFACTS_KEY = fingerprint_files([MODEL_PATH, SCALER_PATH, FEATURES_PATH])
+
+model = load_memoized_model(model, ARTIFACTS_KEY)
+explainer = load_explainer(model, encoder, ARTIFACTS_KEY)
+batcher = load_prediction_batcher(model, encoder)
+result_cache = load_result_cache()
+prediction_store = load_prediction_store()
+
+# Version des colonnes de résultats (2: recommandations): un changement
+# invalide aussi les résultats en cache
+RESULTS_VERSION = 2
+
+# Tailles de page du tableau des résultats: seule la page affichée est
+# lue sur disque et envoyée au navigateur, quelle que soit la taille du batch
+RESULTS_PAGE_SIZES = [100, 500, 1_000, 5_000]
+
+# Nombre de batchs listés dans l'historique
+HISTORY_BATCHES = 50
 
 # ============================================================
 # FONCTIONS UTILITAIRES
@@ -178,10 +360,44 @@ def get_risk_color(risk_level: str) -> str:
     }
     return colors.get(risk_level, '#999999')
 
+def make_prediction_df(df: pd.DataFrame, metrics: Optional[MetricsRegistry] = None) -> pd.DataFrame:
+    """
+    Effectue les prédictions de churn sur un DataFrame (format colonnes)
+    
+    Args:
+        df (pd.DataFrame): DataFrame contenant les données clients
+        metrics (MetricsRegistry): Registre des temps par étape (METRICS par défaut)
+    
+    Returns:
+        pd.DataFrame: Résultats alignés sur l'index de df
+                      Colonnes: churn_probability, churn_prediction, risk_level
+    """
+    return predict_dataframe(df, model, encoder, THRESHOLD, metrics=metrics)
+
+def make_batch_results(df: pd.DataFrame, probabilities: np.ndarray, metrics: MetricsRegistry) -> pd.DataFrame:
+    """
+    Résultats et recommandations d'un bloc de fichier batch
+    
+    Args:
+        df (pd.DataFrame): Bloc de données clients
+        probabilities (np.ndarray): Probabilités de churn brutes du bloc
+        metrics (MetricsRegistry): Registre des temps par étape du batch
+    
+    Returns:
+        pd.DataFrame: Résultats alignés sur l'index de df, complétés de la
+                      colonne recommendations (codes des règles appliquées)
+    """
+    with metrics.stage("postprocess", len(df)):
+        results = build_results_frame(probabilities, THRESHOLD, index=df.index)
+    with metrics.stage("recommend", len(df)):
+        return add_recommendations(results, df)
+
 def make_prediction(df: pd.DataFrame) -> List[Dict]:
     """
     Effectue les prédictions de churn sur un DataFrame
     
+    Enveloppe de compatibilité autour de make_prediction_df.
+    
     Args:
         df (pd.DataFrame): DataFrame contenant les données clients
     
@@ -190,117 +406,82 @@ def make_prediction(df: pd.DataFrame) -> List[Dict]:
                    Chaque dict contient: churn_probability, churn_prediction, risk_level
     """
     try:
-        # Création d'une copie pour ne pas modifier l'original
-        df_processed = df.copy()
-        
-        # One-hot encoding des variables catégorielles
-        df_processed = pd.get_dummies(df_processed)
-        
-        # Alignement avec les features du modèle entraîné
-        # Les colonnes manquantes sont remplies avec 0
-        df_processed = df_processed.reindex(columns=features, fill_value=0)
-        
-        # Standardisation des features numériques
-        X_scaled = scaler.transform(df_processed)
-        
-        # Prédiction des probabilités (colonne 1 = probabilité de churn)
-        probabilities = model.predict_proba(X_scaled)[:, 1]
-        
-        # Création des résultats pour chaque ligne
-        results = []
-        for prob in probabilities:
-            # Prédiction binaire basée sur le seuil
-            prediction = int(prob >= THRESHOLD)
-            
-            # Détermination du niveau de risque
-            if prob >= 0.6:
-                risk = "High"
-            elif prob >= 0.4:
-                risk = "Medium"
-            else:
-                risk = "Low"
-            
-            # Ajout du résultat
-            results.append({
-                "churn_probability": round(float(prob), 3),
-                "churn_prediction": prediction,
-                "risk_level": risk
-            })
-        
-        return results
+        return results_to_records(make_prediction_df(df))
     
     except Exception as e:
         st.error(f"Erreur lors de la prédiction: {str(e)}")
         return []
 
-def generate_recommendations(prediction_result: Dict, client_data: Dict) -> List[str]:
+def predict_client(client_data: Dict) -> Dict:
     """
-    Génère des recommandations personnalisées basées sur la prédiction
+    Prédit le churn d'un client saisi dans le formulaire
+    
+    Passe par le regroupeur partagé: sous charge, les soumissions
+    concurrentes sont prédites ensemble; au repos, sans attente.
     
     Args:
-        prediction_result (Dict): Résultat de la prédiction
         client_data (Dict): Données du client
     
     Returns:
-        List[str]: Liste de recommandations
+        Dict: churn_probability, churn_prediction, risk_level
     """
-    recommendations = []
-    prob = prediction_result['churn_probability']
-    risk = prediction_result['risk_level']
-    
-    # Recommandations basées sur le niveau de risque
-    if risk == "High":
-        recommendations.append("🚨 **Action Urgente**: Contactez ce client immédiatement")
-        recommendations.append("💰 Proposez une offre promotionnelle personnalisée (-20% pendant 3 mois)")
-        recommendations.append("🎁 Offrez un upgrade gratuit vers un forfait supérieur")
-    
-    elif risk == "Medium":
-        recommendations.append("⚠️ **Surveillance Active**: Planifiez un appel de satisfaction")
-        recommendations.append("📧 Envoyez une campagne email avec des offres exclusives")
-        recommendations.append("🎯 Proposez des services additionnels gratuits (roaming, data extra)")
-    
-    else:
-        recommendations.append("✅ **Client Stable**: Continuez l'engagement régulier")
-        recommendations.append("🌟 Programmes de fidélité et récompenses")
-        recommendations.append("📱 Invitez à parrainer d'autres clients (programme référent)")
-    
-    # Recommandations basées sur les caractéristiques spécifiques
-    if client_data.get('support_calls', 0) > 3:
-        recommendations.append("📞 **Problème détecté**: Nombre élevé d'appels support → Améliorer la qualité de service")
-    
-    if client_data.get('payment_delay', 0) > 0:
-        recommendations.append("💳 **Paiement**: Retards détectés → Proposer un plan de paiement flexible")
+    try:
+        return batcher.predict(client_data)
     
-    if client_data.get('contract_type') == 'Monthly':
-        recommendations.append("📝 **Contrat**: Type mensuel → Encourager passage à contrat annuel avec bonus")
+    except Exception as e:
+        st.error(f"Erreur lors de la prédiction: {str(e)}")
+        st.stop()
+
+def record_client_prediction(client_data: Dict, result: Dict) -> None:
+    """
+    Enregistre une prédiction du formulaire dans l'historique (batch d'une ligne)
     
-    if client_data.get('network_quality', 5) < 3:
-        recommendations.append("📡 **Réseau**: Qualité faible → Vérifier et améliorer la couverture dans sa zone")
+    Args:
+        client_data (Dict): Données du client
+        result (Dict): Résultat de predict_client
+    """
+    prediction_store.save_batch(
+        [pd.DataFrame([{**client_data, **result}])], FORM_SOURCE, THRESHOLD, ARTIFACTS_KEY
+    )
+    prediction_store.prune(DEFAULT_KEEP_BATCHES)
+
+def generate_recommendations(prediction_result: Dict, client_data: Dict) -> List[str]:
+    """
+    Génère des recommandations personnalisées basées sur la prédiction
     
-    if client_data.get('auto_payment', 1) == 0:
-        recommendations.append("🔄 **Paiement Auto**: Non activé → Inciter avec 5% de réduction")
+    Mêmes règles que la colonne recommendations des résultats batch
+    (voir churn_recommendations.RULES).
     
-    if client_data.get('tenure_months', 0) < 6:
-        recommendations.append("🆕 **Nouveau Client**: Ancienneté faible → Programme d'onboarding renforcé")
+    Args:
+        prediction_result (Dict): Résultat de la prédiction
+        client_data (Dict): Données du client
     
-    return recommendations
+    Returns:
+        List[str]: Liste de recommandations
+    """
+    return recommend_client(client_data, prediction_result['risk_level'])
 
-def create_gauge_chart(probability: float) -> go.Figure:
+def create_gauge_chart(probability: float, threshold: float = THRESHOLD,
+                       risk_bins: List[float] = RISK_BINS) -> "go.Figure":
     """
     Crée un graphique jauge pour visualiser la probabilité de churn
     
     Args:
         probability (float): Probabilité de churn (0-1)
+        threshold (float): Seuil de décision (repère de la jauge)
+        risk_bins (List[float]): Bornes des niveaux de risque Medium et High
     
     Returns:
         go.Figure: Figure Plotly avec le graphique jauge
     """
+    import plotly.graph_objects as go     # Import local: chargé au premier graphique
+    
     fig = go.Figure(go.Indicator(
         mode = "gauge+number+delta",
         value = probability * 100,
         domain = {'x': [0, 1], 'y': [0, 1]},
         title = {'text': "Probabilité de Churn (%)", 'font': {'size': 24}},
-        delta = {'reference': 50, 'increasing': {'color': "red"}},
+        delta = {'reference': threshold * 100, 'increasing': {'color': "red"}},
         gauge = {
             'axis': {'range': [None, 100], 'tickwidth': 1, 'tickcolor': "darkblue"},
             'bar': {'color': "darkblue"},
@@ -308,14 +489,14 @@ def create_gauge_chart(probability: float) -> go.Figure:
             'borderwidth': 2,
             'bordercolor': "gray",
             'steps': [
-                {'range': [0, 40], 'color': '#4caf50'},     # Vert - Faible risque
-                {'range': [40, 60], 'color': '#ff9800'},    # Orange - Risque moyen
-                {'range': [60, 100], 'color': '#f44336'}    # Rouge - Risque élevé
+                {'range': [0, risk_bins[0] * 100], 'color': '#4caf50'},                  # Vert - Faible risque
+                {'range': [risk_bins[0] * 100, risk_bins[1] * 100], 'color': '#ff9800'},  # Orange - Risque moyen
+                {'range': [risk_bins[1] * 100, 100], 'color': '#f44336'}                  # Rouge - Risque élevé
             ],
             'threshold': {
                 'line': {'color': "red", 'width': 4},
                 'thickness': 0.75,
-                'value': 50
+                'value': threshold * 100
             }
         }
     ))
@@ -329,9 +510,14 @@ def create_gauge_chart(probability: float) -> go.Figure:
     
     return fig
 
-def create_feature_importance_chart(client_data: Dict) -> go.Figure:
+def create_feature_importance_chart(client_data: Dict) -> "go.Figure":
     """
-    Crée un graphique montrant les features du client
+    Crée un graphique des contributions des caractéristiques du client
+    
+    Chaque barre est la part de la probabilité de churn due à une
+    caractéristique (positive: vers le départ, négative: vers la
+    fidélité). Sans explicateur (modèle autre qu'une forêt), le
+    graphique montre les valeurs du client.
     
     Args:
         client_data (Dict): Données du client
@@ -339,28 +525,42 @@ def create_feature_importance_chart(client_data: Dict) -> go.Figure:
     Returns:
         go.Figure: Figure Plotly avec le graphique en barres
     """
-    # Sélection des features numériques importantes
-    features_to_show = {
-        'Ancienneté (mois)': client_data.get('tenure_months', 0),
-        'Facture Mensuelle': client_data.get('monthly_charges', 0),
-        'Appels Support': client_data.get('support_calls', 0),
-        'Qualité Réseau': client_data.get('network_quality', 0),
-        'Retard Paiement': client_data.get('payment_delay', 0),
-        'Data Usage (GB)': client_data.get('data_usage_gb', 0)
-    }
+    import plotly.graph_objects as go     # Import local: chargé au premier graphique
     
-    fig = go.Figure(data=[
-        go.Bar(
-            x=list(features_to_show.keys()),
-            y=list(features_to_show.values()),
-            marker_color=['#667eea', '#764ba2', '#f093fb', '#4facfe', '#fa709a', '#fee140']
+    if explainer is None:
+        # Sélection des features numériques importantes
+        features_to_show = {
+            feature_label(name): client_data.get(name, 0)
+            for name in ['tenure_months', 'monthly_charges', 'support_calls',
+                         'network_quality', 'payment_delay', 'data_usage_gb']
+        }
+        fig = go.Figure(data=[
+            go.Bar(
+                x=list(features_to_show.keys()),
+                y=list(features_to_show.values()),
+                marker_color=['#667eea', '#764ba2', '#f093fb', '#4facfe', '#fa709a', '#fee140']
+            )
+        ])
+        fig.update_layout(title="Caractéristiques du Client", xaxis_title="Features", yaxis_title="Valeurs")
+    else:
+        bias, contributions = explainer.explain(pd.DataFrame([client_data]))
+        # Plus grande contribution en haut du graphique
+        records = contribution_records(bias, contributions.iloc[0])[:-1][::-1]
+        values = [record["contribution"] * 100 for record in records]
+        fig = go.Figure(data=[
+            go.Bar(
+                x=values,
+                y=[record["label"] for record in records],
+                orientation='h',
+                marker_color=['#f44336' if value > 0 else '#4caf50' for value in values]
+            )
+        ])
+        fig.update_layout(
+            title=f"Contributions au Risque (moyenne du modèle: {bias * 100:.1f}%)",
+            xaxis_title="Points de probabilité (%)"
         )
-    ])
     
     fig.update_layout(
-        title="Caractéristiques du Client",
-        xaxis_title="Features",
-        yaxis_title="Valeurs",
         height=300,
         margin=dict(l=20, r=20, t=50, b=20),
         showlegend=False
@@ -368,6 +568,381 @@ def create_feature_importance_chart(client_data: Dict) -> go.Figure:
     
     return fig
 
+# ============================================================
+# CACHE DES RÉSULTATS BATCH
+# ============================================================
+
+def uploaded_file_key(uploaded_file) -> str:
+    """
+    Clé de cache d'un fichier uploadé
+    
+    Combine l'empreinte du contenu, le format, les artefacts et le
+    seuil. L'empreinte n'est calculée qu'une fois par upload.
+    
+    Args:
+        uploaded_file: Fichier uploadé via st.file_uploader
+    
+    Returns:
+        str: Clé de cache
+    """
+    hashes = st.session_state.setdefault("upload_hashes", {})
+    file_id = getattr(uploaded_file, "file_id", None) or f"{uploaded_file.name}:{uploaded_file.size}"
+    if file_id not in hashes:
+        hashes[file_id] = hash_content(uploaded_file)
+    extension = os.path.splitext(uploaded_file.name)[1].lower()
+    return make_key(hashes[file_id], extension, ARTIFACTS_KEY, THRESHOLD, RESULTS_VERSION)
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def load_preview(batch_key: str, _uploaded_file) -> Optional[pd.DataFrame]:
+    """
+    Premières lignes d'un fichier uploadé (lues une seule fois par contenu)
+    
+    Args:
+        batch_key (str): Clé de cache du fichier
+        _uploaded_file: Fichier uploadé (non haché par le cache)
+    
+    Returns:
+        pd.DataFrame: Aperçu (10 lignes), None si le fichier est vide
+    """
+    preview_df = next(iter_chunks(_uploaded_file, _uploaded_file.name, chunksize=10), None)
+    _uploaded_file.seek(0)
+    return preview_df
+
+def run_batch_predictions(uploaded_file, batch_key: str, reference_batch: Optional[int] = None,
+                          save_history: bool = True) -> None:
+    """
+    Prédit un fichier uploadé bloc par bloc et enregistre le résultat en cache
+    
+    Args:
+        uploaded_file: Fichier uploadé via st.file_uploader
+        batch_key (str): Clé de cache du fichier
+        reference_batch (int): Batch de l'historique dont les résultats sont
+                               repris pour les clients inchangés (optionnel)
+        save_history (bool): Ajoute les prédictions à l'historique (les batchs
+                             au-delà de DEFAULT_KEEP_BATCHES par modèle sont supprimés)
+    """
+    # Barre de progression (avancement réel dans le fichier)
+    progress_bar = st.progress(0)
+    status_text = st.empty()
+    
+    status_text.text("🤖 Prédictions en cours...")
+    
+    # Les résultats sont écrits sur disque bloc par bloc:
+    # seul le bloc courant est gardé en mémoire
+    spool = result_cache.new_spool()
+    summary = BatchSummary()
+    # Temps par étape de ce fichier (reportés aussi dans le registre global)
+    metrics = MetricsRegistry(parent=METRICS)
+    # Probabilités brutes: réglage du seuil sans nouvelle prédiction
+    probability_chunks = []
+    label_chunks = []
+
+    def predict_proba(df):
+        return predict_probabilities(df, model, encoder, metrics)
+
+    # Rescoring incrémental: mêmes résultats qu'un scoring complet
+    # (batch de référence prédit avec les mêmes artefacts)
+    delta = None
+    if reference_batch is not None:
+        delta = predict_proba = DeltaScorer(prediction_store.reference_results(reference_batch),
+                                            predict_proba, metrics)
+    # Les résultats sont aussi ajoutés à l'historique, bloc par bloc (si demandé)
+    history_batch = (prediction_store.start_batch(uploaded_file.name, THRESHOLD, ARTIFACTS_KEY)
+                     if save_history else None)
+    completed = False
+    try:
+        with spool:
+            uploaded_file.seek(0)
+            chunks = metrics.timed_iter("parse", iter_chunks(uploaded_file, uploaded_file.name))
+            scored_chunks = stream_scored(
+                chunks, predict_proba, lambda df, probabilities: make_batch_results(df, probabilities, metrics),
+                summary, metrics
+            )
+            for scored, probabilities in scored_chunks:
+                probability_chunks.append(probabilities)
+                label_column = find_label_column(scored.columns)
+                if label_column is not None:
+                    label_chunks.append(label_values(scored[label_column]))
+                with metrics.stage("write", len(scored)):
+                    write_indexed_csv(scored, spool, summary.row_offsets, summary.total - len(scored))
+                if history_batch is not None:
+                    with metrics.stage("store", len(scored)):
+                        prediction_store.append(history_batch, scored, summary.total - len(scored), probabilities)
+                progress_bar.progress(min(uploaded_file.tell() / max(uploaded_file.size, 1), 1.0))
+                status_text.text(f"🤖 {summary.total:,} lignes prédites...")
+        completed = True
+    except Exception as e:
+        st.error(f"Erreur lors de la prédiction: {str(e)}")
+        st.stop()
+    finally:
+        # Erreur ou rerun Streamlit (clic pendant le calcul, hors Exception):
+        # ni fichier de résultats ni batch incomplet laissés derrière
+        if not completed:
+            os.remove(spool.name)
+            if history_batch is not None:
+                prediction_store.delete_batch(history_batch)
+    
+    if history_batch is not None:
+        prediction_store.finish_batch(history_batch)
+        # Rétention: la base ne grandit pas sans limite
+        prediction_store.prune(DEFAULT_KEEP_BATCHES)
+    if delta is not None:
+        summary.reused_rows = delta.reused_rows
+    summary.stages = metrics.summary()
+    summary.peak_memory_bytes = peak_memory_bytes()
+    metrics.log_summary("batch", file=uploaded_file.name, rows=summary.total)
+    result_cache.store(batch_key, spool.name, summary)
+    # Étiquettes présentes dans tous les blocs (colonne du fichier): courbes précision / rappel
+    labels = np.concatenate(label_chunks) if label_chunks and len(label_chunks) == len(probability_chunks) else None
+    probabilities = np.concatenate(probability_chunks) if probability_chunks else np.empty(0)
+    probability_index = ProbabilityIndex.build(probabilities, labels)
+    probability_index.save(os.path.dirname(result_cache.path(batch_key, RESULTS_FILE)))
+    # Probabilités brutes dans l'ordre du fichier: historique d'un fichier déjà prédit
+    np.save(result_cache.path(batch_key, PROBABILITIES_FILE), probabilities, allow_pickle=False)
+    
+    progress_bar.empty()
+    status_text.empty()
+
+def save_cached_batch(source: str, batch_key: str) -> Optional[int]:
+    """
+    Ajoute à l'historique les résultats d'un fichier déjà prédit (cache)
+    
+    Les résultats en cache sont relus par blocs, avec leurs probabilités
+    brutes: le batch enregistré est celui d'un nouveau scoring et peut
+    servir de référence au rescoring incrémental.
+    
+    Args:
+        source (str): Nom du fichier
+        batch_key (str): Clé de cache du fichier
+    
+    Returns:
+        int: Identifiant du batch, None si les résultats ont expiré du cache
+    """
+    summary = result_cache.load_summary(batch_key, BatchSummary)
+    if summary is None:
+        return None
+    try:
+        # Entrées antérieures à l'enregistrement des probabilités: historique sans rescoring
+        probabilities_path = result_cache.path(batch_key, PROBABILITIES_FILE)
+        probabilities = (np.load(probabilities_path, mmap_mode="r", allow_pickle=False)
+                         if os.path.exists(probabilities_path) else None)
+        batch_id = prediction_store.save_batch(
+            iter_spooled(result_cache.path(batch_key, RESULTS_FILE), dtypes=summary.dtypes),
+            source, THRESHOLD, ARTIFACTS_KEY, probabilities=probabilities
+        )
+    except FileNotFoundError:
+        return None  # Entrée évincée pendant la relecture
+    prediction_store.prune(DEFAULT_KEEP_BATCHES)
+    return batch_id
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def build_batch_figures(batch_key: str, _summary: BatchSummary, threshold: float = THRESHOLD,
+                        risk_counts: Optional[Tuple[int, ...]] = None) -> Tuple["go.Figure", "go.Figure"]:
+    """
+    Graphiques d'un batch (construits une seule fois par fichier et par réglage)
+    
+    Args:
+        batch_key (str): Clé de cache du fichier
+        _summary (BatchSummary): Agrégats du batch (non hachés par le cache)
+        threshold (float): Seuil affiché sur l'histogramme
+        risk_counts (Tuple[int, ...]): Effectifs par niveau de risque (ordre de
+                                       RISK_LEVELS), ceux du batch par défaut
+    
+    Returns:
+        Tuple[go.Figure, go.Figure]: Camembert des niveaux de risque, histogramme des probabilités
+    """
+    import plotly.express as px           # Import local: chargé au premier graphique
+    
+    # Distribution des niveaux de risque
+    if risk_counts is None:
+        risk_counts = _summary.risk_counts_series()
+    else:
+        risk_counts = pd.Series(risk_counts, index=RISK_LEVELS)
+        risk_counts = risk_counts[risk_counts > 0].sort_values(ascending=False)
+    fig_pie = px.pie(
+        values=risk_counts.values,
+        names=risk_counts.index,
+        title="Distribution des Niveaux de Risque",
+        color=risk_counts.index,
+        color_discrete_map={'High': '#f44336', 'Medium': '#ff9800', 'Low': '#4caf50'}
+    )
+    
+    # Distribution des probabilités (histogramme agrégé par blocs)
+    histogram = _summary.histogram_frame()
+    fig_hist = px.bar(
+        histogram,
+        x='bin_center',
+        y='count',
+        title="Distribution des Probabilités de Churn",
+        labels={'bin_center': 'Probabilité de Churn', 'count': 'Nombre de clients'},
+        color_discrete_sequence=['#667eea']
+    )
+    fig_hist.update_traces(width=1 / len(histogram))
+    fig_hist.update_layout(bargap=0)
+    fig_hist.add_vline(
+        x=threshold,
+        line_dash="dash",
+        line_color="red",
+        annotation_text=f"Seuil ({threshold})"
+    )
+    return fig_pie, fig_hist
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+def load_probability_index(batch_key: str) -> Optional[ProbabilityIndex]:
+    """
+    Probabilités triées d'un batch (projection mémoire, relue une fois par fichier)
+    
+    Args:
+        batch_key (str): Clé de cache du fichier
+    
+    Returns:
+        ProbabilityIndex: Index, None si ses tableaux ne sont pas (encore) enregistrés ou sont illisibles
+    """
+    return ProbabilityIndex.load(os.path.dirname(result_cache.path(batch_key, RESULTS_FILE)))
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def build_tuning_figure(batch_key: str, _probability_index: ProbabilityIndex, threshold: float) -> "go.Figure":
+    """
+    Courbes précision / rappel / F1 d'un batch étiqueté, sur une grille de seuils
+    
+    Args:
+        batch_key (str): Clé de cache du fichier
+        _probability_index (ProbabilityIndex): Probabilités triées et étiquettes du batch
+        threshold (float): Seuil courant (ligne verticale)
+    
+    Returns:
+        go.Figure: Courbes en fonction du seuil
+    """
+    import plotly.express as px           # Import local: chargé au premier graphique
+    
+    curve = _probability_index.curve(np.round(np.linspace(0.0, 1.0, 101), 2))
+    fig = px.line(
+        curve,
+        x="threshold",
+        y=["precision", "recall", "f1"],
+        title="Précision, Rappel et F1 selon le Seuil",
+        labels={"threshold": "Seuil", "value": "Score", "variable": ""}
+    )
+    fig.add_vline(x=threshold, line_dash="dash", line_color="red")
+    return fig
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def explain_batch(batch_key: str, top_n: Optional[int]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Explications d'un batch: ses top_n clients les plus à risque, ou tout le fichier
+    
+    Args:
+        batch_key (str): Clé de cache du fichier
+        top_n (int): Nombre de clients les plus à risque expliqués (None: tous)
+    
+    Returns:
+        Tuple[pd.DataFrame, pd.DataFrame]: Caractéristiques principales par client
+                                           et importance globale
+    """
+    return explain_results_file(
+        result_cache.path(batch_key, RESULTS_FILE), explainer, top_n, metrics=MetricsRegistry(parent=METRICS)
+    )
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def load_results_page(batch_key: str, start: int, nrows: int, _summary: BatchSummary) -> pd.DataFrame:
+    """
+    Page du fichier de résultats d'un batch
+    
+    Args:
+        batch_key (str): Clé de cache du fichier
+        start (int): Première ligne de la page
+        nrows (int): Nombre de lignes de la page
+        _summary (BatchSummary): Agrégats du batch (colonnes, types et index des positions)
+    
+    Returns:
+        pd.DataFrame: Données clients et prédictions de la page
+    """
+    return read_results_page(
+        result_cache.path(batch_key, RESULTS_FILE), start, nrows,
+        columns=_summary.columns,
+        row_offsets=_summary.row_offsets,
+        dtypes=_summary.dtypes
+    )
+
+def select_page(total: int, key: str) -> Tuple[int, int]:
+    """
+    Sélecteurs de taille de page et de page d'un tableau paginé
+    
+    Args:
+        total (int): Nombre de lignes du tableau
+        key (str): Préfixe des clés des widgets
+    
+    Returns:
+        Tuple[int, int]: Première ligne et nombre de lignes de la page
+    """
+    col_page1, col_page2 = st.columns(2)
+    with col_page1:
+        page_size = st.selectbox("Lignes par page", RESULTS_PAGE_SIZES, key=f"{key}_page_size")
+    page_count = max((total + page_size - 1) // page_size, 1)
+    # Page hors limites après un changement de taille de page ou de fichier
+    if st.session_state.get(f"{key}_page", 1) > page_count:
+        st.session_state[f"{key}_page"] = 1
+    with col_page2:
+        page = int(st.number_input(
+            f"Page (sur {page_count:,})",
+            min_value=1,
+            max_value=page_count,
+            step=1,
+            key=f"{key}_page"
+        ))
+    return (page - 1) * page_size, page_size
+
+# Formats d'export proposés: libellé → (extension, type MIME)
+EXPORT_FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "CSV compressé (.csv.gz)": ("csv.gz", "application/gzip"),
+    "Excel (.xlsx)": ("xlsx", "application/vnd.ms-excel"),
+    "JSON": ("json", "application/json"),
+    "JSON lines (.jsonl)": ("jsonl", "application/x-ndjson"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+
+def export_file_name(extension: str, max_rows: Optional[int] = None) -> str:
+    """Nom d'un export dans le cache (une variante par limite de lignes)"""
+    return f"predictions_max{max_rows}.{extension}" if max_rows else f"predictions.{extension}"
+
+def build_export(batch_key: str, extension: str, max_rows: Optional[int] = None,
+                 dtypes: Optional[Dict[str, str]] = None) -> str:
+    """
+    Construit un export par blocs depuis les résultats en cache (une seule fois)
+    
+    Args:
+        batch_key (str): Clé de cache du fichier
+        extension (str): Format ('csv', 'csv.gz', 'xlsx', 'json', 'jsonl')
+        max_rows (int): Nombre maximum de lignes (Excel uniquement)
+        dtypes (Dict[str, str]): Types des colonnes des résultats (BatchSummary.dtypes)
+    
+    Returns:
+        str: Chemin de l'export
+    """
+    if extension == "csv":
+        # Le fichier de résultats est déjà un CSV
+        return result_cache.path(batch_key, RESULTS_FILE)
+    builders = {
+        "csv.gz": export_csv_gz,
+        "xlsx": lambda results_path, target: export_excel(results_path, target, max_rows=max_rows, dtypes=dtypes),
+        "json": lambda results_path, target: export_json(results_path, target, dtypes=dtypes),
+        "jsonl": lambda results_path, target: export_jsonl(results_path, target, dtypes=dtypes),
+        "parquet": lambda results_path, target: export_parquet(results_path, target, dtypes=dtypes),
+    }
+    build = builders[extension]
+    
+    def timed_build(results_path: str, target: str) -> None:
+        with METRICS.stage("export"):
+            build(results_path, target)
+    
+    return result_cache.export(batch_key, export_file_name(extension, max_rows), timed_build)
+
+def read_export(path: str) -> bytes:
+    """Contenu d'un fichier de résultats ou d'export en cache"""
+    with open(path, "rb") as f:
+        return f.read()
+
 # ============================================================
 # EN-TÊTE DE L'APPLICATION
 # ============================================================
@@ -410,8 +985,8 @@ with st.sidebar:
     st.subheader("Mode d'Analyse")
     mode = st.radio(
         "Choisissez votre méthode de prédiction:",
-        ["Prédiction Individuelle", "Prédiction Batch (Fichier)"],
-        help="Sélectionnez si vous voulez analyser un seul client ou un fichier entier"
+        ["Prédiction Individuelle", "Prédiction Batch (Fichier)", "Historique des Prédictions"],
+        help="Sélectionnez si vous voulez analyser un seul client, un fichier entier ou consulter les prédictions passées"
     )
     
     st.divider()
@@ -421,6 +996,29 @@ with st.sidebar:
     st.metric("Seuil de Décision", f"{THRESHOLD * 100}%")
     st.metric("Features Utilisées", len(features))
     
+    # Latences du modèle mesurées par ce serveur (toutes sessions confondues)
+    with st.expander("📈 Métriques de Prédiction"):
+        stages = METRICS.summary()
+        if "inference" in stages:
+            st.caption(f"Appels au modèle: {stages['inference']['calls']:,} "
+                       f"({stages['inference']['rows']:,} lignes)")
+            st.caption(f"Latence p50: {stages['inference']['p50_ms']:.2f} ms · "
+                       f"p99: {stages['inference']['p99_ms']:.2f} ms")
+        else:
+            st.caption("Aucune prédiction depuis le démarrage")
+        memo = model.stats()
+        if memo["rows"]:
+            st.caption(f"Cache des prédictions: {memo['hit_rate']:.0%} de succès "
+                       f"({memo['hits']:,} / {memo['hits'] + memo['misses']:,} vecteurs) · "
+                       f"{memo['saved_rate']:.0%} des lignes non reprédites")
+        st.download_button(
+            label="Exporter (Prometheus)",
+            data=METRICS.to_prometheus() + model.to_prometheus(),
+            file_name="churn_metrics.prom",
+            mime="text/plain",
+            use_container_width=True
+        )
+    
     st.divider()
     
     # Guide utilisateur
@@ -432,6 +1030,12 @@ with st.sidebar:
         2. Cliquez sur 'Prédire'
         3. Consultez les résultats et recommandations
         """)
+    elif "Historique" in mode:
+        st.info("""
+        **Historique:**
+        1. Choisissez un batch passé pour relire ses prédictions
+        2. Ou saisissez l'identifiant d'un client pour suivre sa probabilité de churn
+        """)
     else:
         st.info("""
         **Prédiction Batch:**
@@ -617,12 +1221,10 @@ if "Individuelle" in mode:
             "contract_type": contract_type
         }
         
-        # Conversion en DataFrame
-        client_df = pd.DataFrame([client_data])
-        
         # Prédiction
         with st.spinner("🔄 Analyse en cours..."):
-            result = make_prediction(client_df)[0]
+            result = predict_client(client_data)
+            record_client_prediction(client_data, result)
         
         # Affichage des résultats
         st.success("✅ Analyse Terminée!")
@@ -715,7 +1317,8 @@ if "Batch" in mode:
        - `voice_minutes`, `support_calls`, `network_quality`
        - `payment_delay`, `auto_payment`, `contract_type`
     
-    2. **Formats acceptés**: CSV, Excel (.xlsx), JSON, TXT (séparateur: virgule ou tabulation)
+    2. **Formats acceptés**: CSV, Excel (.xlsx), JSON, JSON lines (.jsonl),
+       TXT (séparateur: virgule ou tabulation), Parquet, Arrow/Feather
     
     3. **Uploadez le fichier** ci-dessous
     """)
@@ -723,7 +1326,7 @@ if "Batch" in mode:
     # Zone d'upload
     uploaded_file = st.file_uploader(
         "Choisissez un fichier contenant vos données clients",
-        type=["csv", "xlsx", "json", "txt"],
+        type=["csv", "xlsx", "json", "jsonl", "txt", "parquet", "feather", "arrow"],
         help="Le fichier doit contenir les colonnes requises listées ci-dessus"
     )
     
@@ -739,93 +1342,144 @@ if "Batch" in mode:
             
             st.info(f"Fichier chargé: **{uploaded_file.name}** ({file_details['Taille']})")
             
-            # Lecture du fichier selon son extension
+            # Lecture du premier bloc uniquement pour l'aperçu
+            # (le fichier complet est lu par blocs pendant les prédictions)
             with st.spinner("Lecture du fichier en cours..."):
-                if uploaded_file.name.endswith(".csv") or uploaded_file.name.endswith(".txt"):
-                    # Tentative de détection automatique du séparateur
-                    try:
-                        df = pd.read_csv(uploaded_file)
-                    except:
-                        df = pd.read_csv(uploaded_file, sep='\t')
-                
-                elif uploaded_file.name.endswith(".xlsx"):
-                    df = pd.read_excel(uploaded_file)
-                
-                elif uploaded_file.name.endswith(".json"):
-                    df = pd.read_json(uploaded_file)
-                
-                else:
-                    st.error("Format de fichier non supporté")
-                    st.stop()
+                batch_key = uploaded_file_key(uploaded_file)
+                preview_df = load_preview(batch_key, uploaded_file)
+            
+            if preview_df is None:
+                st.error("Le fichier ne contient aucune ligne")
+                st.stop()
             
             # Vérification des données
-            st.success(f"✅ Fichier lu avec succès! **{len(df)} lignes** détectées")
+            st.success(f"✅ Fichier ouvert avec succès! **{len(preview_df.columns)} colonnes** détectées")
             
             # Affichage d'un aperçu des données
             st.subheader("👁️ Aperçu des Données")
             st.dataframe(
-                df.head(10),
+                preview_df,
                 use_container_width=True,
                 height=300
             )
             
-            # Statistiques descriptives
-            with st.expander("Statistiques Descriptives"):
-                st.write(df.describe())
-            
             st.divider()
             
+            # Rescoring incrémental: fichier avec identifiants clients et batch
+            # passé prédit avec le même modèle
+            reference_batch = None
+            if find_client_id_column(preview_df.columns) is not None:
+                reference_batch = prediction_store.find_reference_batch(ARTIFACTS_KEY)
+            if reference_batch is not None:
+                if not st.checkbox(
+                    f"♻️ Ne reprédire que les clients nouveaux ou modifiés depuis le batch #{reference_batch}",
+                    value=True,
+                    help="Les clients identiques à ceux du batch reprennent ses résultats "
+                         "(mêmes valeurs qu'un scoring complet)"
+                ):
+                    reference_batch = None
+            save_history = st.checkbox(
+                "💾 Enregistrer ce batch dans l'historique",
+                value=True,
+                help=f"Seuls les {DEFAULT_KEEP_BATCHES} batchs les plus récents de chaque modèle sont conservés"
+            )
+            
             # Bouton pour lancer les prédictions
             if st.button("🚀 Lancer les Prédictions", use_container_width=True):
+                # Fichier déjà prédit (dans cette session ou une autre): aucun nouveau calcul
+                if not result_cache.contains(batch_key):
+                    run_batch_predictions(uploaded_file, batch_key, reference_batch, save_history)
+                elif save_history:
+                    # Résultats repris du cache: le batch est tout de même ajouté à l'historique
+                    with st.spinner("Enregistrement dans l'historique..."):
+                        history_batch = save_cached_batch(uploaded_file.name, batch_key)
+                    if history_batch is not None:
+                        st.caption(f"💾 Fichier déjà prédit: résultats repris du cache et enregistrés "
+                                   f"dans l'historique (batch #{history_batch})")
+                st.session_state["batch_key"] = batch_key
+            
+            # Résultats du fichier courant, conservés entre les reruns
+            # (ex: clic sur un bouton de téléchargement)
+            summary = None
+            if st.session_state.get("batch_key") == batch_key:
+                summary = result_cache.load_summary(batch_key, BatchSummary)
+                if summary is None:
+                    st.warning("Les résultats de ce fichier ont expiré du cache: relancez les prédictions")
+            
+            if summary is not None:
+                st.success(f" **{summary.total} prédictions** effectuées avec succès!")
+                if summary.reused_rows:
+                    st.caption(f"♻️ {summary.reused_rows:,} clients inchangés repris de l'historique, "
+                               f"{summary.total - summary.reused_rows:,} prédits")
                 
-                # Barre de progression
-                progress_bar = st.progress(0)
-                status_text = st.empty()
-                
-                status_text.text("🔄 Préparation des données...")
-                progress_bar.progress(25)
-                
-                # Prédictions
-                status_text.text("🤖 Prédictions en cours...")
-                progress_bar.progress(50)
-                
-                results = make_prediction(df)
-                
-                status_text.text("Création des résultats...")
-                progress_bar.progress(75)
-                
-                # Conversion en DataFrame
-                results_df = pd.DataFrame(results)
-                
-                # Ajout des index pour correspondance
-                results_df.index = df.index
-                
-                # Fusion avec les données originales
-                final_df = pd.concat([df, results_df], axis=1)
-                
-                progress_bar.progress(100)
-                status_text.text("✅ Prédictions terminées!")
-                
-                # Pause pour l'effet visuel
-                import time
-                time.sleep(0.5)
-                progress_bar.empty()
-                status_text.empty()
+                # Statistiques descriptives (calculées pendant le scoring)
+                with st.expander("Statistiques Descriptives"):
+                    st.write(summary.describe())
+                    if summary.memory.rows:
+                        st.caption(f"💾 Mémoire: {summary.memory}")
                 
-                st.success(f" **{len(results_df)} prédictions** effectuées avec succès!")
+                # Temps par étape du traitement (lecture, encodage, inférence, écriture)
+                stages = summary.stages
+                if stages:
+                    with st.expander("⏱️ Performances du Traitement"):
+                        total_seconds = sum(stats["seconds"] for stats in stages.values()) or 1.0
+                        st.dataframe(
+                            pd.DataFrame([
+                                {
+                                    "Étape": stage,
+                                    "Temps (s)": round(stats["seconds"], 3),
+                                    "Part": f"{stats['seconds'] / total_seconds:.1%}",
+                                    "Lignes/s": f"{stats['rows_per_second']:,.0f}",
+                                    "p50 (ms)": round(stats["p50_ms"], 2),
+                                    "p99 (ms)": round(stats["p99_ms"], 2),
+                                }
+                                for stage, stats in stages.items()
+                            ]),
+                            use_container_width=True,
+                            hide_index=True
+                        )
+                        if summary.peak_memory_bytes:
+                            st.caption(f"Pic de mémoire du serveur: {summary.peak_memory_bytes / 1024 ** 2:,.0f} Mo")
                 
                 # Métriques globales
                 st.subheader("Vue d'Ensemble des Résultats")
                 
+                # Seuil et niveaux de risque réglables: recalculés à partir des
+                # probabilités triées du batch (recherche dichotomique, sans prédiction)
+                threshold = THRESHOLD
+                risk_bins = list(RISK_BINS)
+                risk_counts = None
+                probability_index = load_probability_index(batch_key)
+                if probability_index is not None and len(probability_index):
+                    col_tune1, col_tune2 = st.columns(2)
+                    with col_tune1:
+                        threshold = st.slider(
+                            "🎚️ Seuil de décision", min_value=0.0, max_value=1.0,
+                            value=THRESHOLD, step=0.01, key="tuning_threshold"
+                        )
+                    with col_tune2:
+                        risk_bins = list(st.slider(
+                            "🎚️ Bornes des niveaux de risque (Medium, High)", min_value=0.0, max_value=1.0,
+                            value=tuple(RISK_BINS), step=0.01, key="tuning_risk_bins"
+                        ))
+                    churn_count = probability_index.churn_count(threshold)
+                    risk_counts = tuple(int(count) for count in probability_index.risk_counts(risk_bins))
+                    if threshold != THRESHOLD or risk_bins != RISK_BINS:
+                        st.caption(
+                            f"Les fichiers de résultats gardent le seuil {THRESHOLD} et les bornes "
+                            f"{RISK_BINS[0]} / {RISK_BINS[1]} du modèle"
+                        )
+                else:
+                    churn_count = summary.churn_count
+                
                 col_stats1, col_stats2, col_stats3, col_stats4 = st.columns(4)
                 
                 with col_stats1:
-                    total_clients = len(results_df)
+                    total_clients = summary.total
                     st.metric("Total Clients", f"{total_clients:,}")
                 
                 with col_stats2:
-                    churn_count = results_df['churn_prediction'].sum()
-                    churn_rate = (churn_count / total_clients) * 100
+                    churn_rate = churn_count / total_clients * 100 if total_clients else 0.0
                     st.metric(
                         "Clients à Risque",
                         f"{churn_count:,}",
@@ -834,13 +1488,27 @@ if "Batch" in mode:
                     )
                 
                 with col_stats3:
-                    high_risk = (results_df['risk_level'] == 'High').sum()
+                    high_risk = int((summary.risk_counts if risk_counts is None else risk_counts)[RISK_LEVELS.index('High')])
                     st.metric("Risque Élevé 🔴", f"{high_risk:,}")
                 
                 with col_stats4:
-                    avg_prob = results_df['churn_probability'].mean()
+                    avg_prob = summary.mean_probability
                     st.metric("Prob. Moyenne", f"{avg_prob * 100:.1f}%")
                 
+                # Qualité du seuil quand le fichier contient le churn réel
+                if probability_index is not None and probability_index.has_labels:
+                    scores = probability_index.scores(threshold)
+                    col_score1, col_score2, col_score3 = st.columns(3)
+                    col_score1.metric("Précision", f"{scores['precision']:.1%}")
+                    col_score2.metric("Rappel", f"{scores['recall']:.1%}")
+                    col_score3.metric("F1", f"{scores['f1']:.3f}")
+                    with st.expander("📈 Précision / Rappel / F1 selon le Seuil"):
+                        st.plotly_chart(
+                            build_tuning_figure(batch_key, probability_index, threshold),
+                            use_container_width=True
+                        )
+                        st.caption(f"Calculé sur les {int(probability_index.labelled[-1]):,} clients étiquetés du fichier")
+                
                 st.divider()
                 
                 # Visualisations des résultats batch
@@ -848,94 +1516,147 @@ if "Batch" in mode:
                 
                 col_chart1, col_chart2 = st.columns(2)
                 
+                fig_pie, fig_hist = build_batch_figures(batch_key, summary, threshold, risk_counts)
+                
                 with col_chart1:
-                    # Distribution des niveaux de risque
-                    risk_counts = results_df['risk_level'].value_counts()
-                    fig_pie = px.pie(
-                        values=risk_counts.values,
-                        names=risk_counts.index,
-                        title="Distribution des Niveaux de Risque",
-                        color=risk_counts.index,
-                        color_discrete_map={'High': '#f44336', 'Medium': '#ff9800', 'Low': '#4caf50'}
-                    )
                     st.plotly_chart(fig_pie, use_container_width=True)
                 
                 with col_chart2:
-                    # Distribution des probabilités
-                    fig_hist = px.histogram(
-                        results_df,
-                        x='churn_probability',
-                        nbins=30,
-                        title="Distribution des Probabilités de Churn",
-                        labels={'churn_probability': 'Probabilité de Churn'},
-                        color_discrete_sequence=['#667eea']
-                    )
-                    fig_hist.add_vline(
-                        x=THRESHOLD,
-                        line_dash="dash",
-                        line_color="red",
-                        annotation_text=f"Seuil ({THRESHOLD})"
-                    )
                     st.plotly_chart(fig_hist, use_container_width=True)
                 
                 # Top clients à risque
                 st.subheader("🚨 Top 10 Clients à Plus Haut Risque")
-                top_risk = final_df.nlargest(10, 'churn_probability')
+                top_risk = summary.top_risk
                 st.dataframe(
                     top_risk,
                     use_container_width=True,
                     height=350
                 )
                 
+                # Explications: calculées à la demande, pour les clients les plus à risque ou tout le fichier
+                if explainer is not None:
+                    with st.expander("🔍 Pourquoi ces Clients sont-ils à Risque ?"):
+                        col_exp1, col_exp2 = st.columns(2)
+                        with col_exp1:
+                            explain_scope = st.radio(
+                                "Clients expliqués", ["Les plus à risque", "Tout le fichier"],
+                                horizontal=True, key="explain_scope"
+                            )
+                        top_n = None
+                        if explain_scope == "Les plus à risque":
+                            with col_exp2:
+                                top_n = int(st.number_input(
+                                    "Nombre de clients", min_value=1, max_value=max(summary.total, 1),
+                                    value=min(DEFAULT_EXPLAIN_ROWS, max(summary.total, 1)), step=100,
+                                    key="explain_rows"
+                                ))
+                        if st.button("🔍 Calculer les explications", use_container_width=True):
+                            st.session_state["explain_request"] = (batch_key, top_n)
+                        
+                        explain_request = st.session_state.get("explain_request")
+                        if explain_request is not None and explain_request[0] == batch_key:
+                            with st.spinner("Calcul des contributions..."):
+                                explained_rows, importance = explain_batch(*explain_request)
+                            import plotly.express as px  # Import local: chargé au premier graphique
+                            
+                            scope_label = ("tout le fichier" if explain_request[1] is None
+                                           else f"les {explain_request[1]:,} clients les plus à risque")
+                            fig_importance = px.bar(
+                                importance.iloc[::-1].assign(
+                                    label=[feature_label(name) for name in importance.index[::-1]],
+                                    importance=lambda frame: frame["mean_abs_contribution"] * 100
+                                ),
+                                x="importance",
+                                y="label",
+                                orientation="h",
+                                title=f"Importance des Caractéristiques ({scope_label})",
+                                labels={"importance": "Contribution moyenne (points de %)", "label": ""},
+                                color_discrete_sequence=['#667eea']
+                            )
+                            st.plotly_chart(fig_importance, use_container_width=True)
+                            if not explained_rows.empty:
+                                id_column = find_client_id_column(explained_rows.columns)
+                                shown = ([id_column] if id_column else []) + ["churn_probability", "risk_level"] + [
+                                    column for column in explained_rows.columns if column.startswith("top")
+                                ]
+                                st.dataframe(explained_rows[shown], use_container_width=True, height=350)
+                                st.caption("Contribution: part de la probabilité de churn due à la caractéristique "
+                                           "(positive: vers le départ, négative: vers la fidélité)")
+                
+                # Recommandations du batch
+                if summary.recommendation_counts.any():
+                    st.subheader("🎯 Recommandations du Batch")
+                    recommendations_df = summary.recommendation_frame()
+                    st.dataframe(
+                        pd.DataFrame({
+                            "Recommandation": recommendations_df["label"],
+                            "Code": recommendations_df["code"],
+                            "Clients": recommendations_df["count"].map("{:,}".format),
+                            "Part": recommendations_df["share"].map("{:.1%}".format),
+                        }),
+                        use_container_width=True,
+                        hide_index=True
+                    )
+                    st.caption("La colonne `recommendations` des résultats liste les codes appliqués à chaque client.")
+                
                 st.divider()
                 
-                # Téléchargement des résultats
+                # Téléchargement des résultats (relus depuis le cache disque)
                 st.subheader("Télécharger les Résultats")
                 
-                col_dl1, col_dl2, col_dl3 = st.columns(3)
+                col_dl1, col_dl2 = st.columns(2)
                 
                 with col_dl1:
-                    # CSV
-                    csv = final_df.to_csv(index=False).encode('utf-8')
-                    st.download_button(
-                        label="📥 Télécharger CSV",
-                        data=csv,
-                        file_name=f'predictions_churn_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv',
-                        mime='text/csv',
-                        use_container_width=True
-                    )
+                    export_label = st.selectbox("Format d'export", list(EXPORT_FORMATS))
+                    extension, mime = EXPORT_FORMATS[export_label]
                 
                 with col_dl2:
-                    # Excel
-                    from io import BytesIO
-                    buffer = BytesIO()
-                    with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
-                        final_df.to_excel(writer, sheet_name='Predictions', index=False)
-                    buffer.seek(0)
-                    
-                    st.download_button(
-                        label="📥 Télécharger Excel",
-                        data=buffer,
-                        file_name=f'predictions_churn_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx',
-                        mime='application/vnd.ms-excel',
-                        use_container_width=True
-                    )
+                    # Excel: nombre de lignes limité, ou plusieurs feuilles au-delà de la limite Excel
+                    max_rows = None
+                    if extension == "xlsx":
+                        if st.checkbox("Limiter le nombre de lignes", value=summary.total > EXCEL_MAX_ROWS):
+                            max_rows = int(st.number_input(
+                                "Lignes exportées",
+                                min_value=1,
+                                max_value=max(summary.total, 1),
+                                value=min(summary.total, 100_000) or 1,
+                                step=1000
+                            ))
+                            if max_rows >= summary.total:
+                                max_rows = None
+                        elif summary.total > EXCEL_MAX_ROWS:
+                            st.caption(f"Plus de {EXCEL_MAX_ROWS:,} lignes: "
+                                       "les résultats sont répartis sur plusieurs feuilles")
                 
-                with col_dl3:
-                    # JSON
-                    json_str = final_df.to_json(orient='records', indent=2)
+                # Les exports ne sont construits qu'à la demande, puis gardés en cache
+                if extension == "csv":
+                    export_path = result_cache.path(batch_key, RESULTS_FILE)
+                else:
+                    export_path = result_cache.path(batch_key, export_file_name(extension, max_rows))
+                
+                if not os.path.exists(export_path):
+                    if st.button("⚙️ Préparer l'export", use_container_width=True):
+                        with st.spinner("Préparation de l'export..."):
+                            export_path = build_export(batch_key, extension, max_rows, summary.dtypes)
+                
+                if os.path.exists(export_path):
+                    # Contenu lu seulement au clic (callable): un rerun ne relit pas le fichier
                     st.download_button(
-                        label="📥 Télécharger JSON",
-                        data=json_str,
-                        file_name=f'predictions_churn_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json',
-                        mime='application/json',
+                        label=f"📥 Télécharger {export_label}",
+                        data=lambda export_path=export_path: read_export(export_path),
+                        file_name=f'predictions_churn_{datetime.now().strftime("%Y%m%d_%H%M%S")}.{extension}',
+                        mime=mime,
                         use_container_width=True
                     )
                 
-                # Affichage complet des résultats
+                # Affichage des résultats page par page (seule la page affichée est envoyée au navigateur)
                 with st.expander("Voir Tous les Résultats"):
+                    start, page_size = select_page(summary.total, "results")
+                    results_page = load_results_page(batch_key, start, page_size, summary)
+                    st.caption(f"Lignes {start + 1:,} à {start + len(results_page):,} sur {summary.total:,} "
+                               "(fichier complet disponible en téléchargement)")
                     st.dataframe(
-                        final_df,
+                        results_page,
                         use_container_width=True,
                         height=500
                     )
@@ -948,6 +1669,73 @@ if "Batch" in mode:
             with st.expander("Détails de l'erreur (Debug)"):
                 st.code(str(e))
 
+# ============================================================
+# MODE HISTORIQUE DES PRÉDICTIONS
+# ============================================================
+
+if "Historique" in mode:
+    st.header("📜 Historique des Prédictions")
+    st.markdown("Prédictions enregistrées à chaque batch et à chaque soumission du formulaire, "
+                "relues sans relancer le modèle.")
+    
+    batches = prediction_store.batches(HISTORY_BATCHES)
+    if batches.empty:
+        st.info("Aucune prédiction enregistrée pour le moment")
+    else:
+        # Batchs récents
+        st.subheader("🗂️ Batchs Récents")
+        st.dataframe(
+            pd.DataFrame({
+                "Batch": batches["batch_id"],
+                "Date": batches["scored_at"].dt.strftime("%d/%m/%Y %H:%M:%S"),
+                "Source": batches["source"],
+                "Lignes": batches["rows"],
+                "Seuil": batches["threshold"],
+            }),
+            use_container_width=True,
+            hide_index=True
+        )
+        
+        # Prédictions d'un batch passé, page par page
+        finished = batches.dropna(subset=["rows"])
+        batch_labels = {
+            int(row.batch_id): f"#{row.batch_id} · {row.source} · {row.scored_at:%d/%m/%Y %H:%M} · {int(row.rows):,} lignes"
+            for row in finished.itertuples()
+        }
+        if batch_labels:
+            batch_id = st.selectbox("Batch", list(batch_labels), format_func=batch_labels.get)
+            batch_rows = int(finished.loc[finished["batch_id"] == batch_id, "rows"].iloc[0])
+            start, page_size = select_page(batch_rows, "history")
+            batch_page = prediction_store.load_batch(batch_id, start, page_size)
+            st.caption(f"Lignes {start + 1:,} à {start + len(batch_page):,} sur {batch_rows:,}")
+            st.dataframe(batch_page, use_container_width=True, height=400)
+        
+        st.divider()
+        
+        # Évolution de la probabilité de churn d'un client
+        st.subheader("📈 Historique d'un Client")
+        client_id = st.text_input(
+            "Identifiant client",
+            help="Colonne client_id, customer_id, customerID ou id du fichier"
+        ).strip()
+        if client_id:
+            history = prediction_store.client_history(client_id)
+            if history.empty:
+                st.warning(f"Aucune prédiction enregistrée pour le client {client_id}")
+            else:
+                st.line_chart(history.set_index("scored_at")["churn_probability"])
+                st.dataframe(
+                    pd.DataFrame({
+                        "Date": history["scored_at"].dt.strftime("%d/%m/%Y %H:%M:%S"),
+                        "Batch": history["batch_id"],
+                        "Probabilité": history["churn_probability"].map("{:.1%}".format),
+                        "Prédiction": history["churn_prediction"],
+                        "Niveau de risque": history["risk_level"],
+                    }),
+                    use_container_width=True,
+                    hide_index=True
+                )
+
 # ============================================================
 # FOOTER
 # ============================================================
@@ -0,0 +1,109 @@
+# ============================================================
+# TESTS DU SERVICE DE SCORING REST
+# ============================================================
+# Description: Réponses du service: résultats du cœur de
+#              prédiction (200), requêtes invalides (400),
+#              ressources inconnues (404) et erreurs du modèle (500)
+# ============================================================
+
+# ============================================================
+# IMPORTATION DES BIBLIOTHÈQUES
+# ============================================================
+
+import http.client                        # Client HTTP des tests
+import json                               # Corps des requêtes et réponses
+import threading                          # Serveur en arrière-plan
+
+import pytest                             # Serveur partagé par les tests
+
+from churn_api import create_server
+from churn_core import predict_records
+from conftest import make_clients
+
+@pytest.fixture(scope="module")
+def server(artifact_paths):
+    """Service sur un port libre, avec les artefacts synthétiques"""
+    model_path, scaler_path, features_path = artifact_paths
+    server = create_server(port=0, model_path=model_path, scaler_path=scaler_path, features_path=features_path)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.batcher.close()
+    server.server_close()
+
+def _request(server, method: str, path: str, body=None):
+    """Statut et corps JSON décodé d'une requête"""
+    connection = http.client.HTTPConnection(*server.server_address, timeout=10)
+    try:
+        payload = body if isinstance(body, (bytes, type(None))) else json.dumps(body).encode("utf-8")
+        connection.request(method, path, body=payload, headers={"Content-Type": "application/json"})
+        response = connection.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        connection.close()
+
+def _clients(n_rows: int, seed: int):
+    return make_clients(n_rows, seed=seed).drop(columns="client_id").to_dict("records")
+
+# ============================================================
+# PRÉDICTIONS
+# ============================================================
+
+def test_predict_matches_core(artifacts, encoder, server):
+    """/predict et /predict/batch: résultats de predict_records"""
+    clients = _clients(5, seed=27)
+    expected = predict_records(clients, artifacts[0], encoder)
+
+    status, result = _request(server, "POST", "/predict", clients[0])
+    assert (status, result) == (200, expected[0])
+    status, result = _request(server, "POST", "/predict/batch", {"clients": clients})
+    assert (status, result) == (200, {"count": 5, "predictions": expected})
+    status, result = _request(server, "POST", "/predict/batch", clients)
+    assert result["predictions"] == expected
+
+    status, health = _request(server, "GET", "/health")
+    assert status == 200 and health["status"] == "ok"
+
+# ============================================================
+# ERREURS
+# ============================================================
+
+@pytest.mark.parametrize("path, body, message", [
+    ("/predict", b"", "vide"),
+    ("/predict", b"{", "JSON invalide"),
+    ("/predict", [1, 2], "objet JSON"),
+    ("/predict", {"age": 30}, "Colonnes manquantes"),
+    ("/predict", {**_clients(1, seed=28)[0], "age": "trente"}, "Valeur invalide"),
+    ("/predict/batch", {"clients": "C-1"}, "liste de clients"),
+    ("/predict/batch", [_clients(1, seed=28)[0], {"age": 30}], "Colonnes manquantes"),
+])
+def test_invalid_requests(server, path, body, message):
+    """Corps vide, JSON invalide, client incomplet ou non numérique: 400"""
+    status, result = _request(server, "POST", path, body)
+    assert status == 400
+    assert message in result["error"]
+
+@pytest.mark.parametrize("method, path", [("GET", "/predict"), ("POST", "/score")])
+def test_unknown_resources(server, method, path):
+    """Ressource inconnue: 404"""
+    status, result = _request(server, method, path, _clients(1, seed=29)[0] if method == "POST" else None)
+    assert status == 404
+    assert path in result["error"]
+
+def test_model_error(server, monkeypatch):
+    """Erreur inattendue du modèle: 500, le service continue de répondre"""
+
+    class BrokenModel:
+        def predict_proba(self, X):
+            raise RuntimeError("modèle indisponible")
+
+    clients = _clients(2, seed=30)
+    monkeypatch.setattr(server, "model", BrokenModel())
+    status, result = _request(server, "POST", "/predict/batch", clients)
+    assert status == 500
+    assert "modèle indisponible" in result["error"]
+
+    monkeypatch.undo()
+    status, _ = _request(server, "POST", "/predict/batch", clients)
+    assert status == 200
@@ -0,0 +1,79 @@
+# ============================================================
+# TESTS DU MICRO-BATCHING
+# ============================================================
+# Description: Les requêtes regroupées doivent recevoir le résultat
+#              d'une prédiction seule, et une requête invalide ne
+#              doit faire échouer qu'elle-même
+# ============================================================
+
+# ============================================================
+# IMPORTATION DES BIBLIOTHÈQUES
+# ============================================================
+
+import threading                          # Lot bloqué pendant l'arrivée des requêtes
+
+import pytest                             # Vérification des erreurs
+
+from churn_batching import MicroBatcher
+from churn_core import predict_records
+from conftest import make_clients
+
+def _records(n_rows: int, seed: int):
+    return make_clients(n_rows, seed=seed).drop(columns="client_id").to_dict("records")
+
+@pytest.fixture
+def blocked_batcher(artifacts, encoder):
+    """Regroupement dont le premier lot attend release: les requêtes suivantes s'accumulent"""
+    started, release = threading.Event(), threading.Event()
+    batches = []
+
+    def predict_batch(records):
+        batches.append(len(records))
+        if len(batches) == 1:
+            started.set()
+            assert release.wait(10)
+        return predict_records(records, artifacts[0], encoder)
+
+    batcher = MicroBatcher(predict_batch, max_batch_size=16)
+    yield batcher, started, release, batches
+    release.set()
+    batcher.close()
+
+def test_grouped_results_match_single_predictions(artifacts, encoder, blocked_batcher):
+    """Chaque appelant reçoit le résultat de sa propre prédiction"""
+    batcher, started, release, batches = blocked_batcher
+    records = _records(21, seed=24)
+    first = batcher.submit(records[0])
+    assert started.wait(10)
+    futures = [batcher.submit(record) for record in records[1:]]
+    release.set()
+
+    results = [first.result(10)] + [future.result(10) for future in futures]
+    assert results == predict_records(records, artifacts[0], encoder)
+    assert batches == [1, 16, 4]
+    assert batcher.mean_batch_size == 7
+
+def test_invalid_request_fails_alone(artifacts, encoder, blocked_batcher):
+    """Client invalide dans un lot: erreur pour son appelant, résultat pour les autres"""
+    batcher, started, release, batches = blocked_batcher
+    records = _records(6, seed=25)
+    records[3]["age"] = "inconnu"
+    first = batcher.submit(records[0])
+    assert started.wait(10)
+    futures = [batcher.submit(record) for record in records[1:]]
+    release.set()
+
+    assert first.result(10) == predict_records(records[:1], artifacts[0], encoder)[0]
+    with pytest.raises(ValueError):
+        futures[2].result(10)
+    for i in [1, 2, 4, 5]:
+        assert futures[i - 1].result(10) == predict_records([records[i]], artifacts[0], encoder)[0]
+
+def test_closed_batcher_rejects_requests(artifacts, encoder):
+    """Après close: les nouvelles requêtes sont refusées"""
+    batcher = MicroBatcher(lambda records: predict_records(records, artifacts[0], encoder))
+    record = _records(1, seed=26)[0]
+    assert batcher.predict(record, timeout=10) == predict_records([record], artifacts[0], encoder)[0]
+    batcher.close()
+    with pytest.raises(RuntimeError):
+        batcher.submit(record)
@@ -0,0 +1,174 @@
+# ============================================================
+# TESTS DU CACHE DES RÉSULTATS BATCH
+# ============================================================
+# Description: Résultats relus par leur clé et évincés du moins
+#              récemment utilisé; exports construits une seule
+#              fois, sans bloquer les autres entrées du cache ni
+#              laisser de fichier partiel;
+#              fichiers de batchs interrompus comptés puis supprimés
+# ============================================================
+
+# ============================================================
+# IMPORTATION DES BIBLIOTHÈQUES
+# ============================================================
+
+import os                                 # Fichiers du cache
+import threading                          # Sessions concurrentes
+import time                               # Ancienneté des fichiers en cours d'écriture
+
+import pandas as pd                       # Bloc de résultats des agrégats
+import pytest                             # Vérification des erreurs
+
+from churn_cache import RESULTS_FILE, STALE_SPOOL_SECONDS, ResultCache, fingerprint_files, hash_content, make_key
+from churn_core import RISK_LEVELS
+from churn_stream import BatchSummary
+
+def _cached_entry(cache: ResultCache, key: str) -> None:
+    """Entrée minimale: un fichier de résultats et ses agrégats"""
+    with cache.new_spool() as spool:
+        spool.write("age,churn_probability\n30,0.5\n")
+    cache.store(key, spool.name, BatchSummary())
+
+def _entry_files(cache: ResultCache, key: str):
+    return sorted(os.listdir(os.path.join(cache.directory, key)))
+
+# ============================================================
+# CLÉS ET ENTRÉES
+# ============================================================
+
+def test_keys_follow_content_and_artifacts(tmp_path):
+    """Même contenu: même clé (fichier ou flux); artefact modifié: nouvelle empreinte"""
+    data = tmp_path / "clients.csv"
+    data.write_bytes(b"age\n30\n" * 1000)
+    with open(data, "rb") as f:
+        f.seek(5)
+        assert hash_content(f) == hash_content(str(data))
+        assert f.tell() == 5
+    assert make_key(hash_content(str(data)), "csv", 0.5) != make_key(hash_content(str(data)), "csv", 0.6)
+
+    artifact = tmp_path / "model.pkl"
+    artifact.write_bytes(b"a")
+    before = fingerprint_files([str(artifact)])
+    assert fingerprint_files([str(artifact)]) == before
+    artifact.write_bytes(b"ab")
+    assert fingerprint_files([str(artifact)]) != before
+
+def test_store_and_load_summary(tmp_path):
+    """Résultats et agrégats relus d'une session à l'autre; entrée absente ou illisible: None"""
+    summary = BatchSummary()
+    summary.update(pd.DataFrame({
+        "age": [30, 40], "churn_probability": [0.2, 0.7], "churn_prediction": [0, 1],
+        "risk_level": pd.Categorical(["Low", "High"], categories=RISK_LEVELS),
+    }))
+    cache = ResultCache(str(tmp_path / "cache"))
+    assert cache.load_summary("a", BatchSummary) is None
+    with cache.new_spool() as spool:
+        spool.write("age,churn_probability\n30,0.2\n40,0.7\n")
+    cache.store("a", spool.name, summary)
+    assert not os.path.exists(spool.name)
+
+    restored = ResultCache(str(tmp_path / "cache")).load_summary("a", BatchSummary)
+    assert (restored.total, restored.churn_count) == (2, 1)
+    assert restored.dtypes == summary.dtypes
+
+    with open(cache.path("a", "summary.json"), "w") as f:
+        f.write("{")
+    assert cache.load_summary("a", BatchSummary) is None
+
+def test_evicts_least_recently_used(tmp_path):
+    """Au-delà de max_bytes: entrées les moins récemment utilisées supprimées, entrée relue gardée"""
+    cache = ResultCache(str(tmp_path / "cache"), max_bytes=10_000)
+    for key in "abc":
+        _cached_entry(cache, key)
+    entry_bytes = cache.entry_size("a")
+    cache.max_bytes = 3 * entry_bytes
+    for age, key in enumerate("cba"):
+        old = time.time() - 100 * (age + 1)
+        os.utime(os.path.join(cache.directory, key), (old, old))
+    assert cache.load_summary("a", BatchSummary) is not None   # "a" redevient la plus récente
+
+    _cached_entry(cache, "d")
+    assert sorted(cache.keys()) == ["a", "c", "d"]
+    assert cache.size_bytes <= cache.max_bytes
+    cache.clear()
+    assert cache.keys() == []
+
+# ============================================================
+# EXPORTS
+# ============================================================
+
+def test_export_failure_leaves_no_partial_file(tmp_path):
+    """Construction en erreur: aucun fichier temporaire, export reconstruit ensuite"""
+    cache = ResultCache(str(tmp_path / "cache"))
+    _cached_entry(cache, "a")
+
+    def failing_build(results_path, target):
+        with open(target, "w") as f:
+            f.write("incomplet")
+        raise RuntimeError("export interrompu")
+
+    with pytest.raises(RuntimeError):
+        cache.export("a", "predictions.json", failing_build)
+    assert _entry_files(cache, "a") == [RESULTS_FILE, "summary.json"]
+
+    path = cache.export("a", "predictions.json", lambda results_path, target: open(target, "w").close())
+    assert os.path.exists(path)
+
+def test_export_does_not_block_other_entries(tmp_path):
+    """Un export long n'empêche ni l'enregistrement ni l'export d'une autre entrée"""
+    cache = ResultCache(str(tmp_path / "cache"))
+    _cached_entry(cache, "a")
+    _cached_entry(cache, "b")
+    started, release = threading.Event(), threading.Event()
+    builds = []
+
+    def slow_build(results_path, target):
+        builds.append(target)
+        started.set()
+        assert release.wait(10)
+        open(target, "w").close()
+
+    workers = [threading.Thread(target=cache.export, args=("a", "predictions.xlsx", slow_build))
+               for _ in range(2)]
+    for worker in workers:
+        worker.start()
+    assert started.wait(10)
+
+    # Pendant la construction: autre entrée enregistrée et exportée
+    _cached_entry(cache, "c")
+    cache.export("b", "predictions.json", lambda results_path, target: open(target, "w").close())
+    cache.evict()
+    assert cache.contains("c")
+
+    release.set()
+    for worker in workers:
+        worker.join(10)
+    # Deux demandes simultanées du même export: une seule construction
+    assert len(builds) == 1
+    assert os.path.exists(cache.path("a", "predictions.xlsx"))
+
+# ============================================================
+# FICHIERS EN COURS D'ÉCRITURE
+# ============================================================
+
+def test_stale_spools_removed_and_counted(tmp_path):
+    """Fichier d'un batch interrompu supprimé au démarrage et à l'éviction, fichier actif compté"""
+    cache = ResultCache(str(tmp_path / "cache"))
+    with cache.new_spool() as stale:
+        stale.write("x" * 100)
+    old = time.time() - STALE_SPOOL_SECONDS - 60
+    os.utime(stale.name, (old, old))
+    with cache.new_spool() as active:
+        active.write("y" * 50)
+    assert cache.size_bytes == 150
+
+    # Redémarrage: seul le fichier abandonné est supprimé
+    cache = ResultCache(str(tmp_path / "cache"))
+    assert not os.path.exists(stale.name)
+    assert cache.size_bytes == 50
+
+    # Batch arrêté pendant que le serveur tourne: supprimé à la prochaine éviction
+    os.utime(active.name, (old, old))
+    _cached_entry(cache, "a")
+    assert not os.path.exists(active.name)
+    assert cache.keys() == ["a"]
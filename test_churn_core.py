@@ -0,0 +1,60 @@
+# ============================================================
+# TESTS DU POST-TRAITEMENT DES PRÉDICTIONS
+# ============================================================
+# Description: build_results_frame doit rendre les colonnes de
+#              l'ancienne boucle ligne par ligne, et
+#              round_probabilities l'arrondi round(float(p), 3)
+# ============================================================
+
+# ============================================================
+# IMPORTATION DES BIBLIOTHÈQUES
+# ============================================================
+
+import numpy as np                        # Comparaisons exactes
+import pandas as pd                       # Résultats sous forme de DataFrame
+
+from churn_core import build_results_frame, predict_probabilities, round_probabilities
+from conftest import make_clients
+
+def _legacy_results(probabilities, threshold: float = 0.5) -> pd.DataFrame:
+    """Ancien make_prediction: un dictionnaire par ligne"""
+    results = []
+    for prob in probabilities:
+        risk = "High" if prob >= 0.6 else "Medium" if prob >= 0.4 else "Low"
+        results.append({
+            "churn_probability": round(float(prob), 3),
+            "churn_prediction": int(prob >= threshold),
+            "risk_level": risk,
+        })
+    return pd.DataFrame(results)
+
+# ============================================================
+# ARRONDI ET RÉSULTATS
+# ============================================================
+
+def test_round_probabilities_ties():
+    """Cas limites (demi-millièmes) arrondis comme round(float(p), 3)"""
+    ties = np.arange(2001) / 2000                 # 0.0005, 0.0015, ... 0.9995
+    trees = np.arange(1001) / 1000 + 0.0005       # Moyennes d'arbres du type 0.9725
+    rng = np.random.default_rng(6)
+    probabilities = np.concatenate([ties, trees, rng.random(5000), [0.0625, 0.9725, 0.1235]])
+
+    expected = [round(float(p), 3) for p in probabilities]
+    assert round_probabilities(probabilities).tolist() == expected
+
+def test_build_results_frame():
+    """Seuil inclusif et niveaux de risque bornés par RISK_BINS"""
+    proba = np.array([0.0, 0.3999, 0.4, 0.5, 0.5999, 0.6, 1.0])
+    results = build_results_frame(proba, threshold=0.5, index=pd.RangeIndex(7))
+    assert results["churn_prediction"].tolist() == [0, 0, 0, 1, 1, 1, 1]
+    assert results["risk_level"].tolist() == ["Low", "Low", "Medium", "Medium", "Medium", "High", "High"]
+    assert results["churn_probability"].tolist() == [0.0, 0.4, 0.4, 0.5, 0.6, 0.6, 1.0]
+
+def test_build_results_frame_matches_legacy_loop(artifacts, encoder):
+    """Probabilités d'une forêt: mêmes valeurs que la boucle ligne par ligne"""
+    probabilities = predict_probabilities(make_clients(2000, seed=16), artifacts[0], encoder)
+    results = build_results_frame(probabilities, threshold=0.45)
+    expected = _legacy_results(probabilities, threshold=0.45)
+    assert results["churn_probability"].tolist() == expected["churn_probability"].tolist()
+    assert results["churn_prediction"].tolist() == expected["churn_prediction"].tolist()
+    assert results["risk_level"].astype(str).tolist() == expected["risk_level"].tolist()
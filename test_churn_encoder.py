@@ -0,0 +1,84 @@
+# ============================================================
+# TESTS DE L'ENCODEUR PRÉCOMPILÉ
+# ============================================================
+# Description: FeatureEncoder doit reproduire pd.get_dummies +
+#              reindex sur les colonnes du modèle, quel que soit
+#              le type des colonnes ou la forme des données, puis
+#              scaler.transform quand le scaler est fusionné
+# ============================================================
+
+# ============================================================
+# IMPORTATION DES BIBLIOTHÈQUES
+# ============================================================
+
+import numpy as np                        # Comparaisons exactes
+import pandas as pd                       # Encodage de référence
+import pytest                             # Vérification des erreurs
+from sklearn.preprocessing import StandardScaler  # Scaler ajusté sur d'autres colonnes
+
+from churn_core import CATEGORICAL_COLUMNS, FeatureEncoder, predict_probabilities
+from conftest import baseline_matrix, make_clients
+
+def _dummies(df: pd.DataFrame, features) -> np.ndarray:
+    """Encodage historique sans standardisation: get_dummies + reindex"""
+    encoded = pd.get_dummies(df.drop(columns="client_id", errors="ignore"), columns=CATEGORICAL_COLUMNS)
+    return encoded.reindex(columns=features, fill_value=0).to_numpy(dtype=np.float64)
+
+# ============================================================
+# ENCODAGE
+# ============================================================
+
+def test_encoder_matches_get_dummies(artifacts):
+    """Matrice identique à get_dummies + reindex, en float64"""
+    features = artifacts[2]
+    df = make_clients(500, seed=3)
+    X = FeatureEncoder(features).transform(df)
+    assert X.dtype == np.float64
+    np.testing.assert_array_equal(X, _dummies(df, features))
+
+def test_encoder_categorical_and_records(artifacts):
+    """Colonne category (lecture typée) et dictionnaires: même matrice"""
+    encoder = FeatureEncoder(artifacts[2])
+    df = make_clients(200, seed=4)
+    expected = encoder.transform(df)
+
+    typed = df.astype({"contract_type": "category"})
+    np.testing.assert_array_equal(encoder.transform(typed), expected)
+    records = df.drop(columns="client_id").to_dict("records")
+    np.testing.assert_array_equal(encoder.transform_records(records), expected)
+
+def test_encoder_unknown_category_and_missing_column(artifacts):
+    """Catégorie inconnue: aucune colonne one-hot; colonne absente: 0 (reindex)"""
+    features = artifacts[2]
+    df = make_clients(50, seed=5, contracts=["One year"]).drop(columns="auto_payment")
+    np.testing.assert_array_equal(FeatureEncoder(features).transform(df), _dummies(df, features))
+
+# ============================================================
+# STANDARDISATION FUSIONNÉE
+# ============================================================
+
+def test_fused_scaler_matches_baseline(artifacts, encoder):
+    """Matrice et probabilités identiques à get_dummies + scaler.transform"""
+    model, scaler, features = artifacts
+    df = make_clients(500, seed=3)
+    expected = baseline_matrix(df, features, scaler)
+
+    X = encoder.transform(df)
+    assert X.dtype == np.float32
+    np.testing.assert_array_equal(X, expected.astype(np.float32))
+    np.testing.assert_array_equal(predict_probabilities(df, model, encoder),
+                                  model.predict_proba(expected)[:, 1])
+
+def test_fused_scaler_unknown_category_and_missing_column(artifacts, encoder):
+    """Catégorie inconnue et colonne absente: standardisées comme les zéros de reindex"""
+    _, scaler, features = artifacts
+    df = make_clients(50, seed=5, contracts=["One year"]).drop(columns="auto_payment")
+    np.testing.assert_array_equal(encoder.transform(df),
+                                  baseline_matrix(df, features, scaler).astype(np.float32))
+
+def test_fused_scaler_rejects_other_columns(artifacts):
+    """Scaler ajusté sur d'autres colonnes: erreur plutôt qu'une standardisation décalée"""
+    features = artifacts[2]
+    train = pd.DataFrame(_dummies(make_clients(100, seed=17), features), columns=features[::-1])
+    with pytest.raises(ValueError, match="features.pkl"):
+        FeatureEncoder(features, scaler=StandardScaler().fit(train))
@@ -0,0 +1,87 @@
+# ============================================================
+# TESTS DU MOTEUR D'INFÉRENCE APLATI
+# ============================================================
+# Description: FlatForest doit rendre exactement les probabilités
+#              de model.predict_proba, sur tous ses parcours
+#              (vectorisé, compilé, forêt relue depuis le disque)
+# ============================================================
+
+# ============================================================
+# IMPORTATION DES BIBLIOTHÈQUES
+# ============================================================
+
+import joblib                             # Modèle d'origine relu au premier grand batch
+import numpy as np                        # Comparaisons exactes
+import pytest                             # Paramétrage des tailles de batch
+
+from churn_core import load_artifacts
+from churn_forest import LAZY_COMPILED_MIN_ROWS, VECTOR_MAX_ROWS, FlatForest, compile_forest
+from conftest import baseline_matrix, make_clients
+
+# 1 ligne, un petit batch (parcours vectorisé) et un grand batch (parcours compilé)
+BATCH_SIZES = [1, VECTOR_MAX_ROWS // 2, LAZY_COMPILED_MIN_ROWS]
+
+def _matrix(artifacts, n_rows: int) -> np.ndarray:
+    """Matrice encodée de n_rows clients synthétiques"""
+    _, scaler, features = artifacts
+    return baseline_matrix(make_clients(n_rows, seed=n_rows), features, scaler)
+
+# ============================================================
+# PROBABILITÉS
+# ============================================================
+
+@pytest.mark.parametrize("n_rows", BATCH_SIZES)
+def test_predict_proba_matches_model(artifacts, n_rows):
+    """Probabilités identiques bit à bit à scikit-learn"""
+    model = artifacts[0]
+    X = _matrix(artifacts, n_rows)
+    forest = FlatForest.from_model(model)
+    np.testing.assert_array_equal(forest.predict_proba(X), model.predict_proba(X))
+    np.testing.assert_array_equal(forest.predict(X), model.predict(X))
+
+@pytest.mark.parametrize("n_rows", BATCH_SIZES)
+def test_loaded_forest_matches_model(artifacts, tmp_path, n_rows):
+    """Forêt relue (mmap), avec chargement paresseux du modèle d'origine"""
+    model = artifacts[0]
+    source_path = tmp_path / "model.pkl"
+    joblib.dump(model, source_path)
+    compile_forest(model).save(str(tmp_path / "model.flat"))
+
+    forest = FlatForest.load(str(tmp_path / "model.flat"), source_path=str(source_path))
+    X = _matrix(artifacts, n_rows)
+    np.testing.assert_array_equal(forest.predict_proba(X), model.predict_proba(X))
+    # Arbres scikit-learn chargés seulement à partir de LAZY_COMPILED_MIN_ROWS lignes
+    assert (forest.estimators is not None) == (n_rows >= LAZY_COMPILED_MIN_ROWS)
+
+def test_vectorized_large_batch_matches_model(artifacts, tmp_path):
+    """Grand batch sans modèle d'origine: parcours vectorisé par blocs"""
+    model = artifacts[0]
+    compile_forest(model).save(str(tmp_path / "model.flat"))
+    forest = FlatForest.load(str(tmp_path / "model.flat"))
+    X = _matrix(artifacts, LAZY_COMPILED_MIN_ROWS)
+    np.testing.assert_array_equal(forest.predict_proba(X), model.predict_proba(X))
+    assert forest.estimators is None
+
+@pytest.mark.parametrize("sklearn_fallback", [False, True])
+def test_load_artifacts_sklearn_fallback(artifacts, artifact_paths, sklearn_fallback):
+    """Par défaut, même un grand batch est prédit depuis les tableaux (.pkl jamais rechargé)"""
+    model = artifacts[0]
+    X = _matrix(artifacts, LAZY_COMPILED_MIN_ROWS)
+    # Stockage créé au besoin depuis le .pkl, puis relu en projection mémoire
+    for _ in range(2):
+        forest = load_artifacts(*artifact_paths, sklearn_fallback=sklearn_fallback)[0]
+        np.testing.assert_array_equal(forest.predict_proba(X), model.predict_proba(X))
+        assert (forest.estimators is not None) == sklearn_fallback
+
+# ============================================================
+# CONTRIBUTIONS (SAABAS)
+# ============================================================
+
+def test_contributions_sum_to_probability(artifacts):
+    """Biais + somme des contributions = probabilité de churn"""
+    model = artifacts[0]
+    X = _matrix(artifacts, 300)
+    bias, contributions = FlatForest.from_model(model).contributions(X)
+    assert contributions.shape == X.shape
+    np.testing.assert_allclose(bias + contributions.sum(axis=1), model.predict_proba(X)[:, 1],
+                               rtol=0, atol=1e-12)
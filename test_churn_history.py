@@ -0,0 +1,134 @@
+# ============================================================
+# TESTS DE L'HISTORIQUE DES PRÉDICTIONS
+# ============================================================
+# Description: PredictionStore doit rendre les lignes enregistrées
+#              et ne jamais garder un batch incomplet; DeltaScorer,
+#              alimenté par un batch enregistré, doit rendre les
+#              probabilités d'un scoring complet
+# ============================================================
+
+# ============================================================
+# IMPORTATION DES BIBLIOTHÈQUES
+# ============================================================
+
+import numpy as np                        # Comparaisons exactes
+import pandas as pd                       # Modification des données clients
+import pytest                             # Vérification des erreurs
+
+from churn_core import build_results_frame, predict_probabilities
+from churn_history import FORM_SOURCE, DeltaScorer, PredictionStore
+from conftest import make_clients
+
+MODEL_KEY = "test-model"
+
+def _save_reference(store: PredictionStore, df: pd.DataFrame, model, encoder, chunksize: int = 250) -> int:
+    """Enregistre un batch complet, bloc par bloc, comme churn_score.py"""
+    batch_id = store.start_batch("reference.csv", threshold=0.5, model_key=MODEL_KEY)
+    for start in range(0, len(df), chunksize):
+        chunk = df.iloc[start:start + chunksize]
+        probabilities = predict_probabilities(chunk, model, encoder)
+        scored = chunk.join(build_results_frame(probabilities, index=chunk.index))
+        store.append(batch_id, scored, start, probabilities)
+    store.finish_batch(batch_id)
+    return batch_id
+
+def test_save_batch_replays_results(artifacts, encoder, tmp_path):
+    """Batch relu depuis ses résultats: mêmes lignes qu'au scoring, utilisable comme référence"""
+    model = artifacts[0]
+    df = make_clients(600, seed=14)
+    probabilities = predict_probabilities(df, model, encoder)
+    scored = df.join(build_results_frame(probabilities))
+    chunks = [scored.iloc[start:start + 250] for start in range(0, len(scored), 250)]
+
+    with PredictionStore(str(tmp_path / "history.db")) as store:
+        reference = _save_reference(store, df, model, encoder)
+        replayed = store.save_batch(chunks, "reference.csv", 0.5, MODEL_KEY, probabilities=probabilities)
+        assert store.find_reference_batch(MODEL_KEY) == replayed
+        pd.testing.assert_frame_equal(store.reference_results(replayed), store.reference_results(reference))
+        pd.testing.assert_frame_equal(store.load_batch(replayed), store.load_batch(reference))
+
+        # Relecture interrompue: aucun batch laissé ouvert
+        def interrupted():
+            yield chunks[0]
+            raise KeyboardInterrupt
+
+        with pytest.raises(KeyboardInterrupt):
+            store.save_batch(interrupted(), "interrupted.csv", 0.5, MODEL_KEY)
+        assert store.batches()["batch_id"].tolist() == [replayed, reference]
+
+def test_load_batch_and_client_history(artifacts, encoder, tmp_path):
+    """Page d'un batch et historique d'un client relus par leurs index"""
+    model = artifacts[0]
+    df = make_clients(600, seed=34)
+    with PredictionStore(str(tmp_path / "history.db")) as store:
+        first = _save_reference(store, df, model, encoder)
+        second = _save_reference(store, df.assign(support_calls=df["support_calls"] + 2), model, encoder)
+        page = store.load_batch(second, start=240, nrows=20)
+        assert page.index.tolist() == list(range(240, 260))
+        assert page["client_id"].tolist() == df["client_id"].iloc[240:260].tolist()
+
+        history = store.client_history("C-250")
+        assert history["batch_id"].tolist() == [first, second]
+        assert history["churn_probability"].tolist() == [store.load_batch(batch_id, 250, 1)["churn_probability"].iloc[0]
+                                                         for batch_id in (first, second)]
+
+def test_prune_keeps_recent_batches_per_model_and_source(tmp_path):
+    """Rétention par modèle et par origine; batchs ouverts et leurs lignes jamais supprimés"""
+    scored = make_clients(3, seed=35).assign(churn_probability=0.5, churn_prediction=1, risk_level="Medium")
+    with PredictionStore(str(tmp_path / "history.db")) as store:
+        files_a = [store.save_batch([scored], "clients.csv", 0.5, "a") for _ in range(4)]
+        files_b = [store.save_batch([scored], "clients.csv", 0.5, "b") for _ in range(2)]
+        forms_a = [store.save_batch([scored.head(1)], FORM_SOURCE, 0.5, "a") for _ in range(3)]
+        open_batch = store.start_batch("en_cours.csv", 0.5, "a")
+        store.append(open_batch, scored)
+
+        assert store.prune(2) == 3
+        kept = set(store.batches()["batch_id"])
+        assert kept == {*files_a[2:], *files_b, *forms_a[1:], open_batch}
+        for batch_id in [*files_a[:2], forms_a[0]]:
+            assert store.load_batch(batch_id).empty
+        assert len(store.load_batch(open_batch)) == 3
+        assert store.client_history("C-0")["batch_id"].isin(kept).all()
+
+        # Le plus récent de chaque modèle est toujours gardé
+        assert store.prune(1) == 3
+        with pytest.raises(ValueError):
+            store.prune(0)
+
+def test_delta_scorer_matches_full_rescore(artifacts, encoder, tmp_path):
+    """Clients inchangés repris, modifiés et nouveaux prédits: résultat d'un scoring complet"""
+    model = artifacts[0]
+    reference = make_clients(1000, seed=7)
+
+    # Nouveau fichier: lignes modifiées, clients nouveaux, supprimés et réordonnés
+    current = reference.copy()
+    current.loc[::10, "support_calls"] += 3
+    current.loc[5::50, "contract_type"] = "Two year"
+    new_clients = make_clients(100, seed=8)
+    new_clients["client_id"] = [f"N-{i}" for i in range(100)]
+    current = pd.concat([current.iloc[50:], new_clients]).sample(frac=1, random_state=0)
+    current = current.reset_index(drop=True)
+
+    predicted_rows = []
+
+    def counted_predict(df):
+        predicted_rows.append(len(df))
+        return predict_probabilities(df, model, encoder)
+
+    with PredictionStore(str(tmp_path / "history.db")) as store:
+        batch_id = _save_reference(store, reference, model, encoder)
+        assert store.find_reference_batch(MODEL_KEY) == batch_id
+        delta = DeltaScorer(store.reference_results(batch_id), counted_predict)
+        probabilities = np.concatenate([delta(current.iloc[start:start + 300])
+                                        for start in range(0, len(current), 300)])
+
+    expected = predict_probabilities(current, model, encoder)
+    np.testing.assert_array_equal(probabilities, expected)
+    pd.testing.assert_frame_equal(build_results_frame(probabilities, threshold=0.35),
+                                  build_results_frame(expected, threshold=0.35))
+
+    # Seules les lignes modifiées ou nouvelles ont été prédites
+    changed = (~current["client_id"].isin(reference["client_id"])
+               | current.merge(reference, how="left", indicator=True)["_merge"].eq("left_only"))
+    assert sum(predicted_rows) == int(changed.sum())
+    assert delta.reused_rows == len(current) - int(changed.sum()) > 0
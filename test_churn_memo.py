@@ -0,0 +1,97 @@
+# ============================================================
+# TESTS DU CACHE DES PRÉDICTIONS
+# ============================================================
+# Description: MemoizedModel doit rendre exactement les
+#              probabilités du modèle, en ne prédisant qu'une fois
+#              chaque ligne distincte
+# ============================================================
+
+# ============================================================
+# IMPORTATION DES BIBLIOTHÈQUES
+# ============================================================
+
+import numpy as np                        # Comparaisons exactes
+
+from churn_core import FeatureEncoder
+from churn_memo import MemoizedModel, unique_rows
+from conftest import make_clients
+
+class CountingModel:
+    """Modèle qui compte les lignes réellement prédites"""
+
+    def __init__(self, model):
+        self.model = model
+        self.classes_ = model.classes_
+        self.rows = []
+
+    def predict_proba(self, X):
+        self.rows.append(len(X))
+        return self.model.predict_proba(X)
+
+def _matrix(encoder: FeatureEncoder, n_rows: int, seed: int) -> np.ndarray:
+    return encoder.transform(make_clients(n_rows, seed=seed))
+
+# ============================================================
+# DÉDOUBLONNAGE
+# ============================================================
+
+def test_unique_rows():
+    """Codes, clés et premières occurrences des lignes identiques"""
+    X = np.array([[1.0, 2.0], [3.0, 0.0], [1.0, 2.0], [3.0, 0.0], [0.0, 0.0]])
+    codes, keys, first = unique_rows(X)
+    assert codes.tolist() == [0, 1, 0, 1, 2]
+    assert first.tolist() == [0, 1, 4]
+    assert len(set(keys)) == 3
+
+def test_duplicates_predicted_once(artifacts, encoder):
+    """Lignes répétées: probabilités du modèle, une prédiction par ligne distincte"""
+    X = _matrix(encoder, 300, seed=19)
+    X = X[np.random.default_rng(20).integers(0, len(X), 2000)]
+    model = CountingModel(artifacts[0])
+    memo = MemoizedModel(model, maxsize=0)
+
+    np.testing.assert_array_equal(memo.predict_proba(X), artifacts[0].predict_proba(X))
+    np.testing.assert_array_equal(memo.predict(X), artifacts[0].predict(X))
+    assert model.rows[0] == len(np.unique(X, axis=0))
+    assert memo.stats()["size"] == 0
+
+# ============================================================
+# CACHE LRU
+# ============================================================
+
+def test_lru_matches_model(artifacts, encoder):
+    """Appels qui se recouvrent: probabilités du modèle, lignes récentes servies par le cache"""
+    X = _matrix(encoder, 400, seed=21)
+    model = CountingModel(artifacts[0])
+    memo = MemoizedModel(model, maxsize=250)
+    expected = artifacts[0].predict_proba(X)
+
+    for start, stop in [(0, 200), (100, 300), (250, 400), (0, 50)]:
+        np.testing.assert_array_equal(memo.predict_proba(X[start:stop]), expected[start:stop])
+    # 100-199 repris au deuxième appel, 250-299 au troisième; 0-49 évincés entre-temps
+    assert model.rows == [200, 100, 100, 50]
+    stats = memo.stats()
+    assert stats["size"] == 250
+    assert (stats["hits"], stats["misses"]) == (150, 450)
+
+    # Lignes les plus récemment utilisées gardées: aucune nouvelle prédiction
+    np.testing.assert_array_equal(memo.predict_proba(X[350:400]), expected[350:400])
+    assert len(model.rows) == 4
+
+def test_large_calls_skip_cache(artifacts, encoder):
+    """Au-delà de lookup_max_rows lignes distinctes: dédoublonnage seul, cache inchangé"""
+    X = _matrix(encoder, 500, seed=22)
+    memo = MemoizedModel(artifacts[0], maxsize=1000, lookup_max_rows=100)
+    np.testing.assert_array_equal(memo.predict_proba(X), artifacts[0].predict_proba(X))
+    assert memo.stats()["size"] == 0
+    memo.predict_proba(X[:50])
+    assert memo.stats()["size"] == 50
+
+def test_invalidate_on_new_artifacts(artifacts, encoder):
+    """Cache vidé seulement quand l'empreinte des artefacts change"""
+    memo = MemoizedModel(artifacts[0], artifacts_key="a")
+    memo.predict_proba(_matrix(encoder, 20, seed=23))
+    assert not memo.invalidate("a")
+    assert memo.stats()["size"] == 20
+    assert memo.invalidate("b")
+    assert memo.stats()["size"] == 0
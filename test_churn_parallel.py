@@ -0,0 +1,84 @@
+# ============================================================
+# TESTS DU SCORING PARALLÈLE
+# ============================================================
+# Description: Le pool de processus doit rendre les probabilités
+#              d'un scoring dans un seul processus, avec les
+#              artefacts de son propre scorer
+# ============================================================
+
+# ============================================================
+# IMPORTATION DES BIBLIOTHÈQUES
+# ============================================================
+
+import threading                          # Processus avec plusieurs threads
+
+import numpy as np                        # Comparaisons exactes
+import pandas as pd                       # Blocs de données clients
+import pytest                             # Paramétrage des méthodes de démarrage
+from sklearn.ensemble import RandomForestClassifier  # Second modèle, différent du premier
+
+import churn_parallel
+from churn_core import FeatureEncoder, build_results_frame, load_artifacts, predict_probabilities
+from churn_parallel import ParallelScorer, default_start_method
+from conftest import make_clients, save_artifacts
+
+def _expected_probabilities(paths, df):
+    model, scaler, features = load_artifacts(*paths)
+    return predict_probabilities(df, model, FeatureEncoder(features, scaler=scaler))
+
+@pytest.mark.parametrize("start_method", ["fork", "forkserver"])
+def test_score_chunks_matches_single_process(artifact_paths, start_method, monkeypatch):
+    """Blocs découpés en fragments: mêmes probabilités et résultats, dans l'ordre"""
+    monkeypatch.setattr(churn_parallel, "MIN_SHARD_SIZE", 100)
+    df = make_clients(1000, seed=14)
+    chunks = [df.iloc[start:start + 300] for start in range(0, len(df), 300)]
+    expected = _expected_probabilities(artifact_paths, df)
+
+    with ParallelScorer(2, *artifact_paths, start_method=start_method) as scorer:
+        results = list(scorer.score_chunks(chunks))
+    probabilities = np.concatenate([probabilities for _, probabilities in results])
+    np.testing.assert_array_equal(probabilities, expected)
+    pd.testing.assert_frame_equal(pd.concat([scored for scored, _ in results]),
+                                  pd.concat([df, build_results_frame(expected, index=df.index)], axis=1))
+    # Artefacts transmis aux processus fils, jamais gardés dans le processus parent
+    assert churn_parallel._worker_state == {}
+
+def test_scorers_keep_their_own_artifacts(artifacts, artifact_paths, tmp_path):
+    """Un second scorer (autres artefacts) ne remplace pas le modèle du premier"""
+    _, scaler, features = artifacts
+    first_model = load_artifacts(*artifact_paths, compile_model=False)[0]
+    other_model = RandomForestClassifier(n_estimators=5, max_depth=3, random_state=1)
+    other_model.fit(np.random.default_rng(15).normal(size=(200, len(features))), np.arange(200) % 2)
+    assert other_model.n_features_in_ == first_model.n_features_in_
+    other_paths = save_artifacts(tmp_path, other_model, scaler, features)
+    df = make_clients(500, seed=16)
+
+    with ParallelScorer(1, *artifact_paths, start_method="fork") as first, \
+            ParallelScorer(1, *other_paths, start_method="fork") as second:
+        np.testing.assert_array_equal(first.score_frame(df)["churn_probability"],
+                                      build_results_frame(_expected_probabilities(artifact_paths, df))["churn_probability"])
+        np.testing.assert_array_equal(second.score_frame(df)["churn_probability"],
+                                      build_results_frame(_expected_probabilities(other_paths, df))["churn_probability"])
+
+def test_no_fork_from_threaded_process():
+    """Avec un autre thread actif, les processus ne sont pas créés par fork"""
+    release = threading.Event()
+    worker = threading.Thread(target=release.wait)
+    worker.start()
+    try:
+        assert default_start_method() != "fork"
+    finally:
+        release.set()
+        worker.join()
+
+def test_worker_error_reaches_caller(artifact_paths):
+    """Bloc invalide: erreur du processus fils remontée à l'appelant, pool toujours utilisable"""
+    df = make_clients(200, seed=17)
+    invalid = df.astype({"age": object})
+    invalid.loc[5, "age"] = "inconnu"
+
+    with ParallelScorer(1, *artifact_paths, start_method="fork") as scorer:
+        with pytest.raises(ValueError):
+            list(scorer.score_chunks([invalid]))
+        np.testing.assert_array_equal(scorer.score_frame(df)["churn_probability"],
+                                      build_results_frame(_expected_probabilities(artifact_paths, df))["churn_probability"])
@@ -0,0 +1,89 @@
+# ============================================================
+# TESTS DU MOTEUR DE RECOMMANDATIONS
+# ============================================================
+# Description: Les règles vectorisées doivent rendre, pour chaque
+#              client, les recommandations de l'ancienne fonction
+#              generate_recommendations
+# ============================================================
+
+# ============================================================
+# IMPORTATION DES BIBLIOTHÈQUES
+# ============================================================
+
+import numpy as np                        # Valeurs manquantes et niveaux de risque
+
+from churn_core import RISK_LEVELS
+from churn_recommendations import (RULES, add_recommendations, mask_messages, recommend_client,
+                                   recommendation_masks, rule_counts)
+from churn_stream import compact_frame
+from conftest import make_clients
+
+def _legacy_recommendations(risk: str, client_data: dict):
+    """Ancienne generate_recommendations du dashboard, une condition par client"""
+    recommendations = []
+    if risk == "High":
+        recommendations.append("🚨 **Action Urgente**: Contactez ce client immédiatement")
+        recommendations.append("💰 Proposez une offre promotionnelle personnalisée (-20% pendant 3 mois)")
+        recommendations.append("🎁 Offrez un upgrade gratuit vers un forfait supérieur")
+    elif risk == "Medium":
+        recommendations.append("⚠️ **Surveillance Active**: Planifiez un appel de satisfaction")
+        recommendations.append("📧 Envoyez une campagne email avec des offres exclusives")
+        recommendations.append("🎯 Proposez des services additionnels gratuits (roaming, data extra)")
+    else:
+        recommendations.append("✅ **Client Stable**: Continuez l'engagement régulier")
+        recommendations.append("🌟 Programmes de fidélité et récompenses")
+        recommendations.append("📱 Invitez à parrainer d'autres clients (programme référent)")
+    if client_data.get('support_calls', 0) > 3:
+        recommendations.append("📞 **Problème détecté**: Nombre élevé d'appels support → "
+                               "Améliorer la qualité de service")
+    if client_data.get('payment_delay', 0) > 0:
+        recommendations.append("💳 **Paiement**: Retards détectés → Proposer un plan de paiement flexible")
+    if client_data.get('contract_type') == 'Monthly':
+        recommendations.append("📝 **Contrat**: Type mensuel → Encourager passage à contrat annuel avec bonus")
+    if client_data.get('network_quality', 5) < 3:
+        recommendations.append("📡 **Réseau**: Qualité faible → Vérifier et améliorer la couverture dans sa zone")
+    if client_data.get('auto_payment', 1) == 0:
+        recommendations.append("🔄 **Paiement Auto**: Non activé → Inciter avec 5% de réduction")
+    if client_data.get('tenure_months', 0) < 6:
+        recommendations.append("🆕 **Nouveau Client**: Ancienneté faible → Programme d'onboarding renforcé")
+    return recommendations
+
+def _clients_with_risk(n_rows: int, seed: int):
+    """Clients avec quelques valeurs manquantes, et un niveau de risque chacun"""
+    df = make_clients(n_rows, seed=seed)
+    df["network_quality"] = df["network_quality"].astype(float)
+    df.loc[::17, "network_quality"] = np.nan
+    df.loc[::23, "contract_type"] = None
+    risk = np.random.default_rng(seed).choice(RISK_LEVELS, n_rows)
+    return df, risk
+
+# ============================================================
+# PARITÉ AVEC L'ANCIENNE FONCTION
+# ============================================================
+
+def test_batch_matches_legacy():
+    """Colonne recommendations d'un bloc (types compacts compris): mêmes messages, client par client"""
+    df, risk = _clients_with_risk(2000, seed=31)
+    expected = [_legacy_recommendations(level, client) for level, client in zip(risk, df.to_dict("records"))]
+
+    for clients in [df, compact_frame(df)]:
+        results = add_recommendations(clients.assign(risk_level=risk))
+        codes = results["recommendations"].cat.codes.to_numpy()
+        assert [mask_messages(int(code)) for code in codes] == expected
+
+def test_client_matches_legacy():
+    """Formulaire: mêmes messages, colonnes absentes remplacées par les valeurs par défaut"""
+    df, risk = _clients_with_risk(300, seed=32)
+    for i, (level, client) in enumerate(zip(risk, df.to_dict("records"))):
+        if i % 3 == 0:
+            client = {name: value for name, value in client.items() if name not in ("auto_payment", "tenure_months")}
+        assert recommend_client(client, level) == _legacy_recommendations(level, client)
+
+def test_rule_counts():
+    """Effectifs par règle: un niveau de risque par client, décompte direct des conditions"""
+    df, risk = _clients_with_risk(1000, seed=33)
+    counts = rule_counts(recommendation_masks(df, risk))
+    assert counts[:3].sum() == len(df)
+    codes = [rule.code for rule in RULES]
+    assert counts[codes.index("support_quality")] == int((df["support_calls"] > 3).sum())
+    assert counts[codes.index("network_coverage")] == int((df["network_quality"] < 3).sum())
@@ -0,0 +1,65 @@
+# ============================================================
+# TESTS DU SCORING EN LIGNE DE COMMANDE
+# ============================================================
+# Description: churn_score.py doit rendre les résultats du cœur de
+#              prédiction et ne jamais laisser un batch de
+#              l'historique ouvert
+# ============================================================
+
+# ============================================================
+# IMPORTATION DES BIBLIOTHÈQUES
+# ============================================================
+
+import numpy as np                        # Comparaisons exactes
+import pandas as pd                       # Relecture du fichier de sortie
+import pytest                             # Vérification des interruptions
+
+import churn_score
+from churn_core import build_results_frame, predict_probabilities
+from churn_history import PredictionStore
+from conftest import make_clients
+
+@pytest.fixture
+def input_csv(tmp_path):
+    """Fichier client de 500 lignes"""
+    path = tmp_path / "clients.csv"
+    make_clients(500, seed=15).to_csv(path, index=False)
+    return str(path)
+
+def _run(input_csv, artifact_paths, *options):
+    model_path, scaler_path, features_path = artifact_paths
+    return churn_score.main([input_csv, "--model", model_path, "--scaler", scaler_path,
+                             "--features", features_path, "--chunksize", "200", *options])
+
+def test_cli_matches_prediction_core(artifacts, encoder, artifact_paths, input_csv, tmp_path):
+    """Sortie et historique: résultats du cœur de prédiction, un batch clos"""
+    output = str(tmp_path / "scored.csv")
+    history = str(tmp_path / "history.db")
+    assert _run(input_csv, artifact_paths, "-o", output, "--history", history) == 0
+
+    df = make_clients(500, seed=15)
+    expected = build_results_frame(predict_probabilities(df, artifacts[0], encoder))
+    result = pd.read_csv(output)
+    np.testing.assert_array_equal(result["churn_probability"], expected["churn_probability"])
+    assert result["risk_level"].tolist() == expected["risk_level"].astype(str).tolist()
+    with PredictionStore(history) as store:
+        assert store.batches()["rows"].tolist() == [500]
+
+def test_interrupted_batch_not_left_open(artifact_paths, input_csv, tmp_path, monkeypatch):
+    """Interruption hors des erreurs attendues (Ctrl+C): batch supprimé de l'historique"""
+    calls = []
+
+    def interrupted(scored):
+        calls.append(len(scored))
+        if len(calls) == 2:
+            raise KeyboardInterrupt
+        return scored
+
+    monkeypatch.setattr(churn_score, "add_recommendations", interrupted)
+    history = str(tmp_path / "history.db")
+    with pytest.raises(KeyboardInterrupt):
+        _run(input_csv, artifact_paths, "-o", str(tmp_path / "scored.csv"), "--history", history,
+             "--recommendations")
+    with PredictionStore(history) as store:
+        assert store.batches().empty
+        assert store.load_batch(1).empty
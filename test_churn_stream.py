@@ -0,0 +1,198 @@
+# ============================================================
+# TESTS DE LA LECTURE ET DE L'ÉCRITURE PAR BLOCS
+# ============================================================
+# Description: Les lecteurs CSV / Parquet et les exports doivent
+#              rendre les mêmes données que pandas, quelle que soit
+#              la taille des blocs
+# ============================================================
+
+# ============================================================
+# IMPORTATION DES BIBLIOTHÈQUES
+# ============================================================
+
+import functools                          # Relecture à petits blocs
+import json                               # Export JSON relu
+import sys                                # Simulation de l'absence de pyarrow
+
+import numpy as np                        # Valeurs manquantes
+import pandas as pd                       # Lecture de référence
+import pytest                             # Paramétrage des lecteurs
+
+import churn_stream
+from churn_core import RISK_LEVELS, build_results_frame, predict_probabilities
+from churn_recommendations import add_recommendations
+from churn_stream import (INPUT_DTYPES, BatchSummary, ChunkWriter, MemoryReport, compact_frame,
+                          export_json, export_parquet, iter_chunks, read_results_page, stream_scored, write_indexed_csv)
+from conftest import make_clients
+
+@pytest.fixture(params=["arrow", "pandas"])
+def csv_reader(request, monkeypatch):
+    """Parseur Arrow à petits blocs d'octets, ou lecture pandas sans pyarrow"""
+    if request.param == "arrow":
+        monkeypatch.setattr(churn_stream, "CSV_BLOCK_BYTES", 4096)
+    else:
+        monkeypatch.setitem(sys.modules, "pyarrow", None)
+    return request.param
+
+# ============================================================
+# LECTURE CSV
+# ============================================================
+
+def test_csv_types_change_after_first_block(tmp_path, csv_reader):
+    """Identifiants numériques puis texte, étiquette et colonne vides: lus en texte sans erreur"""
+    df = make_clients(3000, seed=11)
+    df["client_id"] = [f"{i:05d}" for i in range(len(df))]
+    df.loc[len(df) - 1, "client_id"] = "C-999"
+    df["churn"] = "1"
+    df.loc[len(df) - 1, "churn"] = "yes"
+    df["note"] = None
+    df.loc[len(df) - 1, "note"] = "appel"
+    path = tmp_path / "clients.csv"
+    df.to_csv(path, index=False)
+
+    chunks = list(iter_chunks(str(path), "clients.csv", chunksize=1000))
+    result = pd.concat(chunks)
+    assert len(chunks) == 3
+    # Identifiants et étiquettes gardés tels quels (zéros en tête compris)
+    assert result["client_id"].tolist() == df["client_id"].tolist()
+    assert result["churn"].tolist() == df["churn"].tolist()
+    assert result["note"].isna().sum() == len(df) - 1
+    for name, dtype in INPUT_DTYPES.items():
+        assert str(result[name].dtype) == dtype
+        assert result[name].astype(object).tolist() == df[name].astype(object).tolist()
+
+def test_csv_float_formatted_integers(tmp_path, csv_reader):
+    """Entiers écrits "25.0" compactés, valeurs hors du type compact gardées en float64"""
+    df = make_clients(10, seed=12)
+    df["age"] = df["age"].astype(float)
+    df["voice_minutes"] = df["voice_minutes"].astype(float)
+    df.loc[0, "voice_minutes"] = 1e12
+    path = tmp_path / "clients.csv"
+    df.to_csv(path, index=False, sep=";")
+
+    result = pd.concat(iter_chunks(str(path), "clients.csv"))
+    assert result["age"].dtype == "int16"
+    assert result["voice_minutes"].dtype == "float64"
+    assert result["voice_minutes"].tolist() == df["voice_minutes"].tolist()
+
+# ============================================================
+# RÉSULTATS SUR DISQUE ET EXPORTS
+# ============================================================
+
+@pytest.fixture
+def small_spool_chunks(monkeypatch):
+    """Fichier de résultats relu par blocs de 10 lignes"""
+    monkeypatch.setattr(churn_stream, "iter_spooled",
+                        functools.partial(churn_stream.iter_spooled, chunksize=10))
+
+def _spooled_results(tmp_path, df, model, encoder, chunksize):
+    """Résultats écrits bloc par bloc comme dans le dashboard (write_indexed_csv)"""
+    summary = BatchSummary()
+    path = tmp_path / "results.csv"
+
+    def build_results(chunk, probabilities):
+        return add_recommendations(build_results_frame(probabilities, index=chunk.index), chunk)
+
+    chunks = [df.iloc[start:start + chunksize] for start in range(0, len(df), chunksize)]
+    with open(path, "w", newline="") as spool:
+        for scored, _ in stream_scored(chunks, lambda chunk: predict_probabilities(chunk, model, encoder),
+                                       build_results, summary):
+            write_indexed_csv(scored, spool, summary.row_offsets, summary.total - len(scored))
+    return str(path), summary
+
+def test_spool_without_schema_keeps_text_columns(tmp_path, small_spool_chunks):
+    """Sans types enregistrés: identifiants et colonnes vides du premier bloc relus en texte"""
+    spool = pd.DataFrame({
+        "client_id": [str(i) for i in range(20)] + ["C-1", "007"],
+        "age": np.arange(22),
+        "churn_probability": 0.5,
+        "churn_prediction": 1,
+        "recommendations": [None] * 12 + ["R01|R02"] * 10,
+    })
+    spool.to_csv(tmp_path / "results.csv", index=False)
+
+    export_parquet(str(tmp_path / "results.csv"), str(tmp_path / "results.parquet"))
+    result = pd.read_parquet(tmp_path / "results.parquet")
+    assert result["client_id"].tolist() == spool["client_id"].tolist()
+    assert result["recommendations"].isna().sum() == 12
+    assert result["age"].tolist() == spool["age"].tolist()
+
+def test_exports_use_recorded_schema(artifacts, encoder, tmp_path, small_spool_chunks):
+    """Types de BatchSummary.dtypes: même schéma pour tous les blocs, valeurs du scoring"""
+    model = artifacts[0]
+    df = compact_frame(make_clients(45, seed=13))
+    df["client_id"] = [f"{i:03d}" for i in range(44)] + ["C-1"]
+    path, summary = _spooled_results(tmp_path, df, model, encoder, chunksize=15)
+    assert summary.dtypes["client_id"] == "str"
+    assert summary.dtypes["age"] == "int16"
+
+    export_parquet(path, str(tmp_path / "results.parquet"), dtypes=summary.dtypes)
+    result = pd.read_parquet(tmp_path / "results.parquet")
+    assert result["client_id"].tolist() == df["client_id"].tolist()
+    assert result["age"].dtype == "int16"
+    np.testing.assert_array_equal(result["churn_probability"],
+                                  build_results_frame(predict_probabilities(df, model, encoder))["churn_probability"])
+
+    export_json(path, str(tmp_path / "results.json"), dtypes=summary.dtypes)
+    with open(tmp_path / "results.json", encoding="utf-8") as f:
+        records = json.load(f)
+    assert [record["client_id"] for record in records] == df["client_id"].tolist()
+    assert [record["age"] for record in records] == df["age"].tolist()
+
+    page = read_results_page(path, 40, 5, columns=summary.columns, dtypes=summary.dtypes)
+    assert page["client_id"].tolist() == ["040", "041", "042", "043", "C-1"]
+
+def test_chunk_writer_parquet_aligns_chunks(tmp_path):
+    """Parquet: blocs suivants convertis sans perte dans le schéma du premier"""
+    first = pd.DataFrame({"age": np.array([30, 40], dtype=np.int16), "note": [None, None]})
+    second = pd.DataFrame({"age": np.array([50.0, 60.0]), "note": ["appel", None]})
+    with ChunkWriter(str(tmp_path / "out.parquet"), "parquet") as writer:
+        writer.write(first)
+        writer.write(second)
+    result = pd.read_parquet(tmp_path / "out.parquet")
+    assert result["age"].tolist() == [30, 40, 50, 60]
+    assert result["note"].tolist()[2] == "appel"
+
+    with pytest.raises(ValueError, match="schéma Parquet"):
+        with ChunkWriter(str(tmp_path / "bad.parquet"), "parquet") as writer:
+            writer.write(first)
+            writer.write(pd.DataFrame({"age": [50.5], "note": ["x"]}))
+
+def test_summary_matches_whole_frame(artifacts, encoder, tmp_path):
+    """Agrégats cumulés bloc par bloc: ceux du batch entier, aussi après relecture JSON"""
+    model = artifacts[0]
+    df = compact_frame(make_clients(1000, seed=36))
+    path, summary = _spooled_results(tmp_path, df, model, encoder, chunksize=150)
+    whole = pd.read_csv(path, dtype=summary.dtypes)
+
+    for restored in [summary, BatchSummary.from_dict(json.loads(json.dumps(summary.to_dict())))]:
+        assert restored.total == len(whole)
+        assert restored.churn_count == int(whole["churn_prediction"].sum())
+        assert restored.risk_counts.tolist() == [int((whole["risk_level"] == level).sum()) for level in RISK_LEVELS]
+        assert restored.histogram.tolist() == np.histogram(whole["churn_probability"], bins=restored.bin_edges)[0].tolist()
+        assert restored.top_risk["churn_probability"].tolist() == whole["churn_probability"].nlargest(10).tolist()
+        expected = whole[["age", "monthly_charges", "support_calls"]].describe()
+        pd.testing.assert_frame_equal(restored.describe()[expected.columns].loc[["count", "mean", "std", "min", "max"]],
+                                      expected.loc[["count", "mean", "std", "min", "max"]], check_dtype=False)
+
+# ============================================================
+# RAPPORT MÉMOIRE
+# ============================================================
+
+def test_memory_report_counts_category_codes():
+    """Catégories comptées par leurs codes: le rapport ne dépend pas de la table des modalités"""
+    categories = [f"R{i:03d}" for i in range(512)]
+    df = pd.DataFrame({
+        "age": np.arange(2000, dtype=np.int16),
+        "recommendations": pd.Categorical.from_codes(np.arange(2000) % 3, categories=categories),
+    })
+    report = MemoryReport()
+    report.update(df)
+    assert report.compact_bytes == 2 * 2000 + 2 * 2000   # int16 + codes int16
+    assert report.default_bytes > report.compact_bytes
+    assert "x" in str(report)
+
+    small = MemoryReport()
+    small.update(df.head(3))
+    assert small.bytes_per_row == 4
+    assert "trop peu" in str(small)
@@ -0,0 +1,71 @@
+# ============================================================
+# TESTS DE L'INDEX DES PROBABILITÉS
+# ============================================================
+# Description: Les effectifs de ProbabilityIndex, pour n'importe
+#              quel seuil ou découpage, doivent être ceux de
+#              build_results_frame
+# ============================================================
+
+# ============================================================
+# IMPORTATION DES BIBLIOTHÈQUES
+# ============================================================
+
+import numpy as np                        # Probabilités et étiquettes synthétiques
+import pandas as pd                       # Colonnes d'étiquettes
+import pytest                             # Paramétrage des seuils
+
+from churn_core import RISK_LEVELS, build_results_frame, predict_probabilities
+from churn_tuning import MISSING_LABEL, ProbabilityIndex, label_values
+from conftest import make_clients
+
+@pytest.fixture(scope="module")
+def probabilities(artifacts, encoder):
+    """Probabilités d'un batch (avec des ex aequo, issues d'une moyenne d'arbres)"""
+    return predict_probabilities(make_clients(3000, seed=9), artifacts[0], encoder)
+
+@pytest.mark.parametrize("threshold", [0.0, 0.2, 0.4, 0.5, 0.6, 1.0])
+def test_churn_count_matches_results(probabilities, threshold):
+    """Clients prédits churn au seuil (inclusif), comme churn_prediction"""
+    index = ProbabilityIndex.build(probabilities)
+    results = build_results_frame(probabilities, threshold=threshold)
+    assert index.churn_count(threshold) == int(results["churn_prediction"].sum())
+
+@pytest.mark.parametrize("risk_bins", [[0.4, 0.6], [0.2, 0.8], [0.5, 0.5]])
+def test_risk_counts_match_results(probabilities, risk_bins):
+    """Effectifs par niveau de risque, comme risk_level"""
+    index = ProbabilityIndex.build(probabilities)
+    results = build_results_frame(probabilities, risk_bins=risk_bins)
+    expected = results["risk_level"].value_counts().reindex(RISK_LEVELS).to_numpy()
+    np.testing.assert_array_equal(index.risk_counts(risk_bins), expected)
+
+def test_confusion_matches_results(probabilities):
+    """Matrice de confusion des lignes étiquetées, comme un décompte direct"""
+    rng = np.random.default_rng(10)
+    labels = (rng.random(len(probabilities)) < probabilities).astype(int)
+    index = ProbabilityIndex.build(probabilities, labels)
+    predictions = build_results_frame(probabilities, threshold=0.45)["churn_prediction"].to_numpy()
+    counts = index.confusion(0.45)
+    assert counts["tp"] == int(((predictions == 1) & (labels == 1)).sum())
+    assert counts["fp"] == int(((predictions == 1) & (labels == 0)).sum())
+    assert counts["fn"] == int(((predictions == 0) & (labels == 1)).sum())
+    assert counts["tn"] == int(((predictions == 0) & (labels == 0)).sum())
+
+def test_missing_labels_and_saved_index(probabilities, tmp_path):
+    """Étiquettes manquantes exclues du décompte; index relu à l'identique"""
+    rng = np.random.default_rng(18)
+    labels = np.where(rng.random(len(probabilities)) < 0.3, MISSING_LABEL,
+                      (rng.random(len(probabilities)) < probabilities).astype(np.int8))
+    index = ProbabilityIndex.build(probabilities, labels)
+    counts = index.confusion(0.5)
+    assert sum(int(count) for count in counts.values()) == int((labels != MISSING_LABEL).sum())
+
+    index.save(str(tmp_path))
+    loaded = ProbabilityIndex.load(str(tmp_path))
+    assert loaded.confusion(0.5) == counts
+    np.testing.assert_array_equal(loaded.curve(np.linspace(0, 1, 11)), index.curve(np.linspace(0, 1, 11)))
+
+def test_label_values():
+    """Étiquettes numériques et texte, valeurs inconnues ou vides manquantes"""
+    assert label_values(pd.Series([1, 0, None, 2])).tolist() == [1, 0, MISSING_LABEL, 1]
+    assert label_values(pd.Series(["Yes", " non", "peut-être", None, "1.0"])).tolist() == [
+        1, 0, MISSING_LABEL, MISSING_LABEL, 1]